@@ -0,0 +1,91 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+ASSET_CACHE_FILE = "audio_asset_cache.sqlite3"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # HeyGen giữ asset lâu hơn, 7 ngày là an toàn
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Tính SHA-256 nội dung file (đọc theo block, không nạp cả file vào RAM)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def account_fingerprint(api_key: str) -> str:
+    """Định danh tài khoản từ API key mà không lưu key gốc xuống đĩa."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class AudioAssetCache:
+    """
+    Persistent index mapping (SHA-256 of audio bytes, account) -> HeyGen asset ID.
+
+    Lets repeat renders of the same narration file skip the upload entirely.
+    Entries older than ttl_seconds are ignored and purged. Safe to share between
+    threads; `lock_for` gives a per-file lock so concurrent jobs using the same
+    audio upload it only once.
+    """
+
+    def __init__(self, path: str = ASSET_CACHE_FILE, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS audio_assets ("
+                " content_sha256 TEXT NOT NULL,"
+                " account TEXT NOT NULL,"
+                " asset_id TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (content_sha256, account))"
+            )
+        self.purge_expired()
+
+    def lock_for(self, content_sha256: str, account: str) -> threading.Lock:
+        """Lock dùng để chỉ một thread upload cùng một file cho cùng tài khoản."""
+        with self._lock:
+            return self._key_locks.setdefault((content_sha256, account), threading.Lock())
+
+    def get(self, content_sha256: str, account: str) -> Optional[str]:
+        """Trả về asset ID còn hạn, hoặc None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT asset_id FROM audio_assets WHERE content_sha256 = ? AND account = ? AND created_at >= ?",
+                (content_sha256, account, time.time() - self.ttl_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, content_sha256: str, account: str, asset_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_assets (content_sha256, account, asset_id, created_at) VALUES (?, ?, ?, ?)",
+                (content_sha256, account, asset_id, time.time()),
+            )
+
+    def invalidate(self, content_sha256: str, account: str) -> None:
+        """Xóa một entry (ví dụ khi HeyGen không còn nhận asset ID này)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM audio_assets WHERE content_sha256 = ? AND account = ?",
+                (content_sha256, account),
+            )
+
+    def purge_expired(self) -> int:
+        """Xóa các entry đã hết hạn, trả về số dòng bị xóa."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM audio_assets WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
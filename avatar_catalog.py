@@ -0,0 +1,177 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+AVATAR_CATALOG_FILE = "avatar_catalog.sqlite3"
+SCHEMA_VERSION = 1
+
+# Cột metadata lưu cho mỗi avatar / talking photo (ngoài account, avatar_id)
+CATALOG_FIELDS = ("name", "gender", "type", "premium", "preview_image_url", "preview_video_url")
+
+
+def parse_catalog_entries(heygen_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Chuyển phần `data` của /v2/avatars thành danh sách entry của catalog.
+
+    Avatar và talking photo dùng chung một dạng: avatar_id (talking_photo_id với
+    talking photo) cùng các cột trong CATALOG_FIELDS. Các ID trùng chỉ giữ bản đầu.
+    """
+    entries = {}
+    for avatar in heygen_data.get('avatars') or []:
+        if isinstance(avatar, dict) and avatar.get('avatar_id'):
+            entries.setdefault(avatar['avatar_id'], {
+                "avatar_id": avatar['avatar_id'],
+                "name": avatar.get('avatar_name'),
+                "gender": avatar.get('gender'),
+                "type": avatar.get('type') or "avatar",
+                "premium": bool(avatar.get('premium')),
+                "preview_image_url": avatar.get('preview_image_url'),
+                "preview_video_url": avatar.get('preview_video_url'),
+            })
+    for photo in heygen_data.get('talking_photos') or []:
+        if isinstance(photo, dict) and photo.get('talking_photo_id'):
+            entries.setdefault(photo['talking_photo_id'], {
+                "avatar_id": photo['talking_photo_id'],
+                "name": photo.get('talking_photo_name'),
+                "gender": None,
+                "type": "talking_photo",
+                "premium": False,
+                "preview_image_url": photo.get('preview_image_url'),
+                "preview_video_url": None,
+            })
+    return list(entries.values())
+
+
+class AvatarCatalog:
+    """
+    Catalog avatar trong SQLite, phân vùng theo tài khoản (fingerprint của API key).
+
+    Mỗi tài khoản có bảng avatar với metadata (tên, giới tính, loại, premium,
+    URL preview) và một dòng catalog_meta lưu ETag/Last-Modified, thời điểm tải
+    và version tăng mỗi khi nội dung đổi. `merge` chỉ ghi các avatar thêm/sửa/xóa
+    so với bản đang lưu; `touch` ghi nhận lần làm mới trả về 304 Not Modified.
+    """
+
+    def __init__(self, path: str = AVATAR_CATALOG_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # Cache có thể dựng lại từ API: đổi schema thì bỏ bảng cũ
+                self._conn.execute("DROP TABLE IF EXISTS avatars")
+                self._conn.execute("DROP TABLE IF EXISTS catalog_meta")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS avatars ("
+                " account TEXT NOT NULL,"
+                " avatar_id TEXT NOT NULL,"
+                " name TEXT, gender TEXT, type TEXT, premium INTEGER NOT NULL DEFAULT 0,"
+                " preview_image_url TEXT, preview_video_url TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (account, avatar_id)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS catalog_meta ("
+                " account TEXT PRIMARY KEY,"
+                " etag TEXT, last_modified TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " version INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def validators(self, account: str) -> Tuple[Optional[str], Optional[str]]:
+        """(ETag, Last-Modified) của lần tải trước, dùng cho request có điều kiện."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM catalog_meta WHERE account = ?", (account,)
+            ).fetchone()
+        return (row["etag"], row["last_modified"]) if row else (None, None)
+
+    def info(self, account: str) -> Optional[Dict[str, Any]]:
+        """Thông tin catalog của tài khoản (fetched_at, version, etag...), hoặc None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM catalog_meta WHERE account = ?", (account,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, account: str) -> List[Dict[str, Any]]:
+        """Tất cả avatar của tài khoản, sắp theo avatar_id."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT avatar_id, name, gender, type, premium, preview_image_url,"
+                " preview_video_url, fetched_at FROM avatars WHERE account = ? ORDER BY avatar_id",
+                (account,),
+            ).fetchall()
+        return [dict(row, premium=bool(row["premium"])) for row in rows]
+
+    def ids(self, account: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT avatar_id FROM avatars WHERE account = ? ORDER BY avatar_id", (account,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def merge(self, account: str, entries: Iterable[Dict[str, Any]],
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, int]:
+        """
+        Áp một bản catalog đầy đủ như một delta: chỉ ghi avatar mới/đổi, xóa avatar đã mất.
+
+        Returns:
+            dict: Số avatar added / updated / removed / unchanged.
+        """
+        now = time.time()
+        incoming = {entry["avatar_id"]: entry for entry in entries}
+        with self._lock, self._conn:
+            current = {
+                row["avatar_id"]: tuple(row[field] for field in CATALOG_FIELDS)
+                for row in self._conn.execute(
+                    "SELECT avatar_id, " + ", ".join(CATALOG_FIELDS) + " FROM avatars WHERE account = ?",
+                    (account,),
+                )
+            }
+            changed = []
+            added = 0
+            for avatar_id, entry in incoming.items():
+                values = tuple(int(bool(entry.get(field))) if field == "premium" else entry.get(field)
+                               for field in CATALOG_FIELDS)
+                if current.get(avatar_id) != values:
+                    added += avatar_id not in current
+                    changed.append((account, avatar_id, *values, now))
+            removed = [(account, avatar_id) for avatar_id in current if avatar_id not in incoming]
+            if changed:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO avatars (account, avatar_id, " + ", ".join(CATALOG_FIELDS) +
+                    ", fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    changed,
+                )
+            if removed:
+                self._conn.executemany("DELETE FROM avatars WHERE account = ? AND avatar_id = ?", removed)
+            self._conn.execute(
+                "INSERT INTO catalog_meta (account, etag, last_modified, fetched_at, version)"
+                " VALUES (?, ?, ?, ?, 1)"
+                " ON CONFLICT(account) DO UPDATE SET etag = excluded.etag,"
+                " last_modified = excluded.last_modified, fetched_at = excluded.fetched_at,"
+                " version = version + ?",
+                (account, etag, last_modified, now, 1 if (changed or removed) else 0),
+            )
+        return {
+            "added": added,
+            "updated": len(changed) - added,
+            "removed": len(removed),
+            "unchanged": len(incoming) - len(changed),
+        }
+
+    def touch(self, account: str) -> None:
+        """Ghi nhận lần làm mới không có thay đổi (HTTP 304)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE catalog_meta SET fetched_at = ? WHERE account = ?", (time.time(), account)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,58 @@
+from array import array
+from typing import Dict, Iterable, List
+
+MAX_GRAM = 3  # Độ dài n-gram lớn nhất được đánh chỉ mục
+DEFAULT_RESULT_LIMIT = 200  # Số kết quả tối đa đưa vào ComboBox
+
+
+class AvatarSearchIndex:
+    """
+    Chỉ mục tìm kiếm chuỗi con (không phân biệt hoa thường) cho danh sách avatar ID.
+
+    Dựng một lần khi nạp danh sách: mỗi n-gram độ dài 1..MAX_GRAM ánh xạ tới
+    danh sách vị trí (tăng dần) của các ID chứa nó. Truy vấn ngắn tra thẳng một
+    posting list; truy vấn dài lấy posting list ngắn nhất trong các trigram của
+    nó làm ứng viên, kiểm tra lại từng ứng viên và dừng khi đủ `limit` kết quả.
+    Kết quả giữ nguyên thứ tự danh sách gốc, giống phép lọc `in` tuyến tính cũ.
+    """
+
+    def __init__(self, ids: Iterable[str]):
+        self.ids: List[str] = list(ids)
+        self._lowered = [id_val.lower() for id_val in self.ids]
+        postings: Dict[str, array] = {}
+        for position, id_val in enumerate(self._lowered):
+            grams = {id_val[start:start + size]
+                     for size in range(1, MAX_GRAM + 1)
+                     for start in range(len(id_val) - size + 1)}
+            for gram in grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("I")
+                posting.append(position)
+        self._postings = postings
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: str, limit: int = DEFAULT_RESULT_LIMIT) -> List[str]:
+        """Trả về tối đa `limit` ID chứa `query`, theo thứ tự danh sách gốc."""
+        query = query.strip().lower()
+        if not query:
+            return self.ids[:limit]
+        if len(query) <= MAX_GRAM:
+            return [self.ids[p] for p in self._postings.get(query, ())[:limit]]
+
+        grams = {query[i:i + MAX_GRAM] for i in range(len(query) - MAX_GRAM + 1)}
+        # Posting list ngắn nhất là tập ứng viên; kiểm tra lại bằng `in` trên từng ứng viên
+        candidates = min((self._postings.get(gram, ()) for gram in grams), key=len)
+        results = []
+        for position in candidates:
+            if query in self._lowered[position]:
+                results.append(self.ids[position])
+                if len(results) >= limit:
+                    break
+        return results
+
+    def matches(self, id_val: str, query: str) -> bool:
+        """ID có khớp truy vấn không (dùng để giữ lựa chọn hiện tại ngoài giới hạn)."""
+        return query.strip().lower() in id_val.lower()
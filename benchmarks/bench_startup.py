@@ -0,0 +1,199 @@
+"""Cold start benchmark for the heygen-mcp server.
+
+Measures two things:
+
+* Time to first tool listing: the server is spawned over stdio the way an MCP
+  host does it, then timed until it answers ``initialize`` and ``tools/list``.
+* Import cost per module, parsed from ``python -X importtime``, for the server
+  entry point and for the submodules the GUI and sync helpers import on their
+  own.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 10 --output bench_output.txt
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules timed with -X importtime; the submodules must not pull in the server
+IMPORT_TARGETS = (
+    "heygen_mcp.server",
+    "heygen_mcp.api_client",
+    "heygen_mcp.polling",
+    "heygen_mcp.job_store",
+)
+
+PROTOCOL_VERSION = "2025-03-26"
+
+
+def server_env() -> Dict[str, str]:
+    """Environment for a server that lists tools without touching the network."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")])
+    )
+    env.setdefault("HEYGEN_API_KEY", "benchmark-key")
+    # Empty values win over a .env file and keep the job journal and webhook
+    # receiver off
+    env["HEYGEN_JOB_STORE"] = ""
+    env["HEYGEN_WEBHOOK_PORT"] = ""
+    return env
+
+
+def _read_response(proc: subprocess.Popen, request_id: int) -> dict:
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError(
+                "Server exited before answering: "
+                + proc.stderr.read().decode(errors="replace")[-2000:]
+            )
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def _send(proc: subprocess.Popen, message: dict) -> None:
+    proc.stdin.write(json.dumps(message).encode() + b"\n")
+    proc.stdin.flush()
+
+
+def time_tool_listing(timeout: float = 60.0) -> Tuple[float, float, int]:
+    """Spawn the server once and time its first answers.
+
+    Returns:
+        Seconds until ``initialize`` was answered, seconds until the tool list
+        arrived, and the number of tools listed
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "heygen_mcp.server"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=server_env(),
+        cwd=REPO_ROOT,
+    )
+    watchdog = threading.Timer(timeout, proc.kill)
+    watchdog.start()
+    try:
+        _send(
+            proc,
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "bench_startup", "version": "0"},
+                },
+            },
+        )
+        _read_response(proc, 1)
+        initialized = time.perf_counter() - start
+        _send(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _send(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        tools = _read_response(proc, 2)["result"]["tools"]
+        listed = time.perf_counter() - start
+    finally:
+        watchdog.cancel()
+        proc.kill()
+        proc.wait()
+    return initialized, listed, len(tools)
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (module name, self microseconds, cumulative microseconds) per import,
+        in the order Python reported them. Nested imports keep the leading
+        spaces importtime uses to show their depth.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=server_env(),
+        cwd=REPO_ROOT,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(runs: int, top: int) -> List[str]:
+    lines = [f"Python {sys.version.split()[0]} on {sys.platform}", ""]
+
+    # Warm the bytecode cache so every run measures the same thing
+    time_tool_listing()
+    samples = [time_tool_listing() for _ in range(runs)]
+    initialized = [sample[0] * 1000 for sample in samples]
+    listed = [sample[1] * 1000 for sample in samples]
+    lines.append(f"Time to first tool listing ({runs} runs, {samples[0][2]} tools)")
+    for label, values in (("initialize", initialized), ("tools/list", listed)):
+        lines.append(
+            f"  {label:<11} min {min(values):8.1f} ms   "
+            f"median {statistics.median(values):8.1f} ms   "
+            f"max {max(values):8.1f} ms"
+        )
+
+    for module in IMPORT_TARGETS:
+        rows = import_times(module)
+        # Interpreter startup ends with site; the top-level rows after it cover
+        # everything the import loaded, including the package __init__
+        startup = max((i for i, row in enumerate(rows) if row[0] == "site"), default=-1)
+        rows = rows[startup + 1 :]
+        total = sum(cumulative for name, _, cumulative in rows if name[0] != " ")
+        lines += ["", f"import {module}: {total / 1000:.1f} ms cumulative"]
+        rows = [
+            (name.strip(), self_us, cumulative) for name, self_us, cumulative in rows
+        ]
+        own = [row for row in rows if row[0].startswith("heygen_mcp")]
+        heavy = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+        lines.append("  heygen_mcp modules          self ms    cumulative ms")
+        for name, self_us, cumulative_us in own:
+            lines.append(
+                f"    {name:<26}{self_us / 1000:8.1f}{cumulative_us / 1000:14.1f}"
+            )
+        if module == IMPORT_TARGETS[0]:
+            lines.append(f"  top {top} modules by self time")
+            for name, self_us, cumulative_us in heavy:
+                lines.append(
+                    f"    {name:<40}{self_us / 1000:8.1f}{cumulative_us / 1000:14.1f}"
+                )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Server spawns to time.")
+    parser.add_argument("--top", type=int, default=20, help="Slowest imports to list.")
+    parser.add_argument("--output", help="Also write the report to this file.")
+    args = parser.parse_args()
+
+    text = "\n".join(report(max(1, args.runs), args.top)) + "\n"
+    print(text, end="")
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
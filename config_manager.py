@@ -26,7 +26,10 @@ def load_config(log_callback):
         "avatar_id": "Conrad_standing_house_front",
         "output_dir": os.getcwd(),
         "proxy": {"http": "", "https": ""},
-        "window_geometry": "850x900+100+100" # widthxheight+x_offset+y_offset
+        "window_geometry": "850x900+100+100", # widthxheight+x_offset+y_offset
+        "audio_asset_cache_ttl_hours": 168, # Thời gian dùng lại asset audio đã upload
+        "auto_balance_keys": False, # Tự động chọn API Key cho mỗi job
+        "log_file": "" # File log JSON-lines xoay vòng; để trống nếu không ghi file
     }
     try:
         if os.path.exists(CONFIG_FILE):
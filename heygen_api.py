@@ -1,8 +1,24 @@
 import requests
+import httpx
 import json
 import traceback
 import os # Thêm import os
-from typing import Optional, Dict, Any, List, Tuple
+import hashlib
+import heapq
+import itertools
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Tuple, Callable, Container, Iterator
+
+import heygen_api_async
+from asset_cache import AudioAssetCache, account_fingerprint, file_sha256
+from avatar_catalog import AvatarCatalog
+from heygen_mcp.polling import TERMINAL_VIDEO_STATUSES, next_poll_interval
+from heygen_mcp.ratelimit import get_shared_limiter
+from heygen_mcp.retry import CONNECT, THROTTLED, classify_error
 
 # --- Constants ---
 BASE_URL = "https://api.heygen.com"
@@ -14,16 +30,119 @@ def check_heygen_credit(api_key, proxies):
     # ... (API call logic) ...
     return {"status": "info", "message": "Chức năng kiểm tra credit chưa có API chính thức."}
 
+# --- Streaming Upload Helpers ---
+UPLOAD_CHUNK_SIZE = 256 * 1024     # Kích thước buffer đọc trước khi upload
+UPLOAD_MAX_RETRIES = 3
+UPLOAD_PROGRESS_INTERVAL = 0.25    # Giây giữa hai lần gọi progress_callback
+
+
+class UploadProgress:
+    """Snapshot of an upload's progress and throughput, passed to progress callbacks."""
+
+    def __init__(self, file_name: str, bytes_sent: int, total_bytes: int, elapsed: float, attempt: int):
+        self.file_name = file_name
+        self.bytes_sent = bytes_sent
+        self.total_bytes = total_bytes
+        self.elapsed = elapsed
+        self.attempt = attempt
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.bytes_sent / self.total_bytes if self.total_bytes else 100.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes_sent / 1048576 / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _ProgressFileReader:
+    """
+    File-like body for requests that streams a file in bounded chunks.
+
+    Exposes __len__ so requests sends a Content-Length instead of chunked
+    encoding, holds at most one UPLOAD_CHUNK_SIZE block in memory, and reports
+    progress as the body is consumed.
+    """
+
+    def __init__(self, file_path: str, progress_callback=None, attempt: int = 1):
+        self._file = open(file_path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._name = os.path.basename(file_path)
+        self._buffer = b""
+        self._sent = 0
+        self._started = time.monotonic()
+        self._last_report = 0.0
+        self._callback = progress_callback
+        self._attempt = attempt
+
+    def __len__(self):
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._buffer:
+            self._buffer = self._file.read(max(size, UPLOAD_CHUNK_SIZE) if size and size > 0 else UPLOAD_CHUNK_SIZE)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._sent += len(data)
+        self._report(force=not data or self._sent >= self._size)
+        return data
+
+    def progress(self) -> UploadProgress:
+        return UploadProgress(self._name, self._sent, self._size, time.monotonic() - self._started, self._attempt)
+
+    def _report(self, force: bool = False):
+        if not self._callback:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= UPLOAD_PROGRESS_INTERVAL:
+            self._last_report = now
+            try:
+                self._callback(self.progress())
+            except Exception as e:
+                print(f"[API UPLOAD] Lỗi trong progress_callback: {e}")
+
+    def close(self):
+        self._file.close()
+
+
+def _is_transient_upload_error(error: Exception) -> bool:
+    """Connection problems, timeouts, 429 and 5xx are worth retrying."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+def _retry_after_seconds(response) -> Optional[float]:
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
 # --- Upload Audio Function (Corrected based on Official Docs) ---
-def upload_audio_to_heygen(api_key: str, file_path: str, proxies: Optional[Dict[str, str]] = None) -> str:
+def upload_audio_to_heygen(api_key: str, file_path: str, proxies: Optional[Dict[str, str]] = None,
+                           progress_callback: Optional[Callable[[UploadProgress], None]] = None,
+                           max_retries: int = UPLOAD_MAX_RETRIES) -> str:
     """
     Uploads a local audio file to HeyGen via the official /v1/asset endpoint 
     and returns the asset ID.
 
+    The file is streamed from disk in UPLOAD_CHUNK_SIZE blocks rather than read
+    into memory. Connection errors, timeouts, 429 and 5xx responses are retried
+    with exponential backoff (honouring Retry-After), restarting from the
+    beginning of the file.
+
     Args:
         api_key: The HeyGen API key.
         file_path: The local path to the audio file.
         proxies: Optional dictionary of proxies for the request.
+        progress_callback: Optional, called with an UploadProgress (bytes sent,
+            MB/s, attempt) at most every UPLOAD_PROGRESS_INTERVAL seconds.
+        max_retries: Number of retries after the first attempt.
 
     Returns:
         The asset ID (string) from the API response.
@@ -65,14 +184,32 @@ def upload_audio_to_heygen(api_key: str, file_path: str, proxies: Optional[Dict[
 
     print(f"[API UPLOAD] POST {url} - File: {file_name}, Content-Type: {mime_type}")
 
+    limiter = get_shared_limiter()
     try:
-        with open(file_path, 'rb') as file_data:
-            # --- Send raw data using 'data' parameter ---            
-            response = requests.post(url, headers=headers, data=file_data, proxies=proxies, timeout=180) # Longer timeout for upload
-
-        print(f"[API UPLOAD] Response Status: {response.status_code}")
-        # print(f"[API UPLOAD] Response Body: {response.text[:500]}...") # Uncomment for debugging
-        response.raise_for_status() # Raise HTTPError for bad status codes (4xx or 5xx)
+        attempt = 0
+        while True:
+            attempt += 1
+            body = _ProgressFileReader(file_path, progress_callback, attempt)
+            try:
+                bucket = limiter.acquire_sync(api_key, url) if limiter.enabled else None
+                # --- Stream raw data using 'data' parameter ---
+                response = requests.post(url, headers=headers, data=body, proxies=proxies, timeout=(15, 180)) # Longer read timeout for upload
+                print(f"[API UPLOAD] Response Status: {response.status_code}")
+                if bucket is not None:
+                    limiter.report(bucket, response.status_code, response.headers.get("Retry-After"))
+                # print(f"[API UPLOAD] Response Body: {response.text[:500]}...") # Uncomment for debugging
+                response.raise_for_status() # Raise HTTPError for bad status codes (4xx or 5xx)
+                progress = body.progress()
+                print(f"[API UPLOAD] Đã gửi {progress.bytes_sent / 1048576:.1f} MB trong {progress.elapsed:.1f}s ({progress.mb_per_second:.2f} MB/s)")
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt > max_retries or not _is_transient_upload_error(e):
+                    raise
+                delay = _retry_after_seconds(getattr(e, "response", None)) or min(2 ** attempt, 30)
+                print(f"[API UPLOAD] Lỗi tạm thời: {e}. Thử lại lần {attempt}/{max_retries} sau {delay:.0f} giây...")
+                time.sleep(delay)
+            finally:
+                body.close()
 
         response_data = response.json()
 
@@ -115,28 +252,48 @@ def upload_audio_to_heygen(api_key: str, file_path: str, proxies: Optional[Dict[
         print(f"[API ERROR] Lỗi không xác định khi upload asset: {e}\n{traceback.format_exc()}")
         raise
 
-def generate_heygen_video(api_key: str, audio_input: str, avatar_id: str, output_dir: str, proxies: Optional[Dict[str, str]] = None) -> str:
+def upload_audio_cached(api_key: str, file_path: str, asset_cache: AudioAssetCache,
+                        proxies: Optional[Dict[str, str]] = None,
+                        progress_callback: Optional[Callable[[UploadProgress], None]] = None) -> Tuple[str, bool]:
     """
-    Generates an avatar video using either a local audio file path or a public audio URL.
-    If a local path is provided, it uploads the file first to get an audio_asset_id.
+    Uploads an audio file unless the same bytes were already uploaded for this account.
 
-    Args:
-        api_key: The HeyGen API key.
-        audio_input: Local path to the audio file OR public URL of the audio file.
-        avatar_id: The ID of the avatar to use.
-        output_dir: The intended output directory (currently unused in API call).
-        proxies: Optional dictionary of proxies for the request.
+    Looks up the SHA-256 of the file content in asset_cache. Concurrent calls for
+    the same file and account wait on each other, so it is uploaded only once.
 
     Returns:
-        The video_id of the generated video task.
+        (asset_id, True if it came from the cache)
+    """
+    content_hash = file_sha256(file_path)
+    account = account_fingerprint(api_key)
+    with asset_cache.lock_for(content_hash, account):
+        asset_id = asset_cache.get(content_hash, account)
+        if asset_id:
+            print(f"[API UPLOAD] Bỏ qua upload {os.path.basename(file_path)}: đã có Asset ID {asset_id} (sha256 {content_hash[:12]}...)")
+            return asset_id, True
+        asset_id = upload_audio_to_heygen(api_key, file_path, proxies, progress_callback=progress_callback)
+        asset_cache.put(content_hash, account, asset_id)
+        return asset_id, False
+
+
+def prepare_voice_settings(api_key: str, audio_input: str, proxies: Optional[Dict[str, str]] = None,
+                           upload_progress_callback: Optional[Callable[[UploadProgress], None]] = None,
+                           asset_cache: Optional[AudioAssetCache] = None) -> Tuple[Dict[str, str], Optional[Tuple[str, str]]]:
+    """
+    Resolves audio_input to the 'voice' block of a /v2/video/generate payload.
+    A local file is uploaded first (or its cached asset ID reused); a URL is used as is.
+
+    Returns:
+        (voice_settings, cached_asset_key) - cached_asset_key is (sha256, account)
+        when the asset ID came from asset_cache, so the caller can invalidate it
+        if HeyGen rejects the asset.
 
     Raises:
-        requests.exceptions.RequestException: If any network request fails.
-        ValueError: If the audio_input is invalid, upload fails, or API response indicates an error.
-        FileNotFoundError: If audio_input is a path and the file is not found.
+        ValueError: If the audio_input is invalid or the upload fails.
     """
     audio_url = None
     audio_asset_id = None
+    cached_asset_key = None  # (sha256, account) nếu asset ID lấy từ cache
 
     # --- Determine input type and get asset_id or url ---    
     is_url = audio_input.startswith(('http://', 'https://'))
@@ -145,7 +302,12 @@ def generate_heygen_video(api_key: str, audio_input: str, avatar_id: str, output
     if is_local_file:
         print(f"Phát hiện file audio local: {audio_input}. Bắt đầu upload để lấy Asset ID...")
         try:
-            audio_asset_id = upload_audio_to_heygen(api_key, audio_input, proxies)
+            if asset_cache is not None:
+                audio_asset_id, from_cache = upload_audio_cached(api_key, audio_input, asset_cache, proxies, upload_progress_callback)
+                if from_cache:
+                    cached_asset_key = (file_sha256(audio_input), account_fingerprint(api_key))
+            else:
+                audio_asset_id = upload_audio_to_heygen(api_key, audio_input, proxies, progress_callback=upload_progress_callback)
             print(f"Upload thành công. Sử dụng Audio Asset ID: {audio_asset_id}")
         except (requests.exceptions.RequestException, ValueError, FileNotFoundError, KeyError, Exception) as upload_err:
             # Catch specific errors from upload and raise a new ValueError for the generation step
@@ -156,14 +318,6 @@ def generate_heygen_video(api_key: str, audio_input: str, avatar_id: str, output
     else:
         raise ValueError(f"Đầu vào audio không hợp lệ: '{audio_input}'. Cần URL công khai hoặc đường dẫn file tồn tại.")
 
-    # --- Prepare Payload for /v2/video/generate ---    
-    generate_url = f"{BASE_URL}/v2/video/generate"
-    headers = {
-        "accept": "application/json",
-        "x-api-key": api_key,
-        "content-type": "application/json"
-    }
-
     voice_settings = {"type": "audio"}
     if audio_asset_id:
         voice_settings["audio_asset_id"] = audio_asset_id
@@ -171,66 +325,50 @@ def generate_heygen_video(api_key: str, audio_input: str, avatar_id: str, output
         voice_settings["audio_url"] = audio_url
     else:
         raise ValueError("Không có audio_asset_id hoặc audio_url để tạo video.")
+    return voice_settings, cached_asset_key
+
+def generate_heygen_video(api_key: str, audio_input: str, avatar_id: str, output_dir: str, proxies: Optional[Dict[str, str]] = None,
+                          upload_progress_callback: Optional[Callable[[UploadProgress], None]] = None,
+                          asset_cache: Optional[AudioAssetCache] = None,
+                          on_retry: Optional[Callable[[int, Exception, float], None]] = None,
+                          callback_id: Optional[str] = None,
+                          on_audio_ready: Optional[Callable[[Dict[str, str]], None]] = None) -> str:
+    """
+    Generates an avatar video using either a local audio file path or a public audio URL.
+    If a local path is provided, it uploads the file first to get an audio_asset_id.
+    Thin wrapper over heygen_api_async.generate_heygen_video (shared connection pool).
 
-    payload = {
-        "video_inputs": [
-            {
-                "character": {
-                    "type": "avatar",
-                    "avatar_id": avatar_id,
-                    "avatar_style": "normal"
-                },
-                "voice": voice_settings
-            }
-        ],
-        # --- Add dimension field for 1280x720 resolution ---        
-        "dimension": {
-            "width": 1280,
-            "height": 720
-        },
-        "test": False
-    }
-
-    # --- Call /v2/video/generate API ---    
-    try:
-        print(f"[API REQUEST] POST {generate_url}")
-        # print(f"[API REQUEST] Payload: {json.dumps(payload, indent=2)}") # Uncomment for debugging payload
-        response = requests.post(generate_url, headers=headers, json=payload, proxies=proxies, timeout=60)
-
-        print(f"[API RESPONSE] Status Code: {response.status_code}")
-        # print(f"[API RESPONSE] Body: {response.text[:500]}...") # Uncomment for debugging response
-
-        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-
-        if data is None:
-            raise ValueError("API tạo video không trả về dữ liệu.")
-
-        error_info = data.get('error')
-        if error_info is not None:
-            msg = f"Lỗi API tạo video: {error_info.get('message', 'Unknown error')}"
-            if error_info.get('code'): msg += f" (Code: {error_info['code']})"
-            raise ValueError(msg)
+    Args:
+        api_key: The HeyGen API key.
+        audio_input: Local path to the audio file OR public URL of the audio file.
+        avatar_id: The ID of the avatar to use.
+        output_dir: The intended output directory (currently unused in API call).
+        proxies: Optional dictionary of proxies for the request.
+        upload_progress_callback: Optional, forwarded to upload_audio_to_heygen.
+        asset_cache: Optional AudioAssetCache; if given, a local file whose bytes
+            were already uploaded for this account reuses the cached asset ID.
+        on_retry: Optional, called with (attempt, error, delay) before the
+            generate request is retried after a transient error.
+        callback_id: Optional client-side id sent with the request (e.g. a job
+            journal id); a random one is used if not given.
+        on_audio_ready: Optional, called with the voice settings (audio_asset_id
+            or audio_url) once the audio is resolved, before the generate request.
 
-        video_id = data.get('data', {}).get('video_id')
-        if video_id:
-            print(f"[API RESPONSE] Tạo video thành công. Video ID: {video_id}")
-            return video_id
-        else:
-            raise ValueError(f"Phản hồi API tạo video thành công nhưng không chứa video_id: {data}")
+    Returns:
+        The video_id of the generated video task.
 
-    except requests.exceptions.RequestException as e:
-        error_message = f"Lỗi mạng khi tạo video: {e}"
-        if e.response is not None:
-            error_message += f"\nResponse Body: {e.response.text[:500]}"
-        print(f"[API ERROR] {error_message}")
-        raise
-    except Exception as e:
-        print(f"[API ERROR] Lỗi không xác định khi tạo video: {e}\n{traceback.format_exc()}")
-        raise
+    Raises:
+        httpx.HTTPError: If the generate request fails.
+        ValueError: If the audio_input is invalid, upload fails, or API response indicates an error.
+        FileNotFoundError: If audio_input is a path and the file is not found.
+    """
+    return heygen_api_async.run_sync(heygen_api_async.generate_heygen_video(
+        api_key, audio_input, avatar_id, output_dir, proxies,
+        upload_progress_callback=upload_progress_callback, asset_cache=asset_cache, on_retry=on_retry,
+        callback_id=callback_id, on_audio_ready=on_audio_ready))
 
 def check_video_status(api_key: str, video_id: str, proxies: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
-    """Kiểm tra trạng thái của video đang tạo.
+    """Kiểm tra trạng thái của video đang tạo (wrapper đồng bộ của heygen_api_async.check_video_status).
 
     Args:
         api_key (str): API Key.
@@ -239,158 +377,277 @@ def check_video_status(api_key: str, video_id: str, proxies: Optional[Dict[str,
 
     Raises:
         ValueError: Nếu API trả về lỗi.
-        requests.exceptions.RequestException: Nếu có lỗi mạng.
+        httpx.HTTPError: Nếu có lỗi mạng.
         Exception: Các lỗi khác.
 
     Returns:
         dict: Dictionary chứa thông tin trạng thái (status, video_url, error, ...).
     """
-    status_url = f"https://api.heygen.com/v1/video_status.get?video_id={video_id}"
-    headers = {
-        "accept": "application/json",
-        "x-api-key": api_key
-    }
+    return heygen_api_async.run_sync(heygen_api_async.check_video_status(api_key, video_id, proxies))
 
-    try:
-        # print(f"[API REQUEST] GET {status_url}") # Có thể bật để debug nhiều hơn
-        response = requests.get(status_url, headers=headers, proxies=proxies, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-
-        if data is None:
-            raise ValueError(f"API kiểm tra trạng thái (ID: {video_id}) không trả về dữ liệu.")
-        # API v1 dùng code 100 cho thành công
-        elif data.get('code') != 100:
-            error_info = data.get('error')
-            msg = f"Lỗi API kiểm tra trạng thái: {data.get('message', 'Unknown error')}"
-            if error_info: # Thêm chi tiết lỗi nếu có
-                 msg += f" - {error_info}"
-            raise ValueError(msg)
-        elif 'data' in data and isinstance(data.get('data'), dict):
-             # Trả về toàn bộ dictionary 'data' vì nó chứa status, url, error...
-             status_data = data['data']
-             # print(f"[API RESPONSE] Trạng thái video {video_id}: {status_data.get('status')}")
-             return status_data
-        else:
-            raise ValueError(f"Phản hồi API kiểm tra trạng thái không hợp lệ: {data}")
+# --- Resumable Download Engine ---
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024          # 1 MiB mỗi lần đọc
+DOWNLOAD_MIN_SEGMENT_SIZE = 8 * 1024 * 1024  # Không chia nhỏ hơn 8 MiB/segment
+DOWNLOAD_SEGMENT_RETRIES = 3
+DOWNLOAD_SIDECAR_INTERVAL = 2.0            # Giây giữa hai lần ghi file tiến trình
 
-    except requests.exceptions.RequestException as e:
-        # print(f"[API ERROR] Lỗi mạng khi kiểm tra trạng thái video {video_id}: {e}")
-        raise
-    except Exception as e:
-        # print(f"[API ERROR] Lỗi không xác định khi kiểm tra trạng thái video {video_id}: {e}")
-        raise
 
-def download_video_file(video_url: str, output_path: str) -> Tuple[bool, str]:
-    """Tải nội dung video từ URL về đường dẫn file."""
+def _probe_download(video_url: str, proxies: Optional[Dict[str, str]] = None) -> Tuple[Optional[int], bool, Optional[str]]:
+    """
+    Finds the size, range support and ETag of a download URL.
+
+    Tries HEAD first; presigned URLs that reject HEAD are probed with a
+    one-byte ranged GET instead.
+
+    Returns:
+        (size or None, accepts byte ranges, etag or None)
+    """
     try:
-        response = requests.get(video_url, stream=True, timeout=60)
+        response = requests.head(video_url, allow_redirects=True, proxies=proxies, timeout=30)
+        if response.ok and response.headers.get("Content-Length"):
+            size = int(response.headers["Content-Length"])
+            accepts_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+            if accepts_ranges:
+                return size, True, response.headers.get("ETag")
+    except (requests.exceptions.RequestException, ValueError):
+        pass
+
+    response = requests.get(video_url, headers={"Range": "bytes=0-0"}, stream=True, proxies=proxies, timeout=30)
+    try:
+        response.raise_for_status()
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            if total.isdigit():
+                return int(total), True, response.headers.get("ETag")
+        length = response.headers.get("Content-Length")
+        return (int(length) if length and length.isdigit() else None), False, response.headers.get("ETag")
+    finally:
+        response.close()
+
+
+def _split_segments(size: int, segments: int) -> List[List[int]]:
+    """Splits [0, size) into [start, end_inclusive, next_offset] segments."""
+    count = max(1, min(segments, size // DOWNLOAD_MIN_SEGMENT_SIZE or 1))
+    step = -(-size // count)
+    return [[start, min(start + step, size) - 1, start] for start in range(0, size, step)]
+
+
+def _load_download_state(state_path: str, part_path: str, size: int, etag: Optional[str]) -> Optional[List[List[int]]]:
+    """Returns saved segments if the sidecar matches this download, else None."""
+    try:
+        with open(state_path, "r") as f:
+            state = json.load(f)
+        if state.get("size") == size and state.get("etag") == etag and os.path.getsize(part_path) == size:
+            return state["segments"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _save_download_state(state_path: str, size: int, etag: Optional[str], segments: List[List[int]]):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"size": size, "etag": etag, "segments": segments}, f)
+    os.replace(tmp_path, state_path)
+
+
+def _file_digests(path: str) -> Dict[str, str]:
+    sha256, md5 = hashlib.sha256(), hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            sha256.update(block)
+            md5.update(block)
+    return {"sha256": sha256.hexdigest(), "md5": md5.hexdigest()}
+
+
+def _download_single_stream(video_url: str, part_path: str, proxies, progress_callback) -> int:
+    """Fallback for servers without range support: one streamed GET."""
+    received = 0
+    with requests.get(video_url, stream=True, proxies=proxies, timeout=60) as response:
         response.raise_for_status()
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
+        total = int(response.headers.get("Content-Length") or 0) or None
+        with open(part_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                 f.write(chunk)
-        return True, f"Đã tải xong video về: {output_path}"
+                received += len(chunk)
+                if progress_callback:
+                    progress_callback(received, total)
+    return received
+
+
+def download_video_file(video_url: str, output_path: str, segments: int = 4,
+                        proxies: Optional[Dict[str, str]] = None,
+                        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                        expected_sha256: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Downloads a video with parallel byte-range segments and resume support.
+
+    The file is preallocated as `<output_path>.part` and each segment is written
+    at its own offset (os.pwrite where available). Progress is persisted to
+    `<output_path>.part.json`, so calling this again after a dropped connection
+    or a restart only fetches the missing ranges. The final file is checked
+    against the expected size, the ETag when it is a plain MD5, and
+    expected_sha256 if given, then renamed into place.
+
+    Args:
+        video_url: URL of the video file (a fresh URL can be used to resume).
+        output_path: Destination path.
+        segments: Maximum number of parallel range requests.
+        proxies: Optional dictionary of proxies for the requests.
+        progress_callback: Optional, called with (bytes_done, total_bytes or None).
+        expected_sha256: Optional hex SHA-256 the finished file must match.
+
+    Returns:
+        (success, message)
+    """
+    part_path = output_path + ".part"
+    state_path = part_path + ".json"
+    try:
+        size, accepts_ranges, etag = _probe_download(video_url, proxies)
+
+        if not size or not accepts_ranges:
+            received = _download_single_stream(video_url, part_path, proxies, progress_callback)
+            if size and received != size:
+                raise ValueError(f"Kích thước không khớp: nhận {received}/{size} bytes.")
+            size = received
+        else:
+            saved = _load_download_state(state_path, part_path, size, etag)
+            if saved is None:
+                with open(part_path, 'wb') as f:
+                    f.truncate(size)  # Cấp phát trước toàn bộ file
+                seg_list = _split_segments(size, segments)
+                _save_download_state(state_path, size, etag, seg_list)
+            else:
+                seg_list = saved
+                print(f"[DOWNLOAD] Tiếp tục tải {output_path} từ {sum(s[2] - s[0] for s in seg_list)}/{size} bytes.")
+
+            lock = threading.Lock()
+            last_save = [time.monotonic()]
+
+            def done_bytes():
+                return sum(seg[2] - seg[0] for seg in seg_list)
+
+            def fetch_segment(seg):
+                attempt = 0
+                with open(part_path, 'r+b') as f:
+                    while seg[2] <= seg[1]:
+                        try:
+                            headers = {"Range": f"bytes={seg[2]}-{seg[1]}"}
+                            with requests.get(video_url, headers=headers, stream=True, proxies=proxies, timeout=60) as response:
+                                response.raise_for_status()
+                                if response.status_code != 206:
+                                    raise ValueError("Máy chủ không trả về nội dung theo Range (206).")
+                                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                                    chunk = chunk[:seg[1] + 1 - seg[2]]
+                                    if hasattr(os, "pwrite"):
+                                        os.pwrite(f.fileno(), chunk, seg[2])
+                                    else:
+                                        f.seek(seg[2])
+                                        f.write(chunk)
+                                    with lock:
+                                        seg[2] += len(chunk)
+                                        now = time.monotonic()
+                                        if now - last_save[0] >= DOWNLOAD_SIDECAR_INTERVAL:
+                                            f.flush()
+                                            _save_download_state(state_path, size, etag, seg_list)
+                                            last_save[0] = now
+                                    if progress_callback:
+                                        progress_callback(done_bytes(), size)
+                                    if seg[2] > seg[1]:
+                                        break
+                            attempt = 0
+                        except (requests.exceptions.RequestException, ValueError):
+                            attempt += 1
+                            if attempt > DOWNLOAD_SEGMENT_RETRIES:
+                                raise
+                            time.sleep(min(2 ** attempt, 30))
+
+            pending = [seg for seg in seg_list if seg[2] <= seg[1]]
+            try:
+                with ThreadPoolExecutor(max_workers=max(1, len(pending))) as pool:
+                    for future in [pool.submit(fetch_segment, seg) for seg in pending]:
+                        future.result()
+            finally:
+                with lock:
+                    _save_download_state(state_path, size, etag, seg_list)
+
+            if done_bytes() != size or os.path.getsize(part_path) != size:
+                raise ValueError(f"Kích thước không khớp: {done_bytes()}/{size} bytes.")
+
+        digests = _file_digests(part_path)
+        plain_etag = (etag or "").strip('"').lower()
+        if len(plain_etag) == 32 and "-" not in plain_etag and all(c in "0123456789abcdef" for c in plain_etag):
+            if digests["md5"] != plain_etag:
+                _discard_download(part_path, state_path)
+                return False, f"Lỗi tải video: MD5 không khớp với ETag ({digests['md5']} != {plain_etag})"
+        if expected_sha256 and digests["sha256"] != expected_sha256.lower():
+            _discard_download(part_path, state_path)
+            return False, f"Lỗi tải video: SHA-256 không khớp ({digests['sha256']})"
+
+        os.replace(part_path, output_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return True, f"Đã tải xong video về: {output_path} ({size} bytes, sha256 {digests['sha256'][:12]}...)"
     except requests.exceptions.RequestException as e:
         return False, f"Lỗi tải video: {e}"
     except Exception as e:
         return False, f"Lỗi không xác định khi tải video: {e}"
 
+
+def _discard_download(part_path: str, state_path: str):
+    for path in (part_path, state_path):
+        if os.path.exists(path):
+            os.remove(path)
+
 def fetch_avatar_list(api_key: str, proxies: Optional[Dict[str, str]] = None) -> List[str]:
-    """Tải danh sách avatar ID từ API HeyGen.
+    """Tải danh sách avatar ID từ API HeyGen (wrapper đồng bộ của heygen_api_async.fetch_avatar_list).
 
     Raises:
         ValueError: Nếu có lỗi xảy ra trong quá trình gọi API hoặc xử lý dữ liệu.
     Returns:
         list: Danh sách các chuỗi avatar_id (bao gồm cả talking_photo_id) đã được sắp xếp.
     """
-    list_url = "https://api.heygen.com/v2/avatars"
-    headers = {
-        "accept": "application/json",
-        "x-api-key": api_key
-    }
-    # Danh sách chỉ chứa ID
-    id_list = []
-    error_msg = None
+    return heygen_api_async.run_sync(heygen_api_async.fetch_avatar_list(api_key, proxies))
 
-    try:
-        # Log headers and proxies just before the request
-        log_msg_headers = {k: (v[:5] + '...' + v[-4:] if k == 'x-api-key' and len(v) > 10 else v) for k, v in headers.items()}
-        print(f"[API REQUEST] URL: {list_url}")
-        print(f"[API REQUEST] Headers: {log_msg_headers}")
-        print(f"[API REQUEST] Proxies: {proxies}")
 
-        response = requests.get(list_url, headers=headers, proxies=proxies, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-
-        if data is None:
-            error_msg = "API không trả về dữ liệu (phản hồi trống)."
-        elif data.get('error') is not None:
-            error_info = data['error']
-            if isinstance(error_info, dict):
-                 error_msg = f"Lỗi API HeyGen: {error_info.get('message', 'Unknown error')}"
-                 if error_info.get('code'): error_msg += f" (Code: {error_info['code']})"
-            elif isinstance(error_info, str):
-                 error_msg = f"Lỗi API HeyGen: {error_info}"
-            else:
-                 error_msg = f"Lỗi API HeyGen không xác định. Phản hồi lỗi: {error_info}"
-        elif 'data' in data and isinstance(data.get('data'), dict):
-            heygen_data = data['data']
-            avatars = heygen_data.get('avatars', [])
-            if isinstance(avatars, list):
-                for avatar in avatars:
-                    # Chỉ lấy avatar_id
-                    if isinstance(avatar, dict):
-                        id = avatar.get('avatar_id')
-                        if id:
-                            id_list.append(id)
-
-            talking_photos = heygen_data.get('talking_photos', [])
-            if isinstance(talking_photos, list):
-                for photo in talking_photos:
-                    # Chỉ lấy talking_photo_id
-                    if isinstance(photo, dict):
-                        id = photo.get('talking_photo_id')
-                        if id:
-                             id_list.append(id)
-
-            if not id_list:
-                 if not avatars and not talking_photos:
-                     error_msg = "Tài khoản không có Avatar hoặc Talking Photo nào."
-                 else:
-                     # Có avatar/photo nhưng không lấy được ID?
-                     error_msg = "Không tìm thấy ID hợp lệ trong dữ liệu avatar/photo."
-        else:
-            error_msg = f"Phản hồi API có cấu trúc không mong đợi."
-
-    except requests.exceptions.HTTPError as e:
-         detail = ""
-         try: detail = e.response.json().get('error',{}).get('message', e.response.text)
-         except: detail = e.response.text
-         error_msg = f"Lỗi HTTP từ API: {e.response.status_code} - {detail[:200]}..."
-    except requests.exceptions.Timeout:
-        error_msg = "Yêu cầu tới API HeyGen bị timeout (quá 60 giây)."
-    except requests.exceptions.RequestException as e:
-        error_msg = f"Lỗi mạng hoặc kết nối khi gọi API: {e}"
-    except json.JSONDecodeError as e_json:
-        raw_text = ""
-        try: raw_text = response.text
-        except: pass
-        error_msg = f"Lỗi phân tích phản hồi JSON từ API: {e_json}. Dữ liệu nhận được: {raw_text[:200]}..."
-    except Exception as e:
-        error_msg = f"Lỗi không xác định trong quá trình tải avatar: {e}"
+def fetch_avatar_catalog(api_key: str, proxies: Optional[Dict[str, str]] = None,
+                         etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+    """Wrapper đồng bộ của heygen_api_async.fetch_avatar_catalog."""
+    return heygen_api_async.run_sync(heygen_api_async.fetch_avatar_catalog(api_key, proxies, etag, last_modified))
 
-    # Return results
-    if error_msg:
-        raise ValueError(error_msg)
-    else:
-        # Trả về danh sách ID đã sắp xếp
-        return sorted(id_list) 
+
+def refresh_avatar_catalog(api_key: str, catalog: AvatarCatalog,
+                           proxies: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """
+    Làm mới catalog avatar của tài khoản trong `catalog` bằng request có điều kiện.
+
+    Gửi ETag/Last-Modified đã lưu; nếu API trả 304 chỉ cập nhật fetched_at,
+    ngược lại gộp bản mới vào catalog dưới dạng delta.
+
+    Raises:
+        ValueError: Như fetch_avatar_list.
+    Returns:
+        dict: Số avatar added / updated / removed / unchanged (tất cả 0 khi 304,
+        kèm not_modified=1).
+    """
+    account = account_fingerprint(api_key)
+    etag, last_modified = catalog.validators(account)
+    if not catalog.ids(account):
+        etag = last_modified = None  # Catalog trống: tải đầy đủ
+    result = fetch_avatar_catalog(api_key, proxies, etag, last_modified)
+    if result["not_modified"]:
+        catalog.touch(account)
+        return {"added": 0, "updated": 0, "removed": 0, "unchanged": len(catalog.ids(account)), "not_modified": 1}
+    stats = catalog.merge(account, result["entries"], result["etag"], result["last_modified"])
+    stats["not_modified"] = 0
+    return stats
 
 # --- Get Remaining Quota Function ---
 def get_remaining_quota(api_key: str, proxies: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     """
     Fetches the remaining API quota for the given API key.
+    Thin wrapper over heygen_api_async.get_remaining_quota.
 
     Args:
         api_key: The HeyGen API key.
@@ -400,117 +657,476 @@ def get_remaining_quota(api_key: str, proxies: Optional[Dict[str, str]] = None)
         The 'data' part of the JSON response containing quota information.
 
     Raises:
-        requests.exceptions.RequestException: If the network request fails.
+        httpx.HTTPError: If the network request fails.
         ValueError: If the API response indicates an error or is not valid.
         KeyError: If the expected keys ('data', 'remaining_quota') are not in the response.
     """
-    url = f"{BASE_URL}/v2/user/remaining_quota"
-    headers = {
-        "accept": "application/json",
-        "X-Api-Key": api_key
-    }
-
-    print(f"[API QUOTA] GET {url} for key ...{api_key[-4:]}")
-
-    try:
-        response = requests.get(url, headers=headers, proxies=proxies, timeout=60)
-
-        print(f"[API QUOTA] Response Status: {response.status_code}")
-        response.raise_for_status() # Raise HTTPError for bad status codes (4xx or 5xx)
-
-        response_data = response.json()
-        # print(f"[API QUOTA] Response Body: {response_data}") # Uncomment for debugging
-
-        # Check for API-level errors reported in the JSON body
-        if response_data.get('error') is not None:
-             error_info = response_data['error']
-             msg = f"Lỗi API lấy quota: {error_info.get('message', 'Unknown error')}"
-             if error_info.get('code'): msg += f" (Code: {error_info['code']})"
-             raise ValueError(msg)
-        
-        # Check if 'data' exists and contains 'remaining_quota'
-        data_payload = response_data.get('data')
-        if data_payload and isinstance(data_payload, dict) and 'remaining_quota' in data_payload:
-             print(f"[API QUOTA] Lấy quota thành công cho key ...{api_key[-4:]}: {data_payload.get('remaining_quota')}")
-             return data_payload # Return the whole 'data' dictionary
-        else:
-             # Handle cases where response is successful but doesn't contain expected data
-             raise KeyError(f"Phản hồi API quota thành công nhưng cấu trúc không hợp lệ hoặc thiếu 'remaining_quota'. Response: {response_data}")
-
-    except requests.exceptions.RequestException as e:
-        error_message = f"Lỗi mạng khi lấy quota: {e}"
-        if e.response is not None:
-            error_message += f"\nResponse Body: {e.response.text[:500]}"
-        print(f"[API ERROR] {error_message}")
-        raise
-    except (ValueError, KeyError, json.JSONDecodeError) as e:
-        print(f"[API ERROR] Lỗi xử lý phản hồi quota: {e}")
-        raise
-    except Exception as e:
-        print(f"[API ERROR] Lỗi không xác định khi lấy quota: {e}\n{traceback.format_exc()}")
-        raise 
+    return heygen_api_async.run_sync(heygen_api_async.get_remaining_quota(api_key, proxies))
 
 # --- List Videos Function ---
-def list_videos(api_key: str, proxies: Optional[Dict[str, str]] = None, limit: int = 100) -> Dict[str, Any]:
+def list_videos(api_key: str, proxies: Optional[Dict[str, str]] = None, limit: int = 100,
+                token: Optional[str] = None) -> Dict[str, Any]:
     """
-    Retrieves a list of videos associated with the API key.
-    Currently fetches only the first page based on the limit.
+    Retrieves one page of videos associated with the API key.
+    Use iter_video_pages to walk every page.
+    Thin wrapper over heygen_api_async.list_videos.
 
     Args:
         api_key: The HeyGen API key.
         proxies: Optional dictionary of proxies for the request.
         limit: The maximum number of videos to retrieve (default 100).
+        token: Pagination token from a previous page, to fetch the next one.
 
     Returns:
         The 'data' part of the JSON response containing the video list and pagination token.
 
     Raises:
-        requests.exceptions.RequestException: If the network request fails.
+        httpx.HTTPError: If the network request fails.
         ValueError: If the API response indicates an error or is not valid.
         KeyError: If the expected keys ('data', 'videos') are not in the response.
     """
-    url = f"{BASE_URL}/v1/video.list"
-    params = {"limit": limit}
-    headers = {
-        "accept": "application/json",
-        "X-Api-Key": api_key
-    }
-
-    print(f"[API LIST] GET {url} for key ...{api_key[-4:]} with limit {limit}")
+    return heygen_api_async.run_sync(heygen_api_async.list_videos(api_key, proxies, limit, token))
 
+def iter_video_pages(api_key: str, proxies: Optional[Dict[str, str]] = None,
+                     page_size: int = heygen_api_async.VIDEO_PAGE_SIZE,
+                     prefetch: int = heygen_api_async.VIDEO_PAGE_PREFETCH,
+                     known_ids: Optional[Container[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Blocking iterator over every page of videos (see heygen_api_async.iter_video_pages).
+    Next pages are prefetched on the background loop while the caller handles the
+    current one. Pass known_ids to stop at the first page with an already known video.
+    """
+    pages = heygen_api_async.iter_video_pages(api_key, proxies, page_size, prefetch, known_ids)
     try:
-        response = requests.get(url, headers=headers, params=params, proxies=proxies, timeout=60)
+        while True:
+            try:
+                yield heygen_api_async.run_sync(pages.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        heygen_api_async.run_sync(pages.aclose())
+
+
+# --- Centralized Status Polling ---
+class _PollJob:
+    """State of one video tracked by StatusPollScheduler."""
+
+    def __init__(self, api_key, video_id, proxies, on_complete, on_update, started):
+        self.api_key = api_key
+        self.video_id = video_id
+        self.proxies = proxies
+        self.on_complete = on_complete
+        self.on_update = on_update
+        self.started = started
+        self.last_status = None
+        self.duration = None
+        self.consecutive_errors = 0
+        self.seq = None  # Sequence number of the job's current queue entry
+
+
+class StatusPollScheduler:
+    """
+    Polls the status of many in-flight videos from a fixed number of threads.
+
+    One dispatcher thread keeps a priority queue of (next poll time, video id)
+    and hands due polls to a small thread pool, so the thread count stays
+    constant however many videos are pending. Each video backs off on its own
+    schedule (see heygen_mcp.polling.next_poll_interval). A video has at most
+    one live queue entry; entries left behind by a replaced or cancelled job
+    are dropped when they come due.
+
+    Callbacks run on a pool thread; GUI code must marshal to the main thread
+    itself (e.g. with `after`).
+      - on_update(video_id, status_data) is called when the status changes.
+      - on_complete(video_id, status_data, error) is called exactly once, with
+        status_data for a 'completed'/'failed' video, or with an error message
+        if polling gave up (max_wait reached or too many consecutive errors).
+    """
 
-        print(f"[API LIST] Response Status: {response.status_code}")
-        response.raise_for_status() # Raise HTTPError for bad status codes (4xx or 5xx)
+    def __init__(self, max_workers: int = 4, max_wait: float = 3600.0, max_consecutive_errors: int = 5):
+        self.max_wait = max_wait
+        self.max_consecutive_errors = max_consecutive_errors
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="heygen-poll")
+        self._jobs: Dict[str, _PollJob] = {}
+        self._queue: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="heygen-poll-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def pending_count(self) -> int:
+        """Number of videos still being polled."""
+        with self._cond:
+            return len(self._jobs)
+
+    def submit(self, api_key: str, video_id: str,
+               on_complete: Callable[[str, Optional[Dict[str, Any]], Optional[str]], None],
+               on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+               proxies: Optional[Dict[str, str]] = None) -> None:
+        """
+        Starts polling a video. The first status check happens immediately.
+
+        Submitting a video that is already being polled replaces its job: the
+        new callbacks are used and the old ones are never called.
+
+        Args:
+            api_key: The HeyGen API key that created the video.
+            video_id: The video to poll.
+            on_complete: Called once when the video is terminal or polling gives up.
+            on_update: Optional, called on every status change.
+            proxies: Optional dictionary of proxies for the requests.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("StatusPollScheduler đã dừng.")
+            now = time.monotonic()
+            self._jobs[video_id] = _PollJob(api_key, video_id, proxies, on_complete, on_update, now)
+            self._schedule(video_id, now)
+
+    def cancel(self, video_id: str) -> None:
+        """Stops polling a video without calling its callbacks."""
+        with self._cond:
+            self._jobs.pop(video_id, None)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stops the dispatcher; pending videos are dropped without callbacks."""
+        with self._cond:
+            self._closed = True
+            self._jobs.clear()
+            self._queue.clear()
+            self._cond.notify_all()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _schedule(self, video_id: str, due: float) -> None:
+        # Caller must hold self._cond
+        seq = next(self._seq)
+        self._jobs[video_id].seq = seq
+        heapq.heappush(self._queue, (due, seq, video_id))
+        self._cond.notify()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._queue:
+                        delay = self._queue[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                _, seq, video_id = heapq.heappop(self._queue)
+                job = self._jobs.get(video_id)
+                if job is not None and job.seq != seq:
+                    job = None  # Mục cũ của job đã bị thay thế
+            if job is not None:
+                try:
+                    self._executor.submit(self._poll_once, job)
+                except RuntimeError:
+                    return  # Executor đã shutdown
+
+    def _poll_once(self, job: _PollJob):
+        error = None
+        status_data = None
+        try:
+            status_data = check_video_status(job.api_key, job.video_id, job.proxies)
+            job.consecutive_errors = 0
+        except Exception as e:
+            job.consecutive_errors += 1
+            error = f"Lỗi kiểm tra trạng thái video {job.video_id}: {e}"
+            print(f"[API POLL] {error} (lần {job.consecutive_errors}/{self.max_consecutive_errors})")
+
+        elapsed = time.monotonic() - job.started
+        if status_data is not None:
+            current_status = status_data.get("status")
+            job.duration = status_data.get("duration") or job.duration
+            if current_status in TERMINAL_VIDEO_STATUSES:
+                self._finish(job, status_data, None)
+                return
+            if current_status != job.last_status:
+                job.last_status = current_status
+                if job.on_update:
+                    self._safe_call(job.on_update, job.video_id, status_data)
+        elif job.consecutive_errors >= self.max_consecutive_errors:
+            self._finish(job, None, error)
+            return
+
+        if elapsed >= self.max_wait:
+            self._finish(job, None, f"Video {job.video_id} không hoàn thành sau {int(self.max_wait)} giây.")
+            return
+
+        interval = next_poll_interval(elapsed, job.duration)
+        if job.consecutive_errors:
+            interval = min(interval * (2 ** job.consecutive_errors), 300.0)
+        with self._cond:
+            if self._jobs.get(job.video_id) is job:
+                self._schedule(job.video_id, time.monotonic() + interval)
+
+    def _finish(self, job: _PollJob, status_data, error):
+        with self._cond:
+            if self._jobs.get(job.video_id) is not job:
+                return  # Đã bị hủy
+            del self._jobs[job.video_id]
+        self._safe_call(job.on_complete, job.video_id, status_data, error)
+
+    @staticmethod
+    def _safe_call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"[API POLL] Lỗi trong callback: {e}\n{traceback.format_exc()}")
 
-        response_data = response.json()
-        # print(f"[API LIST] Response Body: {response_data}") # Uncomment for debugging
-
-        # Check for API-level errors (code != 100 for v1)
-        if response_data.get('code') != 100:
-             error_msg = f"Lỗi API lấy danh sách video: Code {response_data.get('code')}, Message: {response_data.get('message')}" 
-             error_detail = response_data.get('error')
-             if error_detail: error_msg += f", Error: {error_detail}"
-             raise ValueError(error_msg)
-        
-        # Check if 'data' exists and contains 'videos' list
-        data_payload = response_data.get('data')
-        if data_payload and isinstance(data_payload, dict) and 'videos' in data_payload and isinstance(data_payload['videos'], list):
-             print(f"[API LIST] Lấy danh sách thành công cho key ...{api_key[-4:]}. Số lượng: {len(data_payload['videos'])}")
-             return data_payload # Return the whole 'data' dictionary (includes videos and token)
+
+# --- Multi-Key Load Balancing ---
+class _KeyState:
+    """Health and load of one API key in ApiKeyPool."""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.remaining_quota: Optional[float] = None
+        self.quota_checked_at = 0.0
+        self.in_flight = 0
+        self.error_rate = 0.0          # EWMA của tỉ lệ lỗi gần đây (0..1)
+        self.consecutive_failures = 0
+        self.open_until = 0.0          # Circuit breaker mở tới thời điểm này
+        self.current_weight = 0.0      # Dùng cho smooth weighted round-robin
+
+
+class ApiKeyPool:
+    """
+    Routes video jobs across several API keys instead of binding a job to one key.
+
+    Each key's weight comes from its remaining quota (refreshed through
+    get_remaining_quota), its in-flight job count and its recent error rate.
+    acquire() picks a key with smooth weighted round-robin from the cached
+    quotas and refreshes stale ones in a background thread, so it never waits
+    on the network. Keys whose quota is known to be exhausted are skipped. A key that fails failure_threshold times
+    in a row is taken out (circuit open) for cooldown seconds, then gets a
+    single trial job before it is trusted again.
+
+    Every acquire() must be matched by release() once the job is over (for a
+    render, after polling finishes), so in-flight counts stay accurate.
+    """
+
+    ERROR_EWMA_ALPHA = 0.3
+
+    def __init__(self, api_keys: List[str], proxies: Optional[Dict[str, str]] = None,
+                 quota_refresh_interval: float = 300.0, failure_threshold: int = 3, cooldown: float = 120.0):
+        keys = list(dict.fromkeys(k.strip() for k in api_keys if k and k.strip()))
+        if not keys:
+            raise ValueError("Cần ít nhất một API Key hợp lệ.")
+        self.proxies = proxies
+        self.quota_refresh_interval = quota_refresh_interval
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._states = {k: _KeyState(k) for k in keys}
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def api_keys(self) -> List[str]:
+        return list(self._states)
+
+    def _stale_states(self, now: float, force: bool = False) -> List[_KeyState]:
+        return [s for s in self._states.values()
+                if force or now - s.quota_checked_at >= self.quota_refresh_interval]
+
+    def refresh_quotas(self, force: bool = False) -> None:
+        """
+        Refreshes remaining quota for keys whose value is older than quota_refresh_interval.
+
+        Stale keys are claimed under the lock before fetching, so concurrent
+        callers do not query the same key again; they keep the cached value.
+        """
+        with self._lock:
+            now = time.monotonic()
+            due = self._stale_states(now, force)
+            for state in due:
+                state.quota_checked_at = now
+        for state in due:
+            try:
+                quota = get_remaining_quota(state.api_key, self.proxies)
+                value = float(quota.get('remaining_quota', 0))
+            except Exception as e:
+                print(f"[KEY POOL] Không lấy được quota cho key ...{state.api_key[-4:]}: {e}")
+                continue
+            with self._lock:
+                state.remaining_quota = value
+
+    def _refresh_quotas_in_background(self) -> None:
+        """Starts one refresh thread if some quota is stale and none is running."""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            if not self._stale_states(time.monotonic()):
+                return
+            self._refresh_thread = threading.Thread(
+                target=self.refresh_quotas, name="heygen-key-pool-quota", daemon=True)
+            self._refresh_thread.start()
+
+    def _weight(self, state: _KeyState) -> float:
+        if state.remaining_quota is None:
+            quota_weight = 1.0
         else:
-             raise KeyError(f"Phản hồi API list video thành công nhưng cấu trúc không hợp lệ hoặc thiếu 'videos'. Response: {response_data}")
+            known = [s.remaining_quota for s in self._states.values() if s.remaining_quota]
+            mean_quota = sum(known) / len(known) if known else 1.0
+            quota_weight = state.remaining_quota / mean_quota
+        return quota_weight * (1.0 - 0.9 * state.error_rate) / (1 + state.in_flight)
+
+    def _available(self, state: _KeyState, now: float) -> bool:
+        if state.remaining_quota is not None and state.remaining_quota <= 0:
+            return False
+        if state.consecutive_failures >= self.failure_threshold:
+            # Half-open: sau cooldown chỉ cho một job thử
+            return now >= state.open_until and state.in_flight == 0
+        return True
+
+    def acquire(self, exclude: Optional[List[str]] = None) -> str:
+        """
+        Picks the best key for a new job and counts it as in flight.
+
+        Raises:
+            RuntimeError: If every key is exhausted, excluded or circuit-broken.
+        """
+        self._refresh_quotas_in_background()
+        now = time.monotonic()
+        with self._lock:
+            candidates = [s for k, s in self._states.items()
+                          if k not in (exclude or []) and self._available(s, now)]
+            if not candidates:
+                raise RuntimeError("Không còn API Key khả dụng (hết quota hoặc đang lỗi liên tục).")
+            weights = {s.api_key: max(self._weight(s), 1e-6) for s in candidates}
+            total = sum(weights.values())
+            for s in candidates:
+                s.current_weight += weights[s.api_key]
+            chosen = max(candidates, key=lambda s: s.current_weight)
+            chosen.current_weight -= total
+            chosen.in_flight += 1
+            return chosen.api_key
+
+    def release(self, api_key: str, success: Optional[bool] = True) -> None:
+        """
+        Marks a job on api_key as finished and updates the key's health.
+
+        success=None releases the key without counting the job for or against
+        it, e.g. when the request failed because of its own input.
+        """
+        with self._lock:
+            state = self._states.get(api_key)
+            if state is None:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+            if success is None:
+                return
+            state.error_rate += self.ERROR_EWMA_ALPHA * ((0.0 if success else 1.0) - state.error_rate)
+            if success:
+                state.consecutive_failures = 0
+            else:
+                state.consecutive_failures += 1
+                if state.consecutive_failures >= self.failure_threshold:
+                    state.open_until = time.monotonic() + self.cooldown
+                    print(f"[KEY POOL] Tạm ngưng key ...{api_key[-4:]} trong {self.cooldown:.0f}s sau {state.consecutive_failures} lỗi liên tiếp.")
+
+    @contextmanager
+    def lease(self):
+        """Context manager: acquire a key, release it (as failed on exception) on exit."""
+        api_key = self.acquire()
+        success = False
+        try:
+            yield api_key
+            success = True
+        finally:
+            self.release(api_key, success)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-key state, for logging or display."""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "api_key": f"...{s.api_key[-4:]}",
+                "remaining_quota": s.remaining_quota,
+                "in_flight": s.in_flight,
+                "error_rate": round(s.error_rate, 3),
+                "available": self._available(s, now),
+            } for s in self._states.values()]
+
+
+# Lỗi hết quota/credit của tài khoản: key khác vẫn có thể tạo được video
+_QUOTA_ERROR_PATTERN = re.compile(r"quota|credit", re.IGNORECASE)
+
+
+def _should_fail_over(error: BaseException) -> bool:
+    """
+    True if a generate error is specific to the key and safe to retry on another.
+
+    That is a connection error before the request was sent (also during the
+    audio upload), a 429, or an exhausted quota/credit. Errors caused by the
+    input (bad avatar_id, invalid payload) would fail on every key, and a read
+    timeout or 5xx after the POST may already have created the render.
+    """
+    while error is not None:
+        if classify_error(error) in (CONNECT, THROTTLED):
+            return True
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return True
+        text = str(error)
+        if isinstance(error, (httpx.HTTPStatusError, requests.exceptions.HTTPError)) \
+                and error.response is not None:
+            if error.response.status_code == 402:
+                return True
+            text += " " + error.response.text
+        if _QUOTA_ERROR_PATTERN.search(text):
+            return True
+        error = error.__cause__
+    return False
+
+
+def generate_video_with_pool(pool: ApiKeyPool, audio_input: str, avatar_id: str, output_dir: str,
+                             proxies: Optional[Dict[str, str]] = None, **kwargs) -> Tuple[str, str]:
+    """
+    Generates a video on the best available key, failing over to other keys.
+
+    Each key is tried at most once, and only errors that are specific to the
+    key (see _should_fail_over) move on to the next one and count against the
+    key. Any other error is raised straight away without penalising the key.
+    The chosen key stays counted as in flight: the caller must call
+    pool.release(api_key, success) when the render finishes. Extra keyword
+    arguments are passed to generate_heygen_video.
+
+    Returns:
+        (api_key used, video_id)
+
+    Raises:
+        ValueError: If audio_input is neither a URL nor an existing file.
+        The generation error if it is not key specific, or the last one if
+        every key failed.
+    """
+    if not audio_input.startswith(('http://', 'https://')) and not os.path.exists(audio_input):
+        raise ValueError(f"Đầu vào audio không hợp lệ: '{audio_input}'. Cần URL công khai hoặc đường dẫn file tồn tại.")
+
+    tried: List[str] = []
+    last_error: Optional[Exception] = None
+    while len(tried) < len(pool.api_keys):
+        try:
+            api_key = pool.acquire(exclude=tried)
+        except RuntimeError:
+            if last_error is not None:
+                raise last_error from None
+            raise
+        tried.append(api_key)
+        try:
+            video_id = generate_heygen_video(api_key, audio_input, avatar_id, output_dir, proxies, **kwargs)
+            return api_key, video_id
+        except Exception as e:
+            if not _should_fail_over(e):
+                pool.release(api_key, success=None)
+                raise
+            pool.release(api_key, success=False)
+            last_error = e
+            print(f"[KEY POOL] Key ...{api_key[-4:]} lỗi khi tạo video: {e}. Thử key khác...")
+    raise last_error
 
-    except requests.exceptions.RequestException as e:
-        error_message = f"Lỗi mạng khi lấy danh sách video: {e}"
-        if e.response is not None:
-            error_message += f"\nResponse Body: {e.response.text[:500]}"
-        print(f"[API ERROR] {error_message}")
-        raise
-    except (ValueError, KeyError, json.JSONDecodeError) as e:
-        print(f"[API ERROR] Lỗi xử lý phản hồi danh sách video: {e}")
-        raise
-    except Exception as e:
-        print(f"[API ERROR] Lỗi không xác định khi lấy danh sách video: {e}\n{traceback.format_exc()}")
-        raise 
\ No newline at end of file
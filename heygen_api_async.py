@@ -0,0 +1,538 @@
+import asyncio
+import json
+import threading
+import traceback
+import weakref
+from typing import Any, AsyncIterator, Callable, Container, Dict, List, Optional
+
+import httpx
+
+import avatar_catalog
+from heygen_mcp.api_client import TransportConfig
+from heygen_mcp.ratelimit import get_shared_limiter
+from heygen_mcp.retry import RetryPolicy, new_idempotency_key
+
+# --- Constants ---
+BASE_URL = "https://api.heygen.com"
+
+# --- Shared Connection Pool ---
+# Một AsyncClient cho mỗi (event loop, proxy): các request tới HeyGen dùng lại
+# kết nối keep-alive thay vì mở phiên TLS mới mỗi lần như requests.get().
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Optional[str], httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+# Event loop nền cho các wrapper đồng bộ trong heygen_api (GUI, thread pool)
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def _proxy_url(proxies: Optional[Dict[str, str]]) -> Optional[str]:
+    """Chuyển dict proxies kiểu requests thành một URL proxy cho httpx."""
+    if not proxies:
+        return None
+    return proxies.get("https") or proxies.get("http")
+
+
+def get_client(proxies: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+    """
+    Returns the pooled AsyncClient for the running event loop and proxy.
+
+    Clients are built from TransportConfig.from_env(), the same HEYGEN_HTTP_*
+    settings the MCP server uses, so both share one transport configuration.
+    Must be called from inside a running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    proxy = _proxy_url(proxies)
+    with _clients_lock:
+        per_loop = _clients.setdefault(loop, {})
+        client = per_loop.get(proxy)
+        if client is None or client.is_closed:
+            client = TransportConfig.from_env().build_client(proxy=proxy)
+            per_loop[proxy] = client
+        return client
+
+
+async def aclose_clients() -> None:
+    """Closes the pooled clients that belong to the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = list(_clients.pop(loop, {}).values())
+    for client in clients:
+        await client.aclose()
+
+
+def _ensure_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="heygen-api-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_sync(coro):
+    """
+    Runs a coroutine on the shared background event loop and waits for its result.
+
+    Safe to call from any thread that is not itself running an event loop;
+    exceptions raised by the coroutine propagate to the caller.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _ensure_loop())
+    return future.result()
+
+
+def shutdown() -> None:
+    """Closes the pooled connections and stops the background event loop."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        loop, thread = _loop, _loop_thread
+        _loop = _loop_thread = None
+    if loop is None or loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(aclose_clients(), loop).result(timeout=5)
+    except Exception as e:
+        print(f"[API] Lỗi khi đóng kết nối: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout=5)
+    loop.close()
+
+
+def _log_retry(attempt: int, error: Exception, delay: float) -> None:
+    print(f"[API RETRY] Lỗi tạm thời (lần {attempt}): {error}. Thử lại sau {delay:.1f} giây...")
+
+
+async def _request(method: str, url: str, api_key: str, proxies: Optional[Dict[str, str]] = None,
+                   idempotent: Optional[bool] = None,
+                   on_retry: Optional[Callable[[int, Exception, float], None]] = None,
+                   **kwargs) -> httpx.Response:
+    """
+    Sends one request to the HeyGen API through the shared pool.
+
+    Connection errors, timeouts, 429 and 5xx are retried by RetryPolicy; a 5xx
+    or 429 that survives every retry is raised as httpx.HTTPStatusError. POST
+    requests are only retried after a timeout/5xx when idempotent=True.
+    """
+    headers = {
+        "accept": "application/json",
+        "x-api-key": api_key,
+    }
+    headers.update(kwargs.pop("headers", None) or {})
+    client = get_client(proxies)
+    policy = RetryPolicy.from_env()
+    # Chỉ thời gian gọi HTTP bị tính vào hạn thử lại, không tính thời gian chờ lượt
+    budget = policy.budget()
+
+    async def send():
+        return await budget.run(client.request(method, url, headers=headers, **kwargs))
+
+    async def attempt():
+        # Chờ lượt theo token bucket của key/endpoint; gặp 429 thì chờ Retry-After rồi gửi lại
+        response = await get_shared_limiter().send(api_key, url, send)
+        if response.status_code == 429 or response.status_code >= 500:
+            response.raise_for_status()
+        return response
+
+    if idempotent is None:
+        idempotent = method.upper() == "GET"
+    return await policy.call(attempt, idempotent=idempotent, on_retry=on_retry or _log_retry, budget=budget)
+
+
+def _response_text(e: httpx.HTTPError) -> Optional[str]:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.text
+    return None
+
+
+# --- Async API Functions ---
+async def generate_heygen_video(api_key: str, audio_input: str, avatar_id: str, output_dir: str,
+                                proxies: Optional[Dict[str, str]] = None, upload_progress_callback=None,
+                                asset_cache=None,
+                                on_retry: Optional[Callable[[int, Exception, float], None]] = None,
+                                callback_id: Optional[str] = None,
+                                on_audio_ready: Optional[Callable[[Dict[str, str]], None]] = None) -> str:
+    """
+    Async version of heygen_api.generate_heygen_video.
+
+    The audio upload still goes through heygen_api (streaming requests upload)
+    and runs in a worker thread; the generate call uses the shared pool. The
+    POST carries a callback_id used to match status and webhook events to the
+    job. HeyGen does not deduplicate on it, so the POST is only retried on
+    connection errors and 429, never after a timeout/5xx that may already have
+    created a billed render.
+
+    Raises:
+        httpx.HTTPError: If the generate request fails.
+        ValueError: If the audio_input is invalid, upload fails, or API response indicates an error.
+    """
+    import heygen_api  # heygen_api imports this module
+
+    voice_settings, cached_asset_key = await asyncio.to_thread(
+        heygen_api.prepare_voice_settings, api_key, audio_input, proxies,
+        upload_progress_callback, asset_cache)
+    if on_audio_ready is not None:
+        on_audio_ready(voice_settings)
+
+    generate_url = f"{BASE_URL}/v2/video/generate"
+    payload = {
+        "video_inputs": [
+            {
+                "character": {
+                    "type": "avatar",
+                    "avatar_id": avatar_id,
+                    "avatar_style": "normal"
+                },
+                "voice": voice_settings
+            }
+        ],
+        # --- Add dimension field for 1280x720 resolution ---
+        "dimension": {
+            "width": 1280,
+            "height": 720
+        },
+        "test": False,
+        # ID phía client để khớp trạng thái/webhook với job (HeyGen không khử trùng theo nó)
+        "callback_id": callback_id or new_idempotency_key()
+    }
+
+    try:
+        print(f"[API REQUEST] POST {generate_url}")
+        response = await _request("POST", generate_url, api_key, proxies, json=payload,
+                                  on_retry=on_retry)
+
+        print(f"[API RESPONSE] Status Code: {response.status_code}")
+
+        response.raise_for_status() # Raise HTTPStatusError for bad responses (4xx or 5xx)
+        data = response.json()
+
+        if data is None:
+            raise ValueError("API tạo video không trả về dữ liệu.")
+
+        error_info = data.get('error')
+        if error_info is not None:
+            msg = f"Lỗi API tạo video: {error_info.get('message', 'Unknown error')}"
+            if error_info.get('code'): msg += f" (Code: {error_info['code']})"
+            raise ValueError(msg)
+
+        video_id = data.get('data', {}).get('video_id')
+        if video_id:
+            print(f"[API RESPONSE] Tạo video thành công. Video ID: {video_id}")
+            return video_id
+        else:
+            raise ValueError(f"Phản hồi API tạo video thành công nhưng không chứa video_id: {data}")
+
+    except httpx.HTTPError as e:
+        error_message = f"Lỗi mạng khi tạo video: {e}"
+        body = _response_text(e)
+        if body is not None:
+            error_message += f"\nResponse Body: {body[:500]}"
+        print(f"[API ERROR] {error_message}")
+        if cached_asset_key and isinstance(e, httpx.HTTPStatusError) and 400 <= e.response.status_code < 500:
+            asset_cache.invalidate(*cached_asset_key) # Lần sau upload lại thay vì dùng asset có thể đã hết hạn
+        raise
+    except Exception as e:
+        print(f"[API ERROR] Lỗi không xác định khi tạo video: {e}\n{traceback.format_exc()}")
+        if cached_asset_key:
+            asset_cache.invalidate(*cached_asset_key)
+        raise
+
+
+async def check_video_status(api_key: str, video_id: str, proxies: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Bản async của heygen_api.check_video_status.
+
+    Raises:
+        ValueError: Nếu API trả về lỗi.
+        httpx.HTTPError: Nếu có lỗi mạng.
+
+    Returns:
+        dict: Dictionary chứa thông tin trạng thái (status, video_url, error, ...).
+    """
+    status_url = f"{BASE_URL}/v1/video_status.get"
+    response = await _request("GET", status_url, api_key, proxies, params={"video_id": video_id})
+    response.raise_for_status()
+    data = response.json()
+
+    if data is None:
+        raise ValueError(f"API kiểm tra trạng thái (ID: {video_id}) không trả về dữ liệu.")
+    # API v1 dùng code 100 cho thành công
+    elif data.get('code') != 100:
+        error_info = data.get('error')
+        msg = f"Lỗi API kiểm tra trạng thái: {data.get('message', 'Unknown error')}"
+        if error_info: # Thêm chi tiết lỗi nếu có
+            msg += f" - {error_info}"
+        raise ValueError(msg)
+    elif 'data' in data and isinstance(data.get('data'), dict):
+        # Trả về toàn bộ dictionary 'data' vì nó chứa status, url, error...
+        return data['data']
+    else:
+        raise ValueError(f"Phản hồi API kiểm tra trạng thái không hợp lệ: {data}")
+
+
+async def fetch_avatar_catalog(api_key: str, proxies: Optional[Dict[str, str]] = None,
+                               etag: Optional[str] = None,
+                               last_modified: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Tải catalog avatar (avatar + talking photo) kèm metadata, có điều kiện nếu có validator.
+
+    Gửi If-None-Match / If-Modified-Since khi biết ETag / Last-Modified của lần
+    tải trước; HTTP 304 trả về not_modified=True và entries=None.
+
+    Raises:
+        ValueError: Nếu có lỗi xảy ra trong quá trình gọi API hoặc xử lý dữ liệu.
+    Returns:
+        dict: {"not_modified", "entries", "etag", "last_modified"}; entries là danh
+        sách dict theo avatar_catalog.parse_catalog_entries.
+    """
+    list_url = f"{BASE_URL}/v2/avatars"
+    entries = []
+    error_msg = None
+    response = None
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        masked_key = api_key[:5] + '...' + api_key[-4:] if len(api_key) > 10 else api_key
+        print(f"[API REQUEST] URL: {list_url}")
+        print(f"[API REQUEST] Headers: {{'accept': 'application/json', 'x-api-key': '{masked_key}'}}")
+        print(f"[API REQUEST] Proxies: {proxies}")
+
+        response = await _request("GET", list_url, api_key, proxies, headers=headers)
+        if response.status_code == 304:
+            print("[API RESPONSE] Catalog avatar không đổi (304 Not Modified).")
+            return {"not_modified": True, "entries": None,
+                    "etag": response.headers.get("ETag") or etag,
+                    "last_modified": response.headers.get("Last-Modified") or last_modified}
+        response.raise_for_status()
+        data = response.json()
+
+        if data is None:
+            error_msg = "API không trả về dữ liệu (phản hồi trống)."
+        elif data.get('error') is not None:
+            error_info = data['error']
+            if isinstance(error_info, dict):
+                error_msg = f"Lỗi API HeyGen: {error_info.get('message', 'Unknown error')}"
+                if error_info.get('code'): error_msg += f" (Code: {error_info['code']})"
+            elif isinstance(error_info, str):
+                error_msg = f"Lỗi API HeyGen: {error_info}"
+            else:
+                error_msg = f"Lỗi API HeyGen không xác định. Phản hồi lỗi: {error_info}"
+        elif 'data' in data and isinstance(data.get('data'), dict):
+            heygen_data = data['data']
+            entries = avatar_catalog.parse_catalog_entries(heygen_data)
+
+            if not entries:
+                if not heygen_data.get('avatars') and not heygen_data.get('talking_photos'):
+                    error_msg = "Tài khoản không có Avatar hoặc Talking Photo nào."
+                else:
+                    # Có avatar/photo nhưng không lấy được ID?
+                    error_msg = "Không tìm thấy ID hợp lệ trong dữ liệu avatar/photo."
+        else:
+            error_msg = "Phản hồi API có cấu trúc không mong đợi."
+
+    except httpx.HTTPStatusError as e:
+        detail = ""
+        try: detail = e.response.json().get('error', {}).get('message', e.response.text)
+        except Exception: detail = e.response.text
+        error_msg = f"Lỗi HTTP từ API: {e.response.status_code} - {detail[:200]}..."
+    except httpx.TimeoutException:
+        error_msg = "Yêu cầu tới API HeyGen bị timeout."
+    except httpx.HTTPError as e:
+        error_msg = f"Lỗi mạng hoặc kết nối khi gọi API: {e}"
+    except json.JSONDecodeError as e_json:
+        raw_text = response.text if response is not None else ""
+        error_msg = f"Lỗi phân tích phản hồi JSON từ API: {e_json}. Dữ liệu nhận được: {raw_text[:200]}..."
+    except Exception as e:
+        error_msg = f"Lỗi không xác định trong quá trình tải avatar: {e}"
+
+    if error_msg:
+        raise ValueError(error_msg)
+    return {"not_modified": False, "entries": entries,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")}
+
+
+async def fetch_avatar_list(api_key: str, proxies: Optional[Dict[str, str]] = None) -> List[str]:
+    """Bản async của heygen_api.fetch_avatar_list.
+
+    Raises:
+        ValueError: Nếu có lỗi xảy ra trong quá trình gọi API hoặc xử lý dữ liệu.
+    Returns:
+        list: Danh sách các chuỗi avatar_id (bao gồm cả talking_photo_id) đã được sắp xếp.
+    """
+    catalog = await fetch_avatar_catalog(api_key, proxies)
+    return sorted(entry["avatar_id"] for entry in catalog["entries"])
+
+
+async def get_remaining_quota(api_key: str, proxies: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Async version of heygen_api.get_remaining_quota.
+
+    Raises:
+        httpx.HTTPError: If the network request fails.
+        ValueError: If the API response indicates an error or is not valid.
+        KeyError: If the expected keys ('data', 'remaining_quota') are not in the response.
+    """
+    url = f"{BASE_URL}/v2/user/remaining_quota"
+
+    print(f"[API QUOTA] GET {url} for key ...{api_key[-4:]}")
+
+    try:
+        response = await _request("GET", url, api_key, proxies)
+
+        print(f"[API QUOTA] Response Status: {response.status_code}")
+        response.raise_for_status()
+
+        response_data = response.json()
+
+        # Check for API-level errors reported in the JSON body
+        if response_data.get('error') is not None:
+            error_info = response_data['error']
+            msg = f"Lỗi API lấy quota: {error_info.get('message', 'Unknown error')}"
+            if error_info.get('code'): msg += f" (Code: {error_info['code']})"
+            raise ValueError(msg)
+
+        data_payload = response_data.get('data')
+        if data_payload and isinstance(data_payload, dict) and 'remaining_quota' in data_payload:
+            print(f"[API QUOTA] Lấy quota thành công cho key ...{api_key[-4:]}: {data_payload.get('remaining_quota')}")
+            return data_payload # Return the whole 'data' dictionary
+        else:
+            raise KeyError(f"Phản hồi API quota thành công nhưng cấu trúc không hợp lệ hoặc thiếu 'remaining_quota'. Response: {response_data}")
+
+    except httpx.HTTPError as e:
+        error_message = f"Lỗi mạng khi lấy quota: {e}"
+        body = _response_text(e)
+        if body is not None:
+            error_message += f"\nResponse Body: {body[:500]}"
+        print(f"[API ERROR] {error_message}")
+        raise
+    except (ValueError, KeyError) as e:
+        print(f"[API ERROR] Lỗi xử lý phản hồi quota: {e}")
+        raise
+    except Exception as e:
+        print(f"[API ERROR] Lỗi không xác định khi lấy quota: {e}\n{traceback.format_exc()}")
+        raise
+
+
+async def list_videos(api_key: str, proxies: Optional[Dict[str, str]] = None, limit: int = 100,
+                      token: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Async version of heygen_api.list_videos. Fetches one page: the first, or
+    the one after `token` (the pagination token returned with the previous page).
+
+    Raises:
+        httpx.HTTPError: If the network request fails.
+        ValueError: If the API response indicates an error or is not valid.
+        KeyError: If the expected keys ('data', 'videos') are not in the response.
+    """
+    url = f"{BASE_URL}/v1/video.list"
+
+    params = {"limit": limit}
+    if token:
+        params["token"] = token
+
+    print(f"[API LIST] GET {url} for key ...{api_key[-4:]} with limit {limit}{' (trang tiếp)' if token else ''}")
+
+    try:
+        response = await _request("GET", url, api_key, proxies, params=params)
+
+        print(f"[API LIST] Response Status: {response.status_code}")
+        response.raise_for_status()
+
+        response_data = response.json()
+
+        # Check for API-level errors (code != 100 for v1)
+        if response_data.get('code') != 100:
+            error_msg = f"Lỗi API lấy danh sách video: Code {response_data.get('code')}, Message: {response_data.get('message')}"
+            error_detail = response_data.get('error')
+            if error_detail: error_msg += f", Error: {error_detail}"
+            raise ValueError(error_msg)
+
+        data_payload = response_data.get('data')
+        if data_payload and isinstance(data_payload, dict) and isinstance(data_payload.get('videos'), list):
+            print(f"[API LIST] Lấy danh sách thành công cho key ...{api_key[-4:]}. Số lượng: {len(data_payload['videos'])}")
+            return data_payload # Return the whole 'data' dictionary (includes videos and token)
+        else:
+            raise KeyError(f"Phản hồi API list video thành công nhưng cấu trúc không hợp lệ hoặc thiếu 'videos'. Response: {response_data}")
+
+    except httpx.HTTPError as e:
+        error_message = f"Lỗi mạng khi lấy danh sách video: {e}"
+        body = _response_text(e)
+        if body is not None:
+            error_message += f"\nResponse Body: {body[:500]}"
+        print(f"[API ERROR] {error_message}")
+        raise
+    except (ValueError, KeyError) as e:
+        print(f"[API ERROR] Lỗi xử lý phản hồi danh sách video: {e}")
+        raise
+    except Exception as e:
+        print(f"[API ERROR] Lỗi không xác định khi lấy danh sách video: {e}\n{traceback.format_exc()}")
+        raise
+
+
+# --- Streaming Video Listing ---
+VIDEO_PAGE_SIZE = 100
+VIDEO_PAGE_PREFETCH = 2
+
+
+async def iter_video_pages(api_key: str, proxies: Optional[Dict[str, str]] = None,
+                           page_size: int = VIDEO_PAGE_SIZE, prefetch: int = VIDEO_PAGE_PREFETCH,
+                           known_ids: Optional[Container[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Walks every page of /v1/video.list, following the pagination token.
+
+    Up to `prefetch` pages are fetched ahead while the caller handles the
+    current one. With `known_ids` (incremental sync), listing stops after the
+    first page that contains an already known video: HeyGen lists newest
+    first, so everything after it is already indexed. That page is still
+    yielded in full so status changes of recent videos are picked up.
+
+    Yields:
+        Lists of video dicts, one list per page.
+
+    Raises:
+        Same as list_videos, raised when the failing page is reached.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, prefetch))
+    done = object()
+
+    async def producer():
+        token = None
+        try:
+            while True:
+                page = await list_videos(api_key, proxies, limit=page_size, token=token)
+                videos = page.get('videos') or []
+                await queue.put(videos)
+                token = page.get('token')
+                reached_known = known_ids is not None and any(v.get('video_id') in known_ids for v in videos)
+                if not token or not videos or reached_known:
+                    break
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(done)
+
+    task = asyncio.create_task(producer())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+
+async def iter_videos(api_key: str, proxies: Optional[Dict[str, str]] = None,
+                      page_size: int = VIDEO_PAGE_SIZE, prefetch: int = VIDEO_PAGE_PREFETCH,
+                      known_ids: Optional[Container[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Same as iter_video_pages, one video at a time."""
+    async for videos in iter_video_pages(api_key, proxies, page_size, prefetch, known_ids):
+        for video in videos:
+            yield video
@@ -1,8 +1,28 @@
 """HeyGen MCP - API client and MCP server for HeyGen API interaction."""
 
+import importlib
+
 __version__ = "0.0.3"
 
-from heygen_mcp.api_client import HeyGenApiClient
-from heygen_mcp.server import main, mcp
+# Public names resolved on first access, so importing a submodule such as
+# heygen_mcp.polling does not load the MCP server and its dependencies
+_LAZY_ATTRIBUTES = {
+    "HeyGenApiClient": "heygen_mcp.api_client",
+    "mcp": "heygen_mcp.server",
+    "main": "heygen_mcp.server",
+}
 
 __all__ = ["HeyGenApiClient", "mcp", "main"]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
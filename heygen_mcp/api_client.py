@@ -1,10 +1,44 @@
 """HeyGen API client module for interacting with the HeyGen API."""
 
-import importlib.metadata
-from typing import Any, Dict, List, Optional
+import asyncio
+import functools
+import importlib.util
+import os
+import time
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 import httpx
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, TypeAdapter, WithJsonSchema
+
+from heygen_mcp import catalog_index
+from heygen_mcp.cache import AsyncTTLCache, CacheStats
+from heygen_mcp.polling import (
+    MAX_STATUS_FAILURES,
+    TERMINAL_VIDEO_STATUSES,
+    WEBHOOK_FALLBACK_MAX_INTERVAL,
+    WEBHOOK_FALLBACK_MIN_INTERVAL,
+    next_poll_interval,
+)
+from heygen_mcp.ratelimit import RateLimiter, get_shared_limiter
+from heygen_mcp.retry import RetryPolicy, classify_error, new_idempotency_key
+
+if TYPE_CHECKING:
+    from heygen_mcp.job_store import JobStore
+    from heygen_mcp.webhooks import WebhookReceiver
 
 #######################
 # HeyGen API Models #
@@ -16,13 +50,18 @@ class BaseHeyGenResponse(BaseModel):
     error: Optional[str] = None
 
 
+# Preview URLs are only passed through to the caller, so they are kept as the
+# strings HeyGen sent instead of being parsed and normalized like HttpUrl.
+PassthroughUrl = Annotated[str, WithJsonSchema({"type": "string", "format": "uri"})]
+
+
 # Voice information models
 class VoiceInfo(BaseModel):
     voice_id: str
     language: str
     gender: str
     name: str
-    preview_audio: HttpUrl
+    preview_audio: PassthroughUrl
     support_pause: bool
     emotion_support: bool
     support_interactive_avatar: bool
@@ -36,6 +75,19 @@ class VoicesResponse(BaseHeyGenResponse):
     data: Optional[VoicesData] = None
 
 
+class RawVoicesData(BaseModel):
+    """Voices payload whose items are validated only once they are returned."""
+
+    voices: List[Dict[str, Any]]
+
+
+class RawVoicesResponse(BaseHeyGenResponse):
+    data: Optional[RawVoicesData] = None
+
+
+VOICE_LIST = TypeAdapter(List[VoiceInfo])
+
+
 # User quota models
 class QuotaDetails(BaseModel):
     api: int
@@ -59,7 +111,7 @@ class AvatarGroup(BaseModel):
     name: str
     created_at: int
     num_looks: int
-    preview_image: HttpUrl
+    preview_image: PassthroughUrl
     group_type: str
     train_status: Optional[str] = None
 
@@ -73,13 +125,26 @@ class AvatarGroupListResponse(BaseHeyGenResponse):
     data: Optional[AvatarGroupListData] = None
 
 
+class RawAvatarGroupListData(BaseModel):
+    """Avatar group payload whose items are validated only once they are returned."""
+
+    avatar_group_list: List[Dict[str, Any]]
+
+
+class RawAvatarGroupListResponse(BaseHeyGenResponse):
+    data: Optional[RawAvatarGroupListData] = None
+
+
+AVATAR_GROUP_LIST = TypeAdapter(List[AvatarGroup])
+
+
 # Avatar models
 class Avatar(BaseModel):
     avatar_id: str
     avatar_name: str
     gender: str
-    preview_image_url: HttpUrl
-    preview_video_url: HttpUrl
+    preview_image_url: PassthroughUrl
+    preview_video_url: PassthroughUrl
     premium: bool
     type: Optional[str] = None
     tags: Optional[List[str]] = None
@@ -94,6 +159,19 @@ class AvatarsInGroupResponse(BaseHeyGenResponse):
     data: Optional[AvatarsInGroupData] = None
 
 
+class RawAvatarsInGroupData(BaseModel):
+    """Avatar payload whose items are validated only once they are returned."""
+
+    avatar_list: List[Dict[str, Any]]
+
+
+class RawAvatarsInGroupResponse(BaseHeyGenResponse):
+    data: Optional[RawAvatarsInGroupData] = None
+
+
+AVATAR_LIST = TypeAdapter(List[Avatar])
+
+
 # Video generation models
 class Character(BaseModel):
     type: str = "avatar"
@@ -168,17 +246,44 @@ class MCPGetCreditsResponse(BaseHeyGenResponse):
     remaining_credits: Optional[int] = None
 
 
-class MCPVoicesResponse(BaseHeyGenResponse):
-    voices: Optional[List[VoiceInfo]] = None
+class CatalogSnapshot(BaseHeyGenResponse):
+    """Unvalidated catalog items kept in memory to serve pages and filters."""
+
+    items: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class AvatarCatalogSnapshot(CatalogSnapshot):
+    """Avatars of every group merged into one deduplicated snapshot."""
+
+    group_count: int = 0
+    failed_groups: Dict[str, str] = Field(default_factory=dict)
+
+
+class MCPCatalogPage(BaseHeyGenResponse):
+    """Paging information shared by the catalog tool responses."""
 
+    total_count: Optional[int] = None  # Items matching the filters
+    offset: Optional[int] = None
+    next_offset: Optional[int] = None  # None on the last page
 
-class MCPAvatarGroupResponse(BaseHeyGenResponse):
-    avatar_groups: Optional[List[AvatarGroup]] = None
-    total_count: Optional[int] = None
 
+# Items are plain dicts when a ``fields`` projection was requested
+class MCPVoicesResponse(MCPCatalogPage):
+    voices: Optional[List[Union[VoiceInfo, Dict[str, Any]]]] = None
 
-class MCPAvatarsInGroupResponse(BaseHeyGenResponse):
-    avatars: Optional[List[Avatar]] = None
+
+class MCPAvatarGroupResponse(MCPCatalogPage):
+    avatar_groups: Optional[List[Union[AvatarGroup, Dict[str, Any]]]] = None
+
+
+class MCPAvatarsInGroupResponse(MCPCatalogPage):
+    avatars: Optional[List[Union[Avatar, Dict[str, Any]]]] = None
+
+
+class MCPAvatarListResponse(MCPCatalogPage):
+    avatars: Optional[List[Union[Avatar, Dict[str, Any]]]] = None
+    group_count: Optional[int] = None  # Groups searched, when spanning groups
+    failed_groups: Optional[Dict[str, str]] = None  # Group id -> error
 
 
 class MCPVideoGenerateResponse(BaseHeyGenResponse):
@@ -188,6 +293,24 @@ class MCPVideoGenerateResponse(BaseHeyGenResponse):
     status: Optional[str] = None
 
 
+class BatchVideoJob(BaseModel):
+    avatar_id: str
+    input_text: str
+    voice_id: str
+    title: str = ""
+
+
+class MCPBatchVideoJobResult(BaseHeyGenResponse):
+    index: int
+    video_id: Optional[str] = None
+
+
+class MCPBatchVideoGenerateResponse(BaseHeyGenResponse):
+    results: Optional[List[MCPBatchVideoJobResult]] = None
+    succeeded: int = 0
+    failed: int = 0
+
+
 class MCPVideoStatusResponse(BaseHeyGenResponse):
     video_id: Optional[str] = None
     status: Optional[str] = None
@@ -199,28 +322,337 @@ class MCPVideoStatusResponse(BaseHeyGenResponse):
     error_details: Optional[Dict[str, Any]] = None
 
 
+class MCPWaitForVideosResponse(BaseHeyGenResponse):
+    videos: Optional[List[MCPVideoStatusResponse]] = None
+    completed: int = 0
+    failed: int = 0
+    pending: Optional[List[str]] = None
+    unavailable: Optional[List[str]] = None
+    timed_out: bool = False
+    status_requests: int = 0
+
+
+#########################
+# HTTP Transport Config #
+#########################
+
+
+class TransportConfig(BaseModel):
+    """Connection pool, protocol and timeout settings for the HTTP transport.
+
+    The defaults keep a handful of warm keep-alive connections to the HeyGen API
+    so that concurrent tool calls reuse them instead of opening a new TLS session
+    per request. With HTTP/2 enabled, requests are multiplexed over a single
+    connection per host.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+    write_timeout: float = 60.0
+    pool_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """Build a transport config from HEYGEN_HTTP_* environment variables.
+
+        Variables that are not set fall back to the field defaults.
+        """
+        values: Dict[str, Any] = {}
+        for name in cls.model_fields:
+            raw = os.getenv(f"HEYGEN_HTTP_{name.upper()}")
+            if raw is not None and raw.strip() != "":
+                values[name] = raw.strip()
+        return cls.model_validate(values)
+
+    def http2_available(self) -> bool:
+        """Return True if HTTP/2 was requested and the h2 package is installed."""
+        if not self.http2:
+            return False
+        return importlib.util.find_spec("h2") is not None
+
+    def build_client(self, **kwargs) -> httpx.AsyncClient:
+        """Create an AsyncClient using these pool, protocol and timeout settings.
+
+        HTTP/2 requires the optional ``h2`` package (``pip install httpx[http2]``).
+        If it is missing, the client falls back to HTTP/1.1.
+        """
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        timeout = httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+        return httpx.AsyncClient(
+            limits=limits, timeout=timeout, http2=self.http2_available(), **kwargs
+        )
+
+
+# Items per page returned by the catalog tools unless a limit is given
+DEFAULT_PAGE_SIZE = 100
+
+# Avatar groups fetched at the same time when merging every group's avatars
+DEFAULT_FANOUT_CONCURRENCY = 8
+
+
+def _matches_filters(item: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Check a raw catalog item against equality filters; None means any value.
+
+    Strings are compared case-insensitively.
+    """
+    for field, expected in filters.items():
+        if expected is None:
+            continue
+        value = item.get(field)
+        if isinstance(expected, str):
+            if not isinstance(value, str) or value.casefold() != expected.casefold():
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def catalog_page(
+    mcp_response_class,
+    items_field: str,
+    adapter: TypeAdapter,
+    model_class,
+    items: Sequence[Dict[str, Any]],
+    offset: int = 0,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+):
+    """Build one page of a catalog response from matching raw items.
+
+    Only the items on the page are validated into models.
+
+    Args:
+        mcp_response_class: The MCP response class to instantiate
+        items_field: Name of the response field holding the items
+        adapter: TypeAdapter validating a list of ``model_class``
+        model_class: Model of a single item, used to check ``fields``
+        items: Raw items matching the filters, in catalog order
+        offset: Index of the first item to return
+        limit: Maximum number of items to return; None returns all
+        fields: Only include these item fields
+
+    Raises:
+        ValueError: If offset or limit is negative, or a field is unknown
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must not be negative.")
+    if fields:
+        unknown = set(fields) - set(model_class.model_fields)
+        if unknown:
+            raise ValueError(
+                f"Unknown fields: {', '.join(sorted(unknown))}. Available: "
+                f"{', '.join(model_class.model_fields)}"
+            )
+    end = len(items) if limit is None else offset + limit
+    page = adapter.validate_python(items[offset:end])
+    if fields:
+        page = [item.model_dump(mode="json", include=set(fields)) for item in page]
+    return mcp_response_class(
+        **{items_field: page},
+        total_count=len(items),
+        offset=offset,
+        next_offset=end if end < len(items) else None,
+    )
+
+
+# Seconds an unconfirmed submission waits for its webhook event
+UNCONFIRMED_WATCH_TIMEOUT = 6 * 3600.0
+
+# Seconds each catalog endpoint stays fresh in the response cache
+DEFAULT_CACHE_TTLS: Dict[str, float] = {
+    "voices": 3600.0,
+    "avatar_groups": 600.0,
+    "avatars_in_group": 600.0,
+    "all_avatars": 600.0,
+}
+
+
+@functools.cache
+def package_version() -> str:
+    """Return the installed heygen-mcp version, or "unknown" when not installed.
+
+    Reading package metadata scans the installed distributions, so it is done
+    once, when the first request needs the user agent.
+    """
+    import importlib.metadata
+
+    try:
+        return importlib.metadata.version("heygen-mcp")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+# Progress callback of the merged avatar catalog:
+# (finished groups, total groups, group id, avatars first seen in that group)
+AvatarGroupProgress = Callable[[int, int, str, List[Dict[str, Any]]], Awaitable[None]]
+
+
+class _ProgressFanout:
+    """Progress listeners of a catalog load shared by coalesced callers.
+
+    Every listener receives each event of the load. Events already emitted
+    are replayed to a listener joining while the load runs, so callers that
+    joined late still see the full progress. A listener that raises is
+    dropped without failing the load for the others.
+    """
+
+    def __init__(self):
+        self.listeners: List[AvatarGroupProgress] = []
+        self.events: List[tuple] = []
+        self.active = False
+
+    def start(self):
+        self.events = []
+        self.active = True
+
+    def finish(self):
+        self.events = []
+        self.active = False
+
+    async def subscribe(self, listener: AvatarGroupProgress):
+        backlog = list(self.events) if self.active else []
+        self.listeners.append(listener)
+        for event in backlog:
+            if not await self._notify(listener, event):
+                return
+
+    def unsubscribe(self, listener: AvatarGroupProgress):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    async def emit(self, *event):
+        self.events.append(event)
+        for listener in list(self.listeners):
+            await self._notify(listener, event)
+
+    async def _notify(self, listener: AvatarGroupProgress, event: tuple) -> bool:
+        try:
+            await listener(*event)
+        except Exception:
+            self.unsubscribe(listener)
+            return False
+        return True
+
+
 # HeyGen API Client Class
 class HeyGenApiClient:
     """Client for interacting with the HeyGen API."""
 
-    def __init__(self, api_key: str):
-        """Initialize the API client with the API key."""
+    def __init__(
+        self,
+        api_key: str,
+        transport: Optional[TransportConfig] = None,
+        cache: Optional[AsyncTTLCache] = None,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        webhooks: Optional["WebhookReceiver"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        job_store: Optional["JobStore"] = None,
+    ):
+        """Initialize the API client with the API key.
+
+        Args:
+            api_key: The HeyGen API key
+            transport: Connection pool, HTTP/2 and timeout settings. Defaults to
+                ``TransportConfig()``.
+            cache: Cache for voice and avatar catalog responses. A new
+                ``AsyncTTLCache`` is created if not provided.
+            cache_ttls: Per-endpoint TTL overrides, keyed like
+                ``DEFAULT_CACHE_TTLS``. A TTL of 0 disables caching for that
+                endpoint.
+            webhooks: Receiver for completion webhooks. When set,
+                ``wait_for_videos`` waits for events and only polls as a slow
+                fallback.
+            rate_limiter: Token-bucket limiter applied to every request.
+                Defaults to the process-wide limiter shared with ``heygen_api``.
+            retry_policy: Retry and backoff policy for transient failures.
+                Defaults to ``RetryPolicy.from_env()``.
+            job_store: Durable journal of submitted videos. When set, every
+                submission and status change is recorded, and
+                ``resume_pending_jobs`` picks up unfinished renders after a
+                restart.
+        """
         self.api_key = api_key
+        self.transport = transport or TransportConfig()
+        self.cache = cache if cache is not None else AsyncTTLCache()
+        self.cache_ttls = {**DEFAULT_CACHE_TTLS, **(cache_ttls or {})}
+        self.webhooks = webhooks
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.job_store = job_store
+        self._resume_task: Optional[asyncio.Task] = None
+        # Webhook waits for submissions that failed ambiguously
+        self._reconcile_tasks: Set[asyncio.Task] = set()
+        # Catalog indexes with the snapshots they were last refreshed from
+        self.voice_index = catalog_index.voice_index()
+        self._voice_index_source: Optional[CatalogSnapshot] = None
+        self._avatar_indexes: Dict[tuple, tuple] = {}
+        # Progress listeners of the merged avatar load, keyed by include_public
+        self._all_avatars_progress: Dict[bool, _ProgressFanout] = {}
+        self.base_url = "https://api.heygen.com/v2"
+        self._client = self.transport.build_client()
 
-        # Set version for user agent
-        try:
-            self.version = importlib.metadata.version("heygen-mcp")
-        except importlib.metadata.PackageNotFoundError:
-            self.version = "unknown"
+    @property
+    def version(self) -> str:
+        """Installed package version, looked up on first use."""
+        return package_version()
 
-        self.user_agent = f"heygen-mcp/{self.version}"
-        self.base_url = "https://api.heygen.com/v2"
-        self._client = httpx.AsyncClient()
+    @property
+    def user_agent(self) -> str:
+        return f"heygen-mcp/{self.version}"
 
     async def close(self):
         """Close the underlying HTTP client."""
+        if self._resume_task is not None:
+            self._resume_task.cancel()
+        for task in list(self._reconcile_tasks):
+            task.cancel()
         await self._client.aclose()
 
+    def cache_stats(self) -> CacheStats:
+        """Return hit and miss counters for the catalog response cache."""
+        return self.cache.stats()
+
+    async def _cached(
+        self,
+        name: str,
+        params: tuple,
+        fetch,
+        should_cache: Callable[[Any], bool] = lambda response: response.error is None,
+    ):
+        """Serve a catalog call from the response cache.
+
+        Args:
+            name: Endpoint name, used as the TTL key and the cache key prefix
+            params: Hashable request parameters that complete the cache key
+            fetch: Coroutine function performing the uncached call
+            should_cache: Whether a fetched response may be stored; by default
+                every response without an error
+
+        Returns:
+            The cached or freshly fetched MCP response. Error responses are
+            returned but never cached.
+        """
+        ttl = self.cache_ttls.get(name, 0)
+        if ttl <= 0:
+            return await fetch()
+        return await self.cache.get_or_load(
+            (name, *params), fetch, ttl, should_cache=should_cache
+        )
+
     def _get_headers(self) -> Dict[str, str]:
         """Return the headers needed for API requests."""
         return {
@@ -230,17 +662,29 @@ class HeyGenApiClient:
         }
 
     async def _make_request(
-        self, endpoint: str, method: str = "GET", data: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        self,
+        endpoint: str,
+        method: str = "GET",
+        data: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None,
+        raw: bool = False,
+    ) -> Any:
         """Make a request to the specified API endpoint.
 
+        Transient failures are retried according to ``retry_policy``. Time
+        spent waiting for a rate limit slot does not count against its deadline.
+
         Args:
             endpoint: The API endpoint to call (without the base URL)
             method: HTTP method to use (GET or POST)
             data: JSON payload for POST requests
+            idempotent: Whether the request may be repeated after a timeout or
+                5xx. Defaults to True for GET and False for POST.
+            raw: Return the undecoded response body, so it can be parsed
+                straight into a model with ``model_validate_json``
 
         Returns:
-            The JSON response from the API
+            The JSON response from the API, or its raw bytes if ``raw`` is set
 
         Raises:
             httpx.RequestError: If there's a network-related error
@@ -249,17 +693,36 @@ class HeyGenApiClient:
         """
         url = f"{self.base_url}/{endpoint}"
         headers = self._get_headers()
+        # Only the HTTP calls count against the retry deadline, not the queue
+        budget = self.retry_policy.budget()
 
         if method.upper() == "GET":
-            response = await self._client.get(url, headers=headers)
+
+            async def send():
+                return await budget.run(self._client.get(url, headers=headers))
+
         elif method.upper() == "POST":
             headers["Content-Type"] = "application/json"
-            response = await self._client.post(url, headers=headers, json=data)
+
+            async def send():
+                return await budget.run(
+                    self._client.post(url, headers=headers, json=data)
+                )
+
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
 
-        response.raise_for_status()  # Raises if status code is 4xx or 5xx
-        return response.json()
+        async def attempt():
+            # Waits for a rate limit slot and requeues on 429 + Retry-After
+            response = await self.rate_limiter.send(self.api_key, url, send)
+            response.raise_for_status()  # Raises if status code is 4xx or 5xx
+            return response.content if raw else response.json()
+
+        if idempotent is None:
+            idempotent = method.upper() == "GET"
+        return await self.retry_policy.call(
+            attempt, idempotent=idempotent, budget=budget
+        )
 
     async def _handle_api_request(
         self,
@@ -285,8 +748,12 @@ class HeyGenApiClient:
             # Make the request to the API
             result = await api_call()
 
-            # Validate the response
-            validated_response = response_model_class.model_validate(result)
+            # Validate the response; raw bodies are parsed and validated in one
+            # pass without building an intermediate dict
+            if isinstance(result, (bytes, str)):
+                validated_response = response_model_class.model_validate_json(result)
+            else:
+                validated_response = response_model_class.model_validate(result)
 
             # Return the appropriate response based on the validation result
             if hasattr(validated_response, "data") and validated_response.data:
@@ -350,88 +817,585 @@ class HeyGenApiClient:
             transform_func=transform_data,
         )
 
-    async def get_voices(self) -> MCPVoicesResponse:
-        """Get the list of available voices from the API."""
+    async def _catalog_snapshot(
+        self,
+        name: str,
+        params: tuple,
+        endpoint: str,
+        response_model_class,
+        items: Callable[[Any], List[Dict[str, Any]]],
+        error_msg: str,
+    ) -> CatalogSnapshot:
+        """Fetch a catalog endpoint into a cached, unvalidated snapshot.
+
+        Args:
+            name: Endpoint name, used as the TTL key and the cache key prefix
+            params: Hashable request parameters that complete the cache key
+            endpoint: The API endpoint to call (without the base URL)
+            response_model_class: Raw envelope model for the response
+            items: Returns the item list from the validated ``data``
+            error_msg: Error message if the response has no data
+        """
 
         async def api_call():
-            return await self._make_request("voices")
+            return await self._make_request(endpoint, raw=True)
 
         def transform_data(data, mcp_class):
-            # Truncate to the first 100 voices
-            return mcp_class(voices=data.voices[:100] if data.voices else None)
+            return mcp_class(items=items(data))
+
+        async def fetch():
+            return await self._handle_api_request(
+                api_call=api_call,
+                response_model_class=response_model_class,
+                mcp_response_class=CatalogSnapshot,
+                error_msg=error_msg,
+                transform_func=transform_data,
+            )
 
-        return await self._handle_api_request(
-            api_call=api_call,
-            response_model_class=VoicesResponse,
-            mcp_response_class=MCPVoicesResponse,
-            error_msg="No voices found.",
-            transform_func=transform_data,
+        return await self._cached(name, params, fetch)
+
+    async def get_voice_catalog(self) -> CatalogSnapshot:
+        """Get every voice as raw items, served from the response cache."""
+        return await self._catalog_snapshot(
+            "voices",
+            (),
+            "voices",
+            RawVoicesResponse,
+            lambda data: data.voices,
+            "No voices found.",
         )
 
-    async def list_avatar_groups(
+    async def get_avatar_group_catalog(
         self, include_public: bool = False
-    ) -> MCPAvatarGroupResponse:
-        """Get the list of avatar groups from the API."""
+    ) -> CatalogSnapshot:
+        """Get every avatar group as raw items, served from the response cache."""
+        public_param = "true" if include_public else "false"
+        return await self._catalog_snapshot(
+            "avatar_groups",
+            (include_public,),
+            f"avatar_group.list?include_public={public_param}",
+            RawAvatarGroupListResponse,
+            lambda data: data.avatar_group_list,
+            "No avatar groups found.",
+        )
 
-        async def api_call():
-            public_param = "true" if include_public else "false"
-            endpoint = f"avatar_group.list?include_public={public_param}"
-            return await self._make_request(endpoint)
+    async def get_avatar_catalog(self, group_id: str) -> CatalogSnapshot:
+        """Get every avatar of a group as raw items, served from the response cache."""
+        return await self._catalog_snapshot(
+            "avatars_in_group",
+            (group_id,),
+            f"avatar_group/{group_id}/avatars",
+            RawAvatarsInGroupResponse,
+            lambda data: data.avatar_list,
+            "No avatars found in the group.",
+        )
 
-        def transform_data(data, mcp_class):
-            return mcp_class(
-                avatar_groups=data.avatar_group_list, total_count=data.total_count
+    async def iter_avatar_catalogs(
+        self,
+        group_ids: Sequence[str],
+        max_concurrency: int = DEFAULT_FANOUT_CONCURRENCY,
+    ) -> AsyncIterator[Tuple[str, CatalogSnapshot]]:
+        """Fetch the avatars of several groups concurrently.
+
+        At most ``max_concurrency`` group requests are in flight. Pairs of
+        (group id, snapshot) are yielded as soon as each group finishes, so
+        callers can use partial results before the slowest group returns.
+        Requests still running are cancelled if the iteration stops early.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def fetch(group_id: str) -> Tuple[str, CatalogSnapshot]:
+            async with semaphore:
+                try:
+                    return group_id, await self.get_avatar_catalog(group_id)
+                except Exception as e:
+                    return group_id, CatalogSnapshot(error=str(e))
+
+        tasks = [asyncio.ensure_future(fetch(group_id)) for group_id in group_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_all_avatars_catalog(
+        self,
+        include_public: bool = False,
+        max_concurrency: int = DEFAULT_FANOUT_CONCURRENCY,
+        on_group: Optional[AvatarGroupProgress] = None,
+    ) -> AvatarCatalogSnapshot:
+        """Get the avatars of every group merged into one cached snapshot.
+
+        Group catalogs are fetched through ``iter_avatar_catalogs`` and merged
+        in group list order; an avatar listed in several groups is kept once.
+        A merged view missing failed groups is returned but not cached.
+
+        Args:
+            include_public: Include public avatar groups
+            max_concurrency: Maximum number of simultaneous group requests
+            on_group: Optional coroutine called with (finished groups, total
+                groups, group id, avatars first seen in that group) as each
+                group finishes. Concurrent calls share one load and each
+                receives its full progress. Not called when the view is
+                served from cache.
+        """
+
+        async def load(on_group: Optional[AvatarGroupProgress]):
+            groups = await self.get_avatar_group_catalog(include_public)
+            if groups.error:
+                return AvatarCatalogSnapshot(error=groups.error)
+            group_ids = list(dict.fromkeys(group["id"] for group in groups.items))
+            by_group: Dict[str, List[Dict[str, Any]]] = {}
+            failed: Dict[str, str] = {}
+            seen: Set[str] = set()
+            async for group_id, snapshot in self.iter_avatar_catalogs(
+                group_ids, max_concurrency
+            ):
+                if snapshot.error:
+                    failed[group_id] = snapshot.error
+                    fresh = []
+                else:
+                    by_group[group_id] = snapshot.items
+                    fresh = [
+                        item
+                        for item in snapshot.items
+                        if item.get("avatar_id") not in seen
+                    ]
+                    seen.update(item.get("avatar_id") for item in fresh)
+                if on_group is not None:
+                    done = len(by_group) + len(failed)
+                    await on_group(done, len(group_ids), group_id, fresh)
+
+            if group_ids and len(failed) == len(group_ids):
+                return AvatarCatalogSnapshot(error=next(iter(failed.values())))
+            merged: Dict[str, Dict[str, Any]] = {}
+            for group_id in group_ids:
+                for item in by_group.get(group_id, ()):
+                    merged.setdefault(item.get("avatar_id"), item)
+            return AvatarCatalogSnapshot(
+                items=list(merged.values()),
+                group_count=len(group_ids),
+                failed_groups=failed,
             )
 
-        return await self._handle_api_request(
-            api_call=api_call,
-            response_model_class=AvatarGroupListResponse,
-            mcp_response_class=MCPAvatarGroupResponse,
-            error_msg="No avatar groups found.",
-            transform_func=transform_data,
+        if self.cache_ttls.get("all_avatars", 0) <= 0:
+            # Uncached calls each run their own load
+            return await load(on_group)
+
+        progress = self._all_avatars_progress.setdefault(
+            include_public, _ProgressFanout()
         )
 
-    async def get_avatars_in_group(self, group_id: str) -> MCPAvatarsInGroupResponse:
-        """Get the list of avatars in a specific avatar group."""
+        async def fetch():
+            progress.start()
+            try:
+                return await load(progress.emit)
+            finally:
+                progress.finish()
 
-        async def api_call():
-            endpoint = f"avatar_group/{group_id}/avatars"
-            return await self._make_request(endpoint)
+        if on_group is not None:
+            await progress.subscribe(on_group)
+        try:
+            return await self._cached(
+                "all_avatars",
+                (include_public,),
+                fetch,
+                should_cache=lambda response: (
+                    not response.error and not response.failed_groups
+                ),
+            )
+        finally:
+            if on_group is not None:
+                progress.unsubscribe(on_group)
 
-        def transform_data(data, mcp_class):
-            return mcp_class(avatars=data.avatar_list)
+    async def get_voices(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        language: Optional[str] = None,
+        gender: Optional[str] = None,
+        emotion_support: Optional[bool] = None,
+        fields: Optional[List[str]] = None,
+    ) -> MCPVoicesResponse:
+        """Get a page of the available voices, optionally filtered and projected."""
+        return await self.search_voices(
+            None, language, gender, emotion_support, offset, limit, fields
+        )
 
-        return await self._handle_api_request(
-            api_call=api_call,
-            response_model_class=AvatarsInGroupResponse,
-            mcp_response_class=MCPAvatarsInGroupResponse,
-            error_msg="No avatars found in the group.",
-            transform_func=transform_data,
+    async def search_voices(
+        self,
+        query: Optional[str] = None,
+        language: Optional[str] = None,
+        gender: Optional[str] = None,
+        emotion_support: Optional[bool] = None,
+        offset: int = 0,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+    ) -> MCPVoicesResponse:
+        """Search voices by name words and attributes using the voice index."""
+        catalog = await self.get_voice_catalog()
+        if catalog.error:
+            return MCPVoicesResponse(error=catalog.error)
+        try:
+            if catalog is not self._voice_index_source:
+                self.voice_index.refresh(catalog.items)
+                self._voice_index_source = catalog
+            matches = self.voice_index.search(
+                query,
+                language=language,
+                gender=gender,
+                emotion_support=emotion_support,
+            )
+            return catalog_page(
+                MCPVoicesResponse,
+                "voices",
+                VOICE_LIST,
+                VoiceInfo,
+                matches,
+                offset,
+                limit,
+                fields,
+            )
+        except Exception as e:
+            return MCPVoicesResponse(error=str(e))
+
+    async def list_all_avatars(
+        self,
+        include_public: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+        max_concurrency: int = DEFAULT_FANOUT_CONCURRENCY,
+        on_group: Optional[AvatarGroupProgress] = None,
+    ) -> MCPAvatarListResponse:
+        """Get a page of the avatars of every avatar group in one call.
+
+        Args:
+            include_public: Include public avatar groups
+            offset: Index of the first avatar to return
+            limit: Maximum number of avatars to return
+            fields: Only include these avatar fields
+            max_concurrency: Maximum number of simultaneous group requests
+            on_group: Progress coroutine, see ``get_all_avatars_catalog``
+        """
+        catalog = await self.get_all_avatars_catalog(
+            include_public, max_concurrency, on_group
         )
+        if catalog.error:
+            return MCPAvatarListResponse(error=catalog.error)
+        try:
+            response = catalog_page(
+                MCPAvatarListResponse,
+                "avatars",
+                AVATAR_LIST,
+                Avatar,
+                catalog.items,
+                offset,
+                limit,
+                fields,
+            )
+        except Exception as e:
+            return MCPAvatarListResponse(error=str(e))
+        response.group_count = catalog.group_count
+        response.failed_groups = catalog.failed_groups or None
+        return response
+
+    async def search_avatars(
+        self,
+        query: Optional[str] = None,
+        gender: Optional[str] = None,
+        avatar_type: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        premium: Optional[bool] = None,
+        group_id: Optional[str] = None,
+        include_public: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+    ) -> MCPAvatarListResponse:
+        """Search avatars by name words and attributes using an avatar index.
+
+        Searches one group when ``group_id`` is given, otherwise the merged
+        avatars of every group from ``get_all_avatars_catalog``. Each scope
+        keeps its own index, refreshed when its cached catalog is replaced.
+
+        Args:
+            query: Words that must all prefix-match a word of the avatar name
+            gender: Only avatars of this gender
+            avatar_type: Only avatars of this type
+            tags: Only avatars having at least one of these tags
+            premium: Only premium (True) or non-premium (False) avatars
+            group_id: Search this avatar group only
+            include_public: Include public avatar groups when searching all
+            offset: Index of the first result to return
+            limit: Maximum number of results to return
+            fields: Only include these avatar fields
+        """
+        try:
+            if group_id:
+                scope = ("group", group_id)
+                catalog = await self.get_avatar_catalog(group_id)
+            else:
+                scope = ("all", include_public)
+                catalog = await self.get_all_avatars_catalog(include_public)
+            if catalog.error:
+                return MCPAvatarListResponse(error=catalog.error)
+
+            source, index = self._avatar_indexes.get(scope, (None, None))
+            if index is None:
+                index = catalog_index.avatar_index()
+            if catalog is not source:
+                index.refresh(catalog.items)
+                self._avatar_indexes[scope] = (catalog, index)
+
+            matches = index.search(
+                query, gender=gender, type=avatar_type, tags=tags, premium=premium
+            )
+            return catalog_page(
+                MCPAvatarListResponse,
+                "avatars",
+                AVATAR_LIST,
+                Avatar,
+                matches,
+                offset,
+                limit,
+                fields,
+            )
+        except Exception as e:
+            return MCPAvatarListResponse(error=str(e))
+
+    async def list_avatar_groups(
+        self,
+        include_public: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+    ) -> MCPAvatarGroupResponse:
+        """Get a page of the avatar groups, optionally projected."""
+        catalog = await self.get_avatar_group_catalog(include_public)
+        if catalog.error:
+            return MCPAvatarGroupResponse(error=catalog.error)
+        try:
+            return catalog_page(
+                MCPAvatarGroupResponse,
+                "avatar_groups",
+                AVATAR_GROUP_LIST,
+                AvatarGroup,
+                catalog.items,
+                offset,
+                limit,
+                fields,
+            )
+        except Exception as e:
+            return MCPAvatarGroupResponse(error=str(e))
+
+    async def get_avatars_in_group(
+        self,
+        group_id: str,
+        offset: int = 0,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        gender: Optional[str] = None,
+        premium: Optional[bool] = None,
+        fields: Optional[List[str]] = None,
+    ) -> MCPAvatarsInGroupResponse:
+        """Get a page of the avatars in a group, optionally filtered and projected."""
+        catalog = await self.get_avatar_catalog(group_id)
+        if catalog.error:
+            return MCPAvatarsInGroupResponse(error=catalog.error)
+        filters = {"gender": gender, "premium": premium}
+        matches = [item for item in catalog.items if _matches_filters(item, filters)]
+        try:
+            return catalog_page(
+                MCPAvatarsInGroupResponse,
+                "avatars",
+                AVATAR_LIST,
+                Avatar,
+                matches,
+                offset,
+                limit,
+                fields,
+            )
+        except Exception as e:
+            return MCPAvatarsInGroupResponse(error=f"An unexpected error occurred: {e}")
 
     async def generate_avatar_video(
         self, video_request: VideoGenerateRequest
     ) -> MCPVideoGenerateResponse:
-        """Generate an avatar video using the HeyGen API."""
+        """Generate an avatar video using the HeyGen API.
+
+        A ``callback_id`` is generated when the request has none, so status
+        responses and webhook events can be matched to the job. HeyGen does not
+        deduplicate submissions on it, so the POST is not retried after a read
+        timeout or 5xx, when the render may already have been created. Such a
+        job is journaled as unconfirmed rather than failed and, with a webhook
+        receiver, matched to its video when the completion event arrives.
+        """
+        if not video_request.callback_id:
+            video_request = video_request.model_copy(
+                update={"callback_id": new_idempotency_key()}
+            )
+
+        job_id = None
+        if self.job_store is not None:
+            from heygen_mcp.job_store import SUBMITTED, account_fingerprint
+
+            inputs = video_request.video_inputs
+            # Journal writes commit to SQLite; keep them off the event loop
+            job_id = await asyncio.to_thread(
+                self.job_store.create_job,
+                account=account_fingerprint(self.api_key),
+                avatar_id=inputs[0].character.avatar_id if inputs else None,
+                callback_id=video_request.callback_id,
+                metadata={"title": video_request.title},
+            )
+
+        submit_error: Optional[BaseException] = None
 
         async def api_call():
-            return await self._make_request(
-                "video/generate", method="POST", data=video_request.model_dump()
+            nonlocal submit_error
+            try:
+                return await self._make_request(
+                    "video/generate",
+                    method="POST",
+                    data=video_request.model_dump(),
+                )
+            except Exception as e:
+                submit_error = e
+                raise
+
+        try:
+            response = await self._handle_api_request(
+                api_call=api_call,
+                response_model_class=VideoGenerateResponse,
+                mcp_response_class=MCPVideoGenerateResponse,
+                error_msg="No video generation data returned.",
+                video_id=lambda d: d.get("video_id"),
+                task_id=lambda d: d.get("task_id"),
+                video_url=lambda d: d.get("video_url"),
+                status=lambda d: d.get("status"),
             )
+        except asyncio.CancelledError as e:
+            if job_id is not None:
+                await asyncio.shield(
+                    self._record_submission_failure(
+                        job_id, video_request.callback_id, e, "Submission cancelled."
+                    )
+                )
+            raise
+        if job_id is not None:
+            if response.video_id:
+                await asyncio.to_thread(
+                    self.job_store.update,
+                    job_id,
+                    video_id=response.video_id,
+                    status=SUBMITTED,
+                )
+            else:
+                await self._record_submission_failure(
+                    job_id,
+                    video_request.callback_id,
+                    submit_error,
+                    response.error or "No video id returned.",
+                )
+        return response
 
-        return await self._handle_api_request(
-            api_call=api_call,
-            response_model_class=VideoGenerateResponse,
-            mcp_response_class=MCPVideoGenerateResponse,
-            error_msg="No video generation data returned.",
-            video_id=lambda d: d.get("video_id"),
-            task_id=lambda d: d.get("task_id"),
-            video_url=lambda d: d.get("video_url"),
-            status=lambda d: d.get("status"),
+    async def _record_submission_failure(
+        self,
+        job_id: str,
+        callback_id: str,
+        error: Optional[BaseException],
+        message: str,
+    ) -> None:
+        """Journal a generate request that returned no video id.
+
+        Definite rejections are marked failed. Ambiguous errors leave the job
+        unconfirmed and, with a webhook receiver, start waiting for its event.
+        """
+        from heygen_mcp.job_store import UNCONFIRMED, submission_failure_status
+
+        status = "failed" if error is None else submission_failure_status(error)
+        await asyncio.to_thread(
+            self.job_store.update, job_id, status=status, error=message
+        )
+        if status == UNCONFIRMED:
+            self._watch_unconfirmed(callback_id, UNCONFIRMED_WATCH_TIMEOUT)
+
+    def _watch_unconfirmed(self, callback_id: str, timeout: float) -> None:
+        """Attach the video id of an unconfirmed job once its webhook arrives."""
+        if self.webhooks is None:
+            return
+
+        async def watch():
+            event = await self.webhooks.wait_any([callback_id], timeout)
+            if event is None or not event.video_id:
+                return
+            await asyncio.to_thread(
+                self.job_store.attach_video,
+                callback_id,
+                event.video_id,
+                status=event.status,
+                video_url=event.video_url,
+            )
+
+        task = asyncio.create_task(watch())
+        self._reconcile_tasks.add(task)
+        task.add_done_callback(self._reconcile_tasks.discard)
+
+    async def generate_avatar_videos_batch(
+        self, video_requests: List[VideoGenerateRequest], max_concurrency: int = 5
+    ) -> MCPBatchVideoGenerateResponse:
+        """Submit several avatar videos concurrently.
+
+        Requests are sent through a semaphore so that at most max_concurrency
+        submissions are in flight. A failed job is reported in its own result
+        entry and does not abort the rest of the batch.
+
+        Args:
+            video_requests: The video generation requests to submit
+            max_concurrency: Maximum number of simultaneous submissions
+
+        Returns:
+            One result per request, in input order, with a video id or an error
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def submit(index: int, request: VideoGenerateRequest):
+            async with semaphore:
+                try:
+                    response = await self.generate_avatar_video(request)
+                except Exception as e:
+                    return MCPBatchVideoJobResult(
+                        index=index, error=f"An unexpected error occurred: {e}"
+                    )
+            if response.error or not response.video_id:
+                return MCPBatchVideoJobResult(
+                    index=index,
+                    error=response.error or "No video id returned.",
+                )
+            return MCPBatchVideoJobResult(index=index, video_id=response.video_id)
+
+        results = await asyncio.gather(
+            *(submit(i, request) for i, request in enumerate(video_requests))
+        )
+        failed = sum(1 for result in results if result.error)
+        return MCPBatchVideoGenerateResponse(
+            results=list(results), succeeded=len(results) - failed, failed=failed
         )
 
     async def get_video_status(self, video_id: str) -> MCPVideoStatusResponse:
         """Get the status of a generated video from the API."""
+        status, _ = await self._check_video_status(video_id)
+        return status
+
+    async def _check_video_status(
+        self, video_id: str
+    ) -> Tuple[MCPVideoStatusResponse, bool]:
+        """Get a video status, and whether a failed check is worth repeating.
+
+        Connection errors, timeouts, 429 and 5xx responses are transient. Other
+        failures, such as a 4xx for an unknown video id, are permanent.
+        """
 
         async def api_call():
             # The endpoint is v1, not v2
@@ -458,7 +1422,7 @@ class HeyGenApiClient:
                 }
 
             # Return MCP response
-            return MCPVideoStatusResponse(
+            status = MCPVideoStatusResponse(
                 video_id=data.id,
                 status=data.status,
                 duration=data.duration,
@@ -468,11 +1432,180 @@ class HeyGenApiClient:
                 created_at=data.created_at,
                 error_details=error_details,
             )
-        except httpx.RequestError as exc:
-            return MCPVideoStatusResponse(error=f"HTTP Request failed: {exc}")
-        except httpx.HTTPStatusError as exc:
-            return MCPVideoStatusResponse(
-                error=f"HTTP Error: {exc.response.status_code} - {exc.response.text}"
-            )
+            await self._record_status(status)
+            return status, True
         except Exception as e:
-            return MCPVideoStatusResponse(error=f"An unexpected error occurred: {e}")
+            if isinstance(e, httpx.RequestError):
+                error = f"HTTP Request failed: {e}"
+            elif isinstance(e, httpx.HTTPStatusError):
+                error = f"HTTP Error: {e.response.status_code} - {e.response.text}"
+            else:
+                error = f"An unexpected error occurred: {e}"
+            return MCPVideoStatusResponse(error=error), classify_error(e) is not None
+
+    async def _record_status(self, status: MCPVideoStatusResponse) -> None:
+        """Write a video status to the job journal, if one is configured."""
+        if self.job_store is None or not status.video_id or not status.status:
+            return
+        error = None
+        if status.error_details:
+            error = status.error_details.get("message") or str(status.error_details)
+        await asyncio.to_thread(
+            self.job_store.update_by_video_id,
+            status.video_id,
+            status=status.status,
+            video_url=status.video_url,
+            error=error,
+        )
+
+    async def resume_pending_jobs(self, timeout: float = 6 * 3600.0) -> List[str]:
+        """Resume watching renders recorded in the job journal.
+
+        Jobs of this account that have a video id but no final status are
+        polled in a background task, which keeps the journal up to date.
+        Jobs that never received a video id are marked interrupted instead of
+        being submitted again. Unconfirmed jobs wait for their webhook event
+        when a receiver is configured.
+
+        Args:
+            timeout: Seconds the background task keeps waiting
+
+        Returns:
+            The video ids being watched
+        """
+        if self.job_store is None:
+            return []
+        from heygen_mcp.job_store import account_fingerprint
+
+        account = account_fingerprint(self.api_key)
+        jobs = await asyncio.to_thread(self.job_store.recover)
+        video_ids = [job.video_id for job in jobs if job.account in (None, account)]
+        if self.webhooks is not None:
+            for job in await asyncio.to_thread(self.job_store.unconfirmed_jobs):
+                if job.account in (None, account) and job.callback_id:
+                    self._watch_unconfirmed(job.callback_id, timeout)
+        if video_ids and (self._resume_task is None or self._resume_task.done()):
+            self._resume_task = asyncio.create_task(
+                self.wait_for_videos(video_ids, timeout=timeout)
+            )
+        return video_ids
+
+    async def wait_for_videos(
+        self,
+        video_ids: List[str],
+        timeout: float = 600.0,
+        on_progress: Optional[
+            Callable[[int, int, MCPVideoStatusResponse], Awaitable[None]]
+        ] = None,
+    ) -> MCPWaitForVideosResponse:
+        """Poll several videos until they all finish or the timeout passes.
+
+        Each video keeps its own schedule from ``next_poll_interval``, so polls
+        back off as renders take longer. Videos that are due at the same time
+        are checked concurrently. A status check failing with a connection
+        error, timeout, 429 or 5xx is retried at the next slot. A video whose
+        check fails permanently (e.g. a 4xx for an unknown id), or fails
+        ``MAX_STATUS_FAILURES`` times in a row, stops being polled and is
+        reported as unavailable with the error. With a webhook receiver
+        configured, completion events resolve videos as soon as they arrive and
+        polling only runs at a slow fallback rate.
+
+        Args:
+            video_ids: The videos to wait for
+            timeout: Maximum number of seconds to wait
+            on_progress: Optional coroutine called with (finished, total, status)
+                after every status check
+
+        Returns:
+            The last known status of every video, with the last error of a
+            failed check, plus the ids still pending if the timeout was reached
+            and the ids given up on as unavailable
+        """
+        ids = list(dict.fromkeys(video_ids))
+        latest: Dict[str, MCPVideoStatusResponse] = {
+            video_id: MCPVideoStatusResponse(video_id=video_id) for video_id in ids
+        }
+        start = time.monotonic()
+        deadline = start + timeout
+        next_due = {video_id: start for video_id in ids}
+        status_requests = 0
+        failures: Dict[str, int] = {}
+        unavailable: List[str] = []
+
+        poll_bounds: Dict[str, float] = {}
+        if self.webhooks is not None:
+            poll_bounds = {
+                "min_interval": WEBHOOK_FALLBACK_MIN_INTERVAL,
+                "max_interval": WEBHOOK_FALLBACK_MAX_INTERVAL,
+            }
+
+        def finished(video_id: str) -> bool:
+            return latest[video_id].status in TERMINAL_VIDEO_STATUSES
+
+        async def apply_webhook_events():
+            for video_id in list(next_due):
+                event = self.webhooks.get(video_id)
+                if event is not None:
+                    await self._record_status(event)
+                    latest[video_id] = event
+                    del next_due[video_id]
+                    if on_progress is not None:
+                        done = sum(1 for i in ids if finished(i))
+                        await on_progress(done, len(ids), event)
+
+        while next_due:
+            if self.webhooks is not None:
+                await apply_webhook_events()
+                if not next_due:
+                    break
+            now = time.monotonic()
+            due = [video_id for video_id, at in next_due.items() if at <= now]
+            checks = await asyncio.gather(
+                *(self._check_video_status(video_id) for video_id in due)
+            )
+            status_requests += len(due)
+
+            now = time.monotonic()
+            for video_id, (status, transient) in zip(due, checks, strict=True):
+                if status.error is None:
+                    latest[video_id] = status
+                    failures.pop(video_id, None)
+                else:
+                    # Keep the last known status, with the reason it is stale
+                    latest[video_id] = latest[video_id].model_copy(
+                        update={"error": status.error}
+                    )
+                    failures[video_id] = failures.get(video_id, 0) + 1
+                if finished(video_id):
+                    del next_due[video_id]
+                elif status.error is not None and (
+                    not transient or failures[video_id] >= MAX_STATUS_FAILURES
+                ):
+                    del next_due[video_id]
+                    unavailable.append(video_id)
+                else:
+                    next_due[video_id] = now + next_poll_interval(
+                        now - start, latest[video_id].duration, **poll_bounds
+                    )
+                if on_progress is not None:
+                    done = sum(1 for i in ids if finished(i))
+                    await on_progress(done, len(ids), latest[video_id])
+
+            if not next_due or now >= deadline:
+                break
+            delay = max(0.0, min(min(next_due.values()), deadline) - now)
+            if self.webhooks is not None:
+                await self.webhooks.wait_any(next_due, delay)
+            else:
+                await asyncio.sleep(delay)
+
+        videos = [latest[video_id] for video_id in ids]
+        return MCPWaitForVideosResponse(
+            videos=videos,
+            completed=sum(1 for v in videos if v.status == "completed"),
+            failed=sum(1 for v in videos if v.status == "failed"),
+            pending=list(next_due),
+            unavailable=unavailable,
+            timed_out=bool(next_due),
+            status_requests=status_requests,
+        )
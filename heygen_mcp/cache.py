@@ -0,0 +1,152 @@
+"""In-process async TTL cache for rarely changing HeyGen API catalogs."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    """Counters describing cache effectiveness."""
+
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    coalesced: int = 0
+    refreshes: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+class _CacheEntry:
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class AsyncTTLCache:
+    """LRU cache with per-entry TTL, stale-while-revalidate and single-flight.
+
+    Concurrent ``get_or_load`` calls for the same key share a single in-flight
+    loader, so a burst of identical requests produces one upstream call. The
+    loader runs in its own task, so cancelling one caller does not cancel the
+    load for the others. Entries past their TTL but still inside the stale
+    window are served immediately while a background task refreshes them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        stale_while_revalidate: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept before LRU eviction
+            stale_while_revalidate: Seconds an expired entry may still be served
+                while it is refreshed in the background
+            clock: Monotonic time source, in seconds
+        """
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = CacheStats()
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the hit, miss and eviction counters."""
+        return self._stats.model_copy(update={"size": len(self._entries)})
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        should_cache: Callable[[Any], bool] = lambda _: True,
+    ) -> Any:
+        """Return the cached value for key, loading it on a miss.
+
+        Args:
+            key: Cache key, typically the endpoint name and its parameters
+            loader: Coroutine function producing a fresh value
+            ttl: Seconds the loaded value stays fresh
+            should_cache: Predicate deciding whether a loaded value is stored;
+                error responses should not be cached
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return entry.value
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._stats.stale_hits += 1
+                if key not in self._inflight:
+                    self._stats.refreshes += 1
+                    self._start_load(key, loader, ttl, should_cache)
+                return entry.value
+            del self._entries[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self._stats.misses += 1
+        return await asyncio.shield(self._start_load(key, loader, ttl, should_cache))
+
+    def _start_load(self, key, loader, ttl, should_cache) -> asyncio.Task:
+        """Run the loader in a task of its own, registered as in flight for key.
+
+        Callers await it through ``asyncio.shield``, so a cancelled caller only
+        stops waiting.
+        """
+        task = asyncio.ensure_future(self._load(key, loader, ttl, should_cache))
+        self._inflight[key] = task
+        task.add_done_callback(self._on_load_done)
+        return task
+
+    async def _load(self, key, loader, ttl, should_cache) -> Any:
+        try:
+            value = await loader()
+        finally:
+            self._inflight.pop(key, None)
+        if should_cache(value):
+            self._store(key, value, ttl)
+        return value
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        now = self._clock()
+        self._entries[key] = _CacheEntry(
+            value, now + ttl, now + ttl + self.stale_while_revalidate
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    @staticmethod
+    def _on_load_done(task: asyncio.Task) -> None:
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody awaited does not log a warning;
+            # a failed refresh keeps serving the stale entry until it expires
+            task.exception()
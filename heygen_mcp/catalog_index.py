@@ -0,0 +1,202 @@
+"""In-memory inverted indexes over voice and avatar catalogs."""
+
+import bisect
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# Attributes indexed for each catalog, matching VoiceInfo and Avatar fields
+VOICE_ATTRIBUTES = (
+    "language",
+    "gender",
+    "emotion_support",
+    "support_pause",
+    "support_interactive_avatar",
+)
+AVATAR_ATTRIBUTES = ("gender", "type", "tags", "premium")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a name into lowercase word tokens."""
+    return _TOKEN.findall(text.casefold())
+
+
+def _normalize(value: Any) -> Any:
+    return value.casefold() if isinstance(value, str) else value
+
+
+class CatalogIndex:
+    """Inverted indexes over raw catalog items for multi-attribute lookups.
+
+    Each indexed attribute maps a value to the set of items having it; list
+    values such as tags index every element, strings are compared
+    case-insensitively. Names are split into tokens kept in a sorted list, so a
+    query word matches every token it is a prefix of. A search intersects the
+    posting sets, smallest first, and returns items in catalog order.
+
+    ``refresh`` takes the latest full item list and only re-indexes items whose
+    content changed, so refreshing an unchanged catalog costs a comparison per
+    item.
+    """
+
+    def __init__(self, key_field: str, attributes: Sequence[str], name_field: str):
+        """Initialize an empty index.
+
+        Args:
+            key_field: Field uniquely identifying an item, e.g. ``voice_id``
+            attributes: Fields to build inverted indexes for
+            name_field: Field whose tokens are indexed for name queries
+        """
+        self.key_field = key_field
+        self.attributes = tuple(attributes)
+        self.name_field = name_field
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._rank: Dict[str, int] = {}  # Position in the latest catalog
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {
+            attribute: {} for attribute in self.attributes
+        }
+        self._tokens: Dict[str, Set[str]] = {}
+        self._sorted_tokens: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def refresh(self, items: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Bring the index in line with the latest catalog.
+
+        Items are matched by ``key_field``; the first occurrence of a key wins.
+
+        Returns:
+            Counts of added, updated, removed and unchanged items
+        """
+        latest: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            key = item.get(self.key_field)
+            if key is not None and key not in latest:
+                latest[key] = item
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        tokens_changed = False
+        for key in [key for key in self._items if key not in latest]:
+            tokens_changed |= self._remove(key)
+            stats["removed"] += 1
+        for key, item in latest.items():
+            current = self._items.get(key)
+            if current is None:
+                stats["added"] += 1
+            elif current == item:
+                stats["unchanged"] += 1
+                continue
+            else:
+                tokens_changed |= self._remove(key)
+                stats["updated"] += 1
+            tokens_changed |= self._add(key, item)
+        if tokens_changed:
+            self._sorted_tokens = sorted(self._tokens)
+        self._rank = {key: position for position, key in enumerate(latest)}
+        return stats
+
+    def search(
+        self, query: Optional[str] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Return the items matching a name query and attribute filters.
+
+        Args:
+            query: Words that must all prefix-match a token of the item name
+            **filters: Attribute values to match; None matches any value. A
+                list matches items having any of the listed values.
+
+        Raises:
+            ValueError: If a filter names an attribute that is not indexed
+        """
+        candidate_sets: List[Set[str]] = []
+        for attribute, expected in filters.items():
+            if expected is None:
+                continue
+            if attribute not in self._postings:
+                raise ValueError(
+                    f"Cannot filter on {attribute!r}. Available filters: "
+                    f"{', '.join(self.attributes)}"
+                )
+            postings = self._postings[attribute]
+            values = (
+                expected if isinstance(expected, (list, tuple, set)) else [expected]
+            )
+            matches: Set[str] = set()
+            for value in values:
+                matches |= postings.get(_normalize(value), set())
+            candidate_sets.append(matches)
+        for word in tokenize(query or ""):
+            candidate_sets.append(self._prefix_matches(word))
+
+        if not candidate_sets:
+            keys: Iterable[str] = self._items
+        else:
+            candidate_sets.sort(key=len)
+            keys = set(candidate_sets[0])
+            for other in candidate_sets[1:]:
+                keys &= other
+                if not keys:
+                    break
+        return [self._items[key] for key in sorted(keys, key=self._rank.__getitem__)]
+
+    def _prefix_matches(self, word: str) -> Set[str]:
+        matches: Set[str] = set()
+        start = bisect.bisect_left(self._sorted_tokens, word)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(word):
+                break
+            matches |= self._tokens[token]
+        return matches
+
+    def _add(self, key: str, item: Dict[str, Any]) -> bool:
+        """Index an item; returns True if new name tokens were created."""
+        self._items[key] = item
+        for attribute in self.attributes:
+            for value in self._attribute_values(item, attribute):
+                self._postings[attribute].setdefault(value, set()).add(key)
+        created = False
+        for token in set(tokenize(item.get(self.name_field) or "")):
+            if token not in self._tokens:
+                self._tokens[token] = set()
+                created = True
+            self._tokens[token].add(key)
+        return created
+
+    def _remove(self, key: str) -> bool:
+        """Drop an item; returns True if name tokens disappeared."""
+        item = self._items.pop(key)
+        for attribute in self.attributes:
+            postings = self._postings[attribute]
+            for value in self._attribute_values(item, attribute):
+                postings[value].discard(key)
+                if not postings[value]:
+                    del postings[value]
+        removed = False
+        for token in set(tokenize(item.get(self.name_field) or "")):
+            self._tokens[token].discard(key)
+            if not self._tokens[token]:
+                del self._tokens[token]
+                removed = True
+        return removed
+
+    @staticmethod
+    def _attribute_values(item: Dict[str, Any], attribute: str) -> List[Any]:
+        value = item.get(attribute)
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return list({_normalize(v) for v in value if isinstance(v, (str, bool))})
+        if isinstance(value, (str, bool, int)):
+            return [_normalize(value)]
+        return []
+
+
+def voice_index() -> CatalogIndex:
+    """Create an empty index for voices."""
+    return CatalogIndex("voice_id", VOICE_ATTRIBUTES, "name")
+
+
+def avatar_index() -> CatalogIndex:
+    """Create an empty index for avatars."""
+    return CatalogIndex("avatar_id", AVATAR_ATTRIBUTES, "avatar_name")
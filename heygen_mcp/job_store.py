@@ -0,0 +1,422 @@
+"""Durable SQLite journal of submitted video jobs, used to resume after restarts."""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from heygen_mcp.retry import AMBIGUOUS_ERRORS, classify_error
+
+DEFAULT_JOB_STORE_FILE = "heygen_jobs.sqlite3"
+
+# Local states around HeyGen's own video statuses
+SUBMITTING = "submitting"  # Generate request sent, video id not known yet
+SUBMITTED = "submitted"  # Video id known, rendering not reported yet
+INTERRUPTED = "interrupted"  # Process stopped before the video id was recorded
+# Generate request failed after HeyGen may have received it; kept with its
+# callback id until a webhook event or status response names the video
+UNCONFIRMED = "unconfirmed"
+DOWNLOADED = "downloaded"
+
+# Jobs in these states are never resumed
+FINISHED_STATUSES = frozenset({"failed", INTERRUPTED, DOWNLOADED})
+
+# A submission still unanswered after this many seconds is treated as
+# abandoned even if a process with the owner's pid exists (pids are reused)
+STALE_SUBMITTING_AFTER = 3600.0
+
+# Windows process access right, exit code of a running process and error code
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_STILL_ACTIVE = 259
+_ERROR_ACCESS_DENIED = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    owner TEXT,
+    account TEXT,
+    callback_id TEXT,
+    audio_input TEXT,
+    avatar_id TEXT,
+    asset_id TEXT,
+    video_id TEXT,
+    status TEXT NOT NULL,
+    video_url TEXT,
+    download_path TEXT,
+    error TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_video_id ON jobs (video_id);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (source, status);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    detail TEXT,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id);
+"""
+
+_UPDATABLE = (
+    "account",
+    "asset_id",
+    "video_id",
+    "status",
+    "video_url",
+    "download_path",
+    "error",
+)
+
+
+def account_fingerprint(api_key: str) -> str:
+    """Identify an account by a hash of its API key, never the key itself."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def submission_failure_status(error: BaseException) -> str:
+    """Return the journal status for a generate request that raised ``error``.
+
+    A read timeout, 5xx response or cancellation leaves it unknown whether the
+    render was created, so the job becomes ``UNCONFIRMED`` rather than
+    terminal. Other errors, such as a rejected request or an upload that
+    never reached the generate call, mean no render exists: ``"failed"``.
+    Wrapped errors are classified by their ``__cause__`` chain.
+    """
+    while error is not None:
+        if isinstance(error, asyncio.CancelledError):
+            return UNCONFIRMED
+        if classify_error(error) in AMBIGUOUS_ERRORS:
+            return UNCONFIRMED
+        error = error.__cause__
+    return "failed"
+
+
+def current_owner() -> str:
+    """Identify the running process as ``host:pid``."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        import ctypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # Access denied means the process exists but belongs to someone else
+            return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == _STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def owner_alive(owner: Optional[str]) -> bool:
+    """Whether the process that recorded a job may still be running.
+
+    Jobs without an owner predate owner tracking and count as abandoned. An
+    owner on another host cannot be checked and counts as running.
+    """
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    if owner == current_owner():
+        return True
+    try:
+        return _pid_alive(int(pid))
+    except ValueError:
+        return False
+
+
+class JobRecord(BaseModel):
+    """One row of the job journal."""
+
+    job_id: str
+    source: str
+    owner: Optional[str] = None
+    account: Optional[str] = None
+    callback_id: Optional[str] = None
+    audio_input: Optional[str] = None
+    avatar_id: Optional[str] = None
+    asset_id: Optional[str] = None
+    video_id: Optional[str] = None
+    status: str
+    video_url: Optional[str] = None
+    download_path: Optional[str] = None
+    error: Optional[str] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    created_at: float
+    updated_at: float
+
+
+class JobStore:
+    """Journal of video jobs and their status transitions.
+
+    Every job is written before its generate request is sent, then updated as
+    the video id, status, result URL and download path become known. Each
+    status change is also appended to ``job_events``. The database runs in WAL
+    mode so the poller, downloader and UI threads can write while others read.
+    After a restart, ``pending_jobs`` returns what still needs polling or
+    downloading; jobs that never got a video id are marked interrupted rather
+    than resubmitted, so a render is never billed twice. A generate request
+    that failed ambiguously is kept as unconfirmed with its callback id, so
+    ``attach_video`` can reconcile it once the video shows up. Each job
+    records the process that submitted it, so several processes can share one
+    journal.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOB_STORE_FILE, source: str = "default"):
+        """Open (or create) the journal.
+
+        Args:
+            path: SQLite database file
+            source: Name of the application writing jobs, e.g. "gui" or "mcp",
+                so each one only resumes its own jobs
+        """
+        self.path = path
+        self.source = source
+        self.owner = current_owner()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Journals created before owner tracking
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+    def create_job(
+        self,
+        account: Optional[str] = None,
+        audio_input: Optional[str] = None,
+        avatar_id: Optional[str] = None,
+        callback_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Record a job about to be submitted and return its id.
+
+        The job id doubles as the callback id when none is given, so the
+        submission can be matched to webhook events and status responses.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, source, owner, account, callback_id,"
+                " audio_input, avatar_id, status, metadata, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    self.source,
+                    self.owner,
+                    account,
+                    callback_id or job_id,
+                    audio_input,
+                    avatar_id,
+                    SUBMITTING,
+                    json.dumps(metadata or {}),
+                    now,
+                    now,
+                ),
+            )
+            self._record_event(job_id, SUBMITTING, None, now)
+        return job_id
+
+    def update(self, job_id: str, detail: Optional[str] = None, **fields) -> None:
+        """Update job columns; a status change is also logged as an event.
+
+        Args:
+            job_id: The job to update
+            detail: Optional note stored with the status event
+            **fields: Any of account, asset_id, video_id, status, video_url,
+                download_path, error
+        """
+        unknown = set(fields) - set(_UPDATABLE)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT status FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return
+            if fields:
+                assignments = ", ".join(f"{name} = ?" for name in fields)
+                self._conn.execute(
+                    f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+                    (*fields.values(), now, job_id),
+                )
+            status = fields.get("status")
+            if status and status != row["status"]:
+                self._record_event(job_id, status, detail, now)
+
+    def update_by_video_id(self, video_id: str, **fields) -> Optional[str]:
+        """Update the job owning a video id; returns its job id, if any."""
+        job = self.find_by_video_id(video_id)
+        if job is None:
+            return None
+        self.update(job.job_id, **fields)
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._to_record(row)
+
+    def find_by_video_id(self, video_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE video_id = ? AND source = ?"
+                " ORDER BY created_at DESC LIMIT 1",
+                (video_id, self.source),
+            ).fetchone()
+        return self._to_record(row)
+
+    def find_by_callback_id(self, callback_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE callback_id = ? AND source = ?"
+                " ORDER BY created_at DESC LIMIT 1",
+                (callback_id, self.source),
+            ).fetchone()
+        return self._to_record(row)
+
+    def attach_video(self, callback_id: str, video_id: str, **fields) -> Optional[str]:
+        """Record the video id of an unconfirmed job found by its callback id.
+
+        Args:
+            callback_id: Callback id sent with the generate request
+            video_id: Video id reported for it by HeyGen
+            **fields: Other columns to update, as for ``update``
+
+        Returns:
+            The job id, or None if no unconfirmed job has this callback id
+        """
+        job = self.find_by_callback_id(callback_id)
+        if job is None or job.video_id or job.status != UNCONFIRMED:
+            return None
+        fields.setdefault("status", SUBMITTED)
+        self.update(
+            job.job_id,
+            video_id=video_id,
+            detail="Video id matched by callback id",
+            **fields,
+        )
+        return job.job_id
+
+    def unconfirmed_jobs(self) -> List[JobRecord]:
+        """Return this source's unconfirmed jobs, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE source = ? AND status = ?"
+                " ORDER BY created_at",
+                (self.source, UNCONFIRMED),
+            ).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def events(self, job_id: str) -> List[Dict[str, Any]]:
+        """Return the status transitions of a job, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, detail, at FROM job_events WHERE job_id = ?"
+                " ORDER BY at, rowid",
+                (job_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending_jobs(self, completed_is_final: bool = True) -> List[JobRecord]:
+        """Return this source's jobs that still need work, oldest first.
+
+        Args:
+            completed_is_final: Treat completed videos as done. Set to False
+                when completed videos still have to be downloaded.
+        """
+        finished = set(FINISHED_STATUSES)
+        if completed_is_final:
+            finished.add("completed")
+        placeholders = ", ".join("?" for _ in finished)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE source = ?"
+                f" AND status NOT IN ({placeholders}) ORDER BY created_at",
+                (self.source, *sorted(finished)),
+            ).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def recover(self, completed_is_final: bool = True) -> List[JobRecord]:
+        """Prepare for resuming after a restart.
+
+        Jobs still marked as submitting are set to interrupted, since it is
+        unknown whether HeyGen accepted them, once the process that submitted
+        them is gone (or the submission is older than
+        ``STALE_SUBMITTING_AFTER``). Submissions of other running processes
+        sharing the journal are left alone, and unconfirmed jobs stay as they
+        are for reconciliation. Returns the jobs with a video id that should be
+        polled (and downloaded) again.
+        """
+        resumable = []
+        now = time.time()
+        for job in self.pending_jobs(completed_is_final):
+            if job.video_id:
+                resumable.append(job)
+            elif job.status == UNCONFIRMED:
+                continue
+            elif (
+                owner_alive(job.owner) and now - job.updated_at < STALE_SUBMITTING_AFTER
+            ):
+                continue
+            else:
+                self.update(
+                    job.job_id,
+                    status=INTERRUPTED,
+                    detail="Process stopped before a video id was received",
+                )
+        return resumable
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _record_event(
+        self, job_id: str, status: str, detail: Optional[str], at: float
+    ) -> None:
+        self._conn.execute(
+            "INSERT INTO job_events (job_id, status, detail, at) VALUES (?, ?, ?, ?)",
+            (job_id, status, detail, at),
+        )
+
+    @staticmethod
+    def _to_record(row: Optional[sqlite3.Row]) -> Optional[JobRecord]:
+        if row is None:
+            return None
+        values = dict(row)
+        values["metadata"] = json.loads(values.get("metadata") or "{}")
+        return JobRecord(**values)
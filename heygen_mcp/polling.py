@@ -0,0 +1,49 @@
+"""Adaptive polling schedule for HeyGen video status checks."""
+
+from typing import Optional
+
+# Statuses after which a video will not change any more
+TERMINAL_VIDEO_STATUSES = frozenset({"completed", "failed"})
+
+# Consecutive failed status checks after which a video is no longer polled
+MAX_STATUS_FAILURES = 5
+
+MIN_POLL_INTERVAL = 5.0
+MAX_POLL_INTERVAL = 60.0
+
+# Bounds used when completion webhooks are received, so polling is a backstop
+WEBHOOK_FALLBACK_MIN_INTERVAL = 60.0
+WEBHOOK_FALLBACK_MAX_INTERVAL = 300.0
+
+# Rough render cost: seconds of processing per second of finished video
+RENDER_SECONDS_PER_VIDEO_SECOND = 6.0
+
+
+def next_poll_interval(
+    elapsed: float,
+    duration: Optional[float] = None,
+    min_interval: float = MIN_POLL_INTERVAL,
+    max_interval: float = MAX_POLL_INTERVAL,
+) -> float:
+    """Return how long to wait before polling a video's status again.
+
+    The interval grows with the time already spent waiting, so short renders are
+    noticed quickly while long renders are not polled every few seconds. When
+    the video duration is known, polls are also spread out until the expected
+    render time is close.
+
+    Args:
+        elapsed: Seconds since the video was first polled
+        duration: Reported video duration in seconds, if known
+        min_interval: Lower bound for the interval
+        max_interval: Upper bound for the interval
+
+    Returns:
+        The delay in seconds before the next status check
+    """
+    interval = min_interval * (1.0 + max(elapsed, 0.0) / 60.0)
+    if duration:
+        remaining = duration * RENDER_SECONDS_PER_VIDEO_SECOND - elapsed
+        if remaining > 0:
+            interval = max(interval, remaining / 4.0)
+    return min(max(interval, min_interval), max_interval)
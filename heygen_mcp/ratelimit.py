@@ -0,0 +1,274 @@
+"""Adaptive token-bucket rate limiting for HeyGen API requests."""
+
+import asyncio
+import email.utils
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+MIN_RATE = 0.2
+
+# Multiplicative decrease on a 429, additive increase (fraction of the
+# configured rate) on each successful request
+THROTTLE_FACTOR = 0.5
+RECOVERY_FRACTION = 0.02
+
+# How many 429 responses a single call absorbs before the error is surfaced
+DEFAULT_MAX_THROTTLE_RETRIES = 5
+
+_ID_SEGMENT = re.compile(r"^(?!v\d+$).*\d.*$")
+
+
+def parse_retry_after(
+    value: Optional[str], now: Optional[float] = None
+) -> Optional[float]:
+    """Convert a Retry-After header (seconds or HTTP date) to a delay in seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(when.timestamp() - (now if now is not None else time.time()), 0.0)
+
+
+def endpoint_key(url: str) -> str:
+    """Normalize a URL or path to a rate limit bucket name.
+
+    Path segments containing digits, other than version prefixes like ``v2``,
+    are treated as ids, so ``avatar_group/abc123/avatars`` and
+    ``avatar_group/def456/avatars`` share one bucket.
+    """
+    path = urlsplit(url).path if "://" in url else url.split("?", 1)[0]
+    segments = [s for s in path.strip("/").split("/") if s]
+    return "/".join("{id}" if _ID_SEGMENT.match(s) else s for s in segments)
+
+
+class TokenBucket:
+    """Token bucket that hands out send times in arrival order.
+
+    Each ``reserve`` call books the next free slot and returns how long the
+    caller must wait for it, so waiters are served first come, first served no
+    matter which thread or event loop they run on. The refill rate drops when
+    the server throttles and creeps back up on success, keeping throughput just
+    under the server's limit.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        min_rate: float = MIN_RATE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the bucket.
+
+        Args:
+            rate: Requests per second when not throttled
+            burst: Requests that may be sent back to back after a quiet period
+            min_rate: Floor for the refill rate while throttled
+            clock: Monotonic time source, in seconds
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(int(burst), 1)
+        self.min_rate = min(min_rate, rate)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_free = 0.0  # Theoretical arrival time of the next request
+        self._blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Book a send slot and return the seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            interval = 1.0 / self.rate
+            tolerance = (self.burst - 1) * interval
+            base = max(self._next_free, now)
+            start = max(now, base - tolerance, self._blocked_until)
+            self._next_free = max(base, start) + interval
+            return start - now
+
+    def blocked_for(self) -> float:
+        """Seconds left before the server allows requests again."""
+        with self._lock:
+            return max(self._blocked_until - self._clock(), 0.0)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        """Record a 429: slow the refill rate and pause until Retry-After."""
+        with self._lock:
+            now = self._clock()
+            self.rate = max(self.rate * THROTTLE_FACTOR, self.min_rate)
+            interval = 1.0 / self.rate
+            pause = retry_after if retry_after is not None else interval
+            self._blocked_until = max(self._blocked_until, now + pause)
+            # No burst right after the pause: resume at the reduced rate
+            tolerance = (self.burst - 1) * interval
+            self._next_free = max(self._next_free, self._blocked_until + tolerance)
+
+    def on_success(self) -> None:
+        """Record an accepted request: let the refill rate recover."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                step = self.max_rate * RECOVERY_FRACTION
+                self.rate = min(self.rate + step, self.max_rate)
+
+
+class RateLimiter:
+    """Shared rate limiter with one token bucket per API key and endpoint.
+
+    ``send`` wraps an async request: it waits for a slot, and when the server
+    answers 429 it honours Retry-After, slows the bucket down and queues the
+    request again instead of failing. ``acquire_sync``/``report`` cover
+    blocking code such as the streaming upload in ``heygen_api``.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        endpoint_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        max_throttle_retries: int = DEFAULT_MAX_THROTTLE_RETRIES,
+    ):
+        """Initialize the limiter.
+
+        Args:
+            rate: Default requests per second for each bucket. 0 disables
+                limiting; 429 responses are then returned as is.
+            burst: Default burst size for each bucket
+            endpoint_limits: ``(rate, burst)`` overrides keyed by endpoint, as
+                returned by ``endpoint_key``
+            max_throttle_retries: 429 responses a call absorbs before the last
+                one is returned to the caller
+        """
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_limits = dict(endpoint_limits or {})
+        self.max_throttle_retries = max_throttle_retries
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """Build a limiter from HEYGEN_RATE_LIMIT and HEYGEN_RATE_BURST."""
+        rate = os.getenv("HEYGEN_RATE_LIMIT", "").strip()
+        burst = os.getenv("HEYGEN_RATE_BURST", "").strip()
+        return cls(
+            rate=float(rate) if rate else DEFAULT_RATE,
+            burst=int(burst) if burst else DEFAULT_BURST,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def bucket(self, api_key: str, endpoint: str) -> TokenBucket:
+        """Return the bucket for an API key and endpoint, creating it if needed."""
+        # Keys are hashed so the limiter never holds the raw secret
+        account = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        name = endpoint_key(endpoint)
+        with self._lock:
+            bucket = self._buckets.get((account, name))
+            if bucket is None:
+                rate, burst = self.endpoint_limits.get(name, (self.rate, self.burst))
+                bucket = TokenBucket(rate=rate, burst=burst)
+                self._buckets[(account, name)] = bucket
+            return bucket
+
+    async def acquire(self, api_key: str, endpoint: str) -> TokenBucket:
+        """Wait for a send slot in the bucket for this key and endpoint."""
+        bucket = self.bucket(api_key, endpoint)
+        while True:
+            delay = bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # A 429 seen while waiting moves the slot past Retry-After
+            if bucket.blocked_for() <= 0:
+                return bucket
+
+    def acquire_sync(self, api_key: str, endpoint: str) -> TokenBucket:
+        """Blocking version of ``acquire`` for code running in threads."""
+        bucket = self.bucket(api_key, endpoint)
+        while True:
+            delay = bucket.reserve()
+            if delay > 0:
+                time.sleep(delay)
+            if bucket.blocked_for() <= 0:
+                return bucket
+
+    @staticmethod
+    def report(
+        bucket: TokenBucket, status_code: int, retry_after: Optional[str]
+    ) -> bool:
+        """Feed a response status back to its bucket.
+
+        Returns:
+            True if the response was a 429
+        """
+        if status_code == 429:
+            bucket.on_throttled(parse_retry_after(retry_after))
+            return True
+        bucket.on_success()
+        return False
+
+    async def send(
+        self,
+        api_key: str,
+        endpoint: str,
+        request: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """Send a request under the limiter, requeueing it on 429.
+
+        Args:
+            api_key: API key the request is billed to
+            endpoint: URL or path of the request, used to pick the bucket
+            request: Coroutine function performing the HTTP call
+
+        Returns:
+            The first non-429 response, or the last 429 once
+            ``max_throttle_retries`` is exhausted
+        """
+        if not self.enabled:
+            return await request()
+        throttled = 0
+        while True:
+            bucket = await self.acquire(api_key, endpoint)
+            response = await request()
+            retry_after = response.headers.get("Retry-After")
+            if not self.report(bucket, response.status_code, retry_after):
+                return response
+            throttled += 1
+            if throttled > self.max_throttle_retries:
+                return response
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter() -> RateLimiter:
+    """Return the process-wide limiter, built from the environment on first use.
+
+    The MCP client and the ``heygen_api`` helpers both use it, so requests for
+    the same key count against the same buckets.
+    """
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter.from_env()
+        return _shared_limiter
@@ -0,0 +1,208 @@
+"""Retry policy with error classification, jittered backoff and a deadline."""
+
+import asyncio
+import os
+import random
+import time
+import uuid
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from heygen_mcp.ratelimit import parse_retry_after
+
+T = TypeVar("T")
+
+# Error classes returned by classify_error
+CONNECT = "connect"
+READ_TIMEOUT = "read_timeout"
+SERVER_ERROR = "server_error"
+THROTTLED = "throttled"
+
+# Failures after which the server may already have acted on the request. A
+# POST is only retried on these when it carries an idempotency token.
+AMBIGUOUS_ERRORS = frozenset({READ_TIMEOUT, SERVER_ERROR})
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """Return the retry class of an exception, or None if it is not retryable."""
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return CONNECT
+    if isinstance(
+        error,
+        (
+            httpx.ReadTimeout,
+            httpx.WriteTimeout,
+            httpx.ReadError,
+            httpx.RemoteProtocolError,
+        ),
+    ):
+        return READ_TIMEOUT
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status == 429:
+            return THROTTLED
+        if status >= 500:
+            return SERVER_ERROR
+    return None
+
+
+def new_idempotency_key() -> str:
+    """Return a fresh client-side idempotency token."""
+    return uuid.uuid4().hex
+
+
+async def _await(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+class RetryBudget:
+    """Time budget of one retried call.
+
+    Only the time spent in ``run`` and in backoff sleeps is charged, so a
+    request queued behind the rate limiter does not use up its budget before
+    it is sent.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        self.spent = 0.0
+        self._clock = clock
+
+    def remaining(self) -> float:
+        """Seconds left in the budget."""
+        return max(self.seconds - self.spent, 0.0)
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """Await ``awaitable`` within the remaining budget and charge its time.
+
+        Raises:
+            TimeoutError: If the budget runs out before it finishes
+        """
+        started = self._clock()
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        finally:
+            self.spent += self._clock() - started
+
+
+class RetryPolicy:
+    """Retries transient HTTP failures with decorrelated jitter backoff.
+
+    Each delay is drawn uniformly between ``base_delay`` and three times the
+    previous delay, capped at ``max_delay``, which spreads out retries from
+    many concurrent callers. A 429 waits at least for its Retry-After. All
+    attempts and sleeps must fit in ``deadline`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        """Initialize the policy.
+
+        Args:
+            max_attempts: Total attempts including the first one
+            base_delay: Smallest delay between attempts, in seconds
+            max_delay: Largest delay between attempts, in seconds
+            deadline: Total time budget for all attempts, in seconds
+            clock: Monotonic time source, in seconds
+            sleep: Coroutine function used to wait between attempts
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._clock = clock
+        self._sleep = sleep
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build a policy from HEYGEN_RETRY_MAX_ATTEMPTS and HEYGEN_RETRY_DEADLINE."""
+        attempts = os.getenv("HEYGEN_RETRY_MAX_ATTEMPTS", "").strip()
+        deadline = os.getenv("HEYGEN_RETRY_DEADLINE", "").strip()
+        policy = cls()
+        if attempts:
+            policy.max_attempts = max(1, int(attempts))
+        if deadline:
+            policy.deadline = float(deadline)
+        return policy
+
+    def budget(self) -> RetryBudget:
+        """Return a fresh ``deadline`` budget for one call."""
+        return RetryBudget(self.deadline, clock=self._clock)
+
+    def next_delay(self, previous: float) -> float:
+        """Return the next decorrelated jitter delay after ``previous``."""
+        upper = max(previous * 3, self.base_delay)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+    def should_retry(self, error_class: Optional[str], idempotent: bool) -> bool:
+        """Decide whether an error of this class may be retried."""
+        if error_class is None:
+            return False
+        if not idempotent and error_class in AMBIGUOUS_ERRORS:
+            return False
+        return True
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[T]],
+        idempotent: bool = True,
+        on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+        budget: Optional[RetryBudget] = None,
+    ) -> T:
+        """Run ``func`` until it succeeds, fails permanently or runs out of budget.
+
+        Args:
+            func: Coroutine function performing one attempt
+            idempotent: Whether repeating the request is safe after the server
+                may have received it. Non-idempotent calls are only retried on
+                connection errors and 429.
+            on_retry: Called with (attempt number, error, delay) before sleeping
+            budget: Budget from ``budget()`` that ``func`` spends itself by
+                running its server calls through ``budget.run``, leaving out
+                time spent waiting for a rate limit slot. By default the whole
+                of each attempt is charged.
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            The last error if it is not retryable, attempts are exhausted or
+            the next delay would exceed the deadline; TimeoutError if the
+            budget runs out while a request is running
+        """
+        if budget is None:
+            budget = self.budget()
+            run = budget.run
+        else:
+            run = _await
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await run(func())
+            except Exception as error:
+                error_class = classify_error(error)
+                if attempt >= self.max_attempts or not self.should_retry(
+                    error_class, idempotent
+                ):
+                    raise
+                delay = self.next_delay(delay)
+                if error_class == THROTTLED:
+                    retry_after = parse_retry_after(
+                        error.response.headers.get("Retry-After")
+                    )
+                    delay = max(delay, retry_after or 0.0)
+                if delay >= budget.remaining():
+                    raise
+                if on_retry is not None:
+                    on_retry(attempt, error, delay)
+                await budget.run(self._sleep(delay))
@@ -3,30 +3,61 @@
 import argparse
 import os
 import sys
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
-from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
 from heygen_mcp.api_client import (
+    DEFAULT_PAGE_SIZE,
+    BatchVideoJob,
     Character,
     Dimension,
     HeyGenApiClient,
     MCPAvatarGroupResponse,
+    MCPAvatarListResponse,
     MCPAvatarsInGroupResponse,
+    MCPBatchVideoGenerateResponse,
     MCPGetCreditsResponse,
     MCPVideoGenerateResponse,
     MCPVideoStatusResponse,
     MCPVoicesResponse,
+    MCPWaitForVideosResponse,
+    TransportConfig,
     VideoGenerateRequest,
     VideoInput,
     Voice,
 )
 
-# Load environment variables
-load_dotenv()
+
+def load_environment():
+    """Load variables from a .env file without overriding the environment.
+
+    Called when the server starts rather than at import time, so importing this
+    module stays free of file system lookups.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Resume renders left unfinished in the job journal when the server starts."""
+    load_environment()
+    if os.getenv("HEYGEN_JOB_STORE") and os.getenv("HEYGEN_API_KEY"):
+        try:
+            client = await get_api_client()
+            resumed = await client.resume_pending_jobs()
+            if resumed:
+                print(f"Resumed {len(resumed)} unfinished video(s).", file=sys.stderr)
+        except Exception as e:
+            print(f"Could not resume jobs: {e}", file=sys.stderr)
+    yield {}
+
 
 # Create MCP server instance
-mcp = FastMCP("HeyGen MCP")
+mcp = FastMCP("HeyGen MCP", lifespan=lifespan)
 api_client = None
 
 
@@ -46,10 +77,55 @@ async def get_api_client() -> HeyGenApiClient:
         raise ValueError("HEYGEN_API_KEY environment variable not set.")
 
     # Create and store the client
-    api_client = HeyGenApiClient(api_key)
+    api_client = HeyGenApiClient(
+        api_key,
+        transport=TransportConfig.from_env(),
+        webhooks=await start_webhook_receiver(),
+        job_store=open_job_store(),
+    )
     return api_client
 
 
+def open_job_store():
+    """Open the job journal if HEYGEN_JOB_STORE is set."""
+    path = os.getenv("HEYGEN_JOB_STORE")
+    if not path:
+        return None
+
+    from heygen_mcp.job_store import JobStore
+
+    return JobStore(path, source="mcp")
+
+
+async def start_webhook_receiver():
+    """Start the completion webhook receiver if HEYGEN_WEBHOOK_PORT is set.
+
+    Returns None, so videos are polled, when the receiver cannot be started,
+    e.g. because another session already listens on the port.
+    """
+    port = os.getenv("HEYGEN_WEBHOOK_PORT")
+    if not port:
+        return None
+
+    from heygen_mcp.webhooks import DEFAULT_WEBHOOK_PATH, WebhookReceiver
+
+    receiver = WebhookReceiver(
+        secret=os.getenv("HEYGEN_WEBHOOK_SECRET") or None,
+        path=os.getenv("HEYGEN_WEBHOOK_PATH") or DEFAULT_WEBHOOK_PATH,
+    )
+    host = os.getenv("HEYGEN_WEBHOOK_HOST") or "127.0.0.1"
+    try:
+        await receiver.start(host=host, port=int(port))
+    except OSError as e:
+        print(
+            f"Webhook receiver not started on {host}:{port} ({e}); "
+            "falling back to polling.",
+            file=sys.stderr,
+        )
+        return None
+    return receiver
+
+
 ########################
 # MCP Tool Definitions #
 ########################
@@ -71,15 +147,26 @@ async def get_remaining_credits() -> MCPGetCreditsResponse:
 @mcp.tool(
     name="get_voices",
     description=(
-        "Retrieves a list of available voices from the HeyGen API. Results truncated "
-        "to first 100 voices. Private voices generally will returned 1st."
+        "Retrieves a page of available voices from the HeyGen API (100 per page by "
+        "default). Private voices generally will returned 1st. Filter by language, "
+        "gender or emotion_support, and pass fields (e.g. ['voice_id', 'name']) to "
+        "return only those fields. Use next_offset as offset to get the next page."
     ),
 )
-async def get_voices() -> MCPVoicesResponse:
-    """Get the list of available voices via HeyGen API."""
+async def get_voices(
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    language: Optional[str] = None,
+    gender: Optional[str] = None,
+    emotion_support: Optional[bool] = None,
+    fields: Optional[List[str]] = None,
+) -> MCPVoicesResponse:
+    """Get a page of available voices via HeyGen API."""
     try:
         client = await get_api_client()
-        return await client.get_voices()
+        return await client.get_voices(
+            offset, limit, language, gender, emotion_support, fields
+        )
     except Exception as e:
         return MCPVoicesResponse(error=str(e))
 
@@ -90,31 +177,173 @@ async def get_voices() -> MCPVoicesResponse:
         "Retrieves a list of HeyGen avatar groups. By default, only private avatar "
         "groups are returned, unless include_public is set to true. Avatar groups "
         "are collections of avatars, avatar group ids cannot be used to generate "
-        "videos."
+        "videos. Returns 100 groups per page by default; use next_offset as offset "
+        "for the next page and fields to return only some fields."
     ),
 )
-async def get_avatar_groups(include_public: bool = False) -> MCPAvatarGroupResponse:
+async def get_avatar_groups(
+    include_public: bool = False,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+) -> MCPAvatarGroupResponse:
     """List avatar groups via HeyGen API v2/avatar_group.list endpoint."""
     try:
         client = await get_api_client()
-        return await client.list_avatar_groups(include_public)
+        return await client.list_avatar_groups(include_public, offset, limit, fields)
     except Exception as e:
         return MCPAvatarGroupResponse(error=str(e))
 
 
 @mcp.tool(
     name="get_avatars_in_avatar_group",
-    description="Retrieves a list of avatars in a specific HeyGen avatar group.",
+    description=(
+        "Retrieves a page of avatars in a specific HeyGen avatar group (100 per "
+        "page by default). Filter by gender or premium, and pass fields (e.g. "
+        "['avatar_id', 'avatar_name']) to return only those fields. Use "
+        "next_offset as offset to get the next page."
+    ),
 )
-async def get_avatars_in_avatar_group(group_id: str) -> MCPAvatarsInGroupResponse:
+async def get_avatars_in_avatar_group(
+    group_id: str,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    gender: Optional[str] = None,
+    premium: Optional[bool] = None,
+    fields: Optional[List[str]] = None,
+) -> MCPAvatarsInGroupResponse:
     """List avatars in a specific HeyGen avatar group via HeyGen API."""
     try:
         client = await get_api_client()
-        return await client.get_avatars_in_group(group_id)
+        return await client.get_avatars_in_group(
+            group_id, offset, limit, gender, premium, fields
+        )
     except Exception as e:
         return MCPAvatarsInGroupResponse(error=str(e))
 
 
+@mcp.tool(
+    name="list_all_avatars",
+    description=(
+        "Retrieves the avatars of every HeyGen avatar group in one call, instead of "
+        "calling get_avatars_in_avatar_group once per group. Groups are fetched "
+        "concurrently and progress notifications are sent as each group finishes. "
+        "Avatars listed in several groups are returned once. By default only "
+        "private groups are included, unless include_public is set to true. "
+        "Returns 100 avatars per page by default; use next_offset as offset for "
+        "the next page and fields to return only some fields. failed_groups lists "
+        "groups that could not be fetched."
+    ),
+)
+async def list_all_avatars(
+    ctx: Context,
+    include_public: bool = False,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+) -> MCPAvatarListResponse:
+    """List the avatars of every avatar group via concurrent HeyGen API calls."""
+    try:
+        client = await get_api_client()
+
+        async def report(done: int, total: int, group_id: str, avatars: list):
+            await ctx.report_progress(
+                done, total, f"Group {group_id}: {len(avatars)} new avatars"
+            )
+
+        return await client.list_all_avatars(
+            include_public, offset, limit, fields, on_group=report
+        )
+    except Exception as e:
+        return MCPAvatarListResponse(error=str(e))
+
+
+@mcp.tool(
+    name="search_voices",
+    description=(
+        "Searches available voices by name and attributes. Every word of query must "
+        "match the start of a word in the voice name (case-insensitive); language, "
+        "gender and emotion_support narrow the results further. Results are paged "
+        "like get_voices and fields limits the returned fields."
+    ),
+)
+async def search_voices(
+    query: Optional[str] = None,
+    language: Optional[str] = None,
+    gender: Optional[str] = None,
+    emotion_support: Optional[bool] = None,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+) -> MCPVoicesResponse:
+    """Search voices using the client's in-memory voice index."""
+    try:
+        client = await get_api_client()
+        return await client.search_voices(
+            query, language, gender, emotion_support, offset, limit, fields
+        )
+    except Exception as e:
+        return MCPVoicesResponse(error=str(e))
+
+
+@mcp.tool(
+    name="search_avatars",
+    description=(
+        "Searches avatars by name and attributes across all avatar groups, or in a "
+        "single group when group_id is set. Every word of query must match the "
+        "start of a word in the avatar name (case-insensitive); gender, avatar_type, "
+        "tags (any of) and premium narrow the results further. Public groups are "
+        "searched only when include_public is true. Results are paged and fields "
+        "limits the returned fields."
+    ),
+)
+async def search_avatars(
+    query: Optional[str] = None,
+    gender: Optional[str] = None,
+    avatar_type: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    premium: Optional[bool] = None,
+    group_id: Optional[str] = None,
+    include_public: bool = False,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[List[str]] = None,
+) -> MCPAvatarListResponse:
+    """Search avatars using the client's in-memory avatar indexes."""
+    try:
+        client = await get_api_client()
+        return await client.search_avatars(
+            query,
+            gender,
+            avatar_type,
+            tags,
+            premium,
+            group_id,
+            include_public,
+            offset,
+            limit,
+            fields,
+        )
+    except Exception as e:
+        return MCPAvatarListResponse(error=str(e))
+
+
+def build_video_request(
+    avatar_id: str, input_text: str, voice_id: str, title: str = ""
+) -> VideoGenerateRequest:
+    """Create a single-scene video request with default values."""
+    return VideoGenerateRequest(
+        title=title,
+        video_inputs=[
+            VideoInput(
+                character=Character(avatar_id=avatar_id),
+                voice=Voice(input_text=input_text, voice_id=voice_id),
+            )
+        ],
+        dimension=Dimension(width=1280, height=720),
+    )
+
+
 @mcp.tool(
     name="generate_avatar_video",
     description="Generates a new avatar video via the HeyGen API.",
@@ -124,17 +353,7 @@ async def generate_avatar_video(
 ) -> MCPVideoGenerateResponse:
     """Generate a new avatar video using the HeyGen API."""
     try:
-        # Create the request object with default values
-        request = VideoGenerateRequest(
-            title=title,
-            video_inputs=[
-                VideoInput(
-                    character=Character(avatar_id=avatar_id),
-                    voice=Voice(input_text=input_text, voice_id=voice_id),
-                )
-            ],
-            dimension=Dimension(width=1280, height=720),
-        )
+        request = build_video_request(avatar_id, input_text, voice_id, title)
 
         client = await get_api_client()
         return await client.generate_avatar_video(request)
@@ -142,6 +361,31 @@ async def generate_avatar_video(
         return MCPVideoGenerateResponse(error=str(e))
 
 
+@mcp.tool(
+    name="generate_avatar_videos_batch",
+    description=(
+        "Generates several avatar videos in one call via the HeyGen API. Each job "
+        "takes an avatar_id, input_text, voice_id and optional title. Returns a "
+        "video id or an error for every job, in input order; a failed job does not "
+        "stop the others. max_concurrency limits simultaneous submissions."
+    ),
+)
+async def generate_avatar_videos_batch(
+    jobs: list[BatchVideoJob], max_concurrency: int = 5
+) -> MCPBatchVideoGenerateResponse:
+    """Generate a batch of avatar videos using the HeyGen API."""
+    try:
+        requests = [
+            build_video_request(job.avatar_id, job.input_text, job.voice_id, job.title)
+            for job in jobs
+        ]
+
+        client = await get_api_client()
+        return await client.generate_avatar_videos_batch(requests, max_concurrency)
+    except Exception as e:
+        return MCPBatchVideoGenerateResponse(error=str(e))
+
+
 @mcp.tool(
     name="get_avatar_video_status",
     description=(
@@ -160,6 +404,39 @@ async def get_avatar_video_status(video_id: str) -> MCPVideoStatusResponse:
         return MCPVideoStatusResponse(error=str(e))
 
 
+@mcp.tool(
+    name="wait_for_videos",
+    description=(
+        "Waits inside the server until the given HeyGen videos are completed or "
+        "failed, or until timeout_seconds passes. Status is polled with a backoff "
+        "that grows with render time, and progress notifications are sent while "
+        "waiting. Returns the final status of each video and the ids still "
+        "pending if the timeout was reached; call again to keep waiting. Videos "
+        "whose status cannot be retrieved (e.g. an unknown id) are listed in "
+        "unavailable, with the error on their entry in videos."
+    ),
+)
+async def wait_for_videos(
+    video_ids: list[str], ctx: Context, timeout_seconds: int = 600
+) -> MCPWaitForVideosResponse:
+    """Wait for several videos to finish rendering via the HeyGen API."""
+    try:
+        client = await get_api_client()
+        last_seen: dict[str, str] = {}
+
+        async def report(done: int, total: int, status: MCPVideoStatusResponse):
+            await ctx.report_progress(done, total)
+            if status.status and last_seen.get(status.video_id) != status.status:
+                last_seen[status.video_id] = status.status
+                await ctx.info(f"Video {status.video_id}: {status.status}")
+
+        return await client.wait_for_videos(
+            video_ids, timeout=timeout_seconds, on_progress=report
+        )
+    except Exception as e:
+        return MCPWaitForVideosResponse(error=str(e))
+
+
 def parse_args():
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(description="HeyGen MCP Server")
@@ -180,17 +457,165 @@ def parse_args():
         action="store_true",
         help="Enable auto-reload for development.",
     )
+
+    transport = parser.add_argument_group(
+        "HTTP transport",
+        "Connection pool and timeout settings for calls to the HeyGen API. Each "
+        "option can also be set with the HEYGEN_HTTP_* environment variable shown.",
+    )
+    transport.add_argument(
+        "--max-connections",
+        type=int,
+        help="Maximum number of concurrent connections (HEYGEN_HTTP_MAX_CONNECTIONS).",
+    )
+    transport.add_argument(
+        "--max-keepalive-connections",
+        type=int,
+        help=(
+            "Maximum number of idle keep-alive connections to retain "
+            "(HEYGEN_HTTP_MAX_KEEPALIVE_CONNECTIONS)."
+        ),
+    )
+    transport.add_argument(
+        "--keepalive-expiry",
+        type=float,
+        help=(
+            "Seconds an idle keep-alive connection is kept open "
+            "(HEYGEN_HTTP_KEEPALIVE_EXPIRY)."
+        ),
+    )
+    transport.add_argument(
+        "--http2",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=(
+            "Use HTTP/2 when the h2 package is installed, enabled by default "
+            "(HEYGEN_HTTP_HTTP2)."
+        ),
+    )
+    for phase in ("connect", "read", "write", "pool"):
+        transport.add_argument(
+            f"--{phase}-timeout",
+            type=float,
+            help=f"{phase.capitalize()} timeout in seconds "
+            f"(HEYGEN_HTTP_{phase.upper()}_TIMEOUT).",
+        )
+
+    webhooks = parser.add_argument_group(
+        "Completion webhooks",
+        "Optional HTTP endpoint that receives HeyGen avatar_video.success/fail "
+        "events, so wait_for_videos does not have to poll. Register the public URL "
+        "of this endpoint with HeyGen.",
+    )
+    webhooks.add_argument(
+        "--webhook-port",
+        type=int,
+        help="Port for the webhook receiver; disabled if unset (HEYGEN_WEBHOOK_PORT).",
+    )
+    webhooks.add_argument(
+        "--webhook-host",
+        help="Host to bind the webhook receiver to (HEYGEN_WEBHOOK_HOST).",
+    )
+    webhooks.add_argument(
+        "--webhook-path",
+        help="URL path of the webhook endpoint (HEYGEN_WEBHOOK_PATH).",
+    )
+    webhooks.add_argument(
+        "--webhook-secret",
+        help="Endpoint secret used to verify signatures (HEYGEN_WEBHOOK_SECRET).",
+    )
+
+    rate_limit = parser.add_argument_group(
+        "Rate limiting",
+        "Client-side token bucket per API key and endpoint. Requests wait for a "
+        "slot instead of failing, and 429 responses slow the bucket down.",
+    )
+    rate_limit.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Requests per second per key and endpoint, 0 to disable "
+        "(HEYGEN_RATE_LIMIT).",
+    )
+    rate_limit.add_argument(
+        "--rate-burst",
+        type=int,
+        help="Requests allowed back to back after a quiet period (HEYGEN_RATE_BURST).",
+    )
+
+    retries = parser.add_argument_group(
+        "Retries",
+        "Connection errors, timeouts, 429 and 5xx responses are retried with "
+        "jittered exponential backoff within a total time budget.",
+    )
+    retries.add_argument(
+        "--retry-attempts",
+        type=int,
+        help="Total attempts per request, including the first "
+        "(HEYGEN_RETRY_MAX_ATTEMPTS).",
+    )
+    retries.add_argument(
+        "--retry-deadline",
+        type=float,
+        help="Seconds all attempts of one request may take (HEYGEN_RETRY_DEADLINE).",
+    )
+    parser.add_argument(
+        "--job-store",
+        help=(
+            "SQLite file journaling submitted videos, so unfinished renders are "
+            "resumed after a restart (HEYGEN_JOB_STORE)."
+        ),
+    )
     return parser.parse_args()
 
 
+def apply_transport_args(args) -> None:
+    """Export transport-related CLI arguments as HEYGEN_HTTP_* variables."""
+    for name in TransportConfig.model_fields:
+        value = getattr(args, name, None)
+        if value is not None:
+            os.environ[f"HEYGEN_HTTP_{name.upper()}"] = str(value).lower()
+
+
+def apply_webhook_args(args) -> None:
+    """Export webhook-related CLI arguments as HEYGEN_WEBHOOK_* variables."""
+    for name in ("port", "host", "path", "secret"):
+        value = getattr(args, f"webhook_{name}", None)
+        if value is not None:
+            os.environ[f"HEYGEN_WEBHOOK_{name.upper()}"] = str(value)
+
+
+def apply_rate_limit_args(args) -> None:
+    """Export rate limit CLI arguments as HEYGEN_RATE_* variables."""
+    if args.rate_limit is not None:
+        os.environ["HEYGEN_RATE_LIMIT"] = str(args.rate_limit)
+    if args.rate_burst is not None:
+        os.environ["HEYGEN_RATE_BURST"] = str(args.rate_burst)
+
+
+def apply_retry_args(args) -> None:
+    """Export retry CLI arguments as HEYGEN_RETRY_* variables."""
+    if args.retry_attempts is not None:
+        os.environ["HEYGEN_RETRY_MAX_ATTEMPTS"] = str(args.retry_attempts)
+    if args.retry_deadline is not None:
+        os.environ["HEYGEN_RETRY_DEADLINE"] = str(args.retry_deadline)
+
+
 def main():
     """Run the MCP server."""
+    load_environment()
     args = parse_args()
 
     # Check if API key is provided or in environment
     if args.api_key:
         os.environ["HEYGEN_API_KEY"] = args.api_key
 
+    apply_transport_args(args)
+    apply_webhook_args(args)
+    apply_rate_limit_args(args)
+    apply_retry_args(args)
+    if args.job_store:
+        os.environ["HEYGEN_JOB_STORE"] = args.job_store
+
     # Verify API key is set
     if not os.getenv("HEYGEN_API_KEY"):
         print("ERROR: HeyGen API key not provided.")
@@ -0,0 +1,249 @@
+"""Embedded receiver for HeyGen video completion webhooks."""
+
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import json
+import socket
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from heygen_mcp.api_client import MCPVideoStatusResponse
+
+DEFAULT_WEBHOOK_PATH = "/webhooks/heygen"
+
+# HeyGen event types and the video status they represent
+VIDEO_EVENT_STATUSES = {
+    "avatar_video.success": "completed",
+    "avatar_video.fail": "failed",
+}
+
+
+def build_video_event(
+    video_id: str,
+    success: bool = True,
+    url: Optional[str] = None,
+    callback_id: Optional[str] = None,
+    message: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build a webhook payload shaped like the ones HeyGen sends.
+
+    Useful for a local fake that posts events to the receiver.
+    """
+    event_data: Dict[str, Any] = {"video_id": video_id, "callback_id": callback_id}
+    if success:
+        event_data["url"] = url
+    else:
+        event_data["msg"] = message
+    return {
+        "event_type": "avatar_video.success" if success else "avatar_video.fail",
+        "event_data": event_data,
+    }
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """Return the hex HMAC-SHA256 signature HeyGen sends in the Signature header."""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class WebhookReceiver:
+    """Collects video completion events and resolves tasks waiting on them.
+
+    Events are indexed by video id and by callback id, and the most recent ones
+    are kept so that an event arriving before anyone waits is not lost. The
+    receiver is exposed as a Starlette app, which ``start`` serves with uvicorn
+    next to the MCP server. It can also be driven directly via ``handle_event``
+    or through ``httpx.ASGITransport(app=receiver.asgi_app())``.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        path: str = DEFAULT_WEBHOOK_PATH,
+        max_events: int = 10_000,
+    ):
+        """Initialize the receiver.
+
+        Args:
+            secret: Webhook endpoint secret. If set, requests must carry a valid
+                Signature header.
+            path: URL path the endpoint is served on
+            max_events: Number of recent events kept for late waiters
+        """
+        self.secret = secret
+        self.path = path
+        self.max_events = max_events
+        self._events: "OrderedDict[str, MCPVideoStatusResponse]" = OrderedDict()
+        self._waiters: List[tuple[frozenset, asyncio.Future]] = []
+        self._server = None
+        self._server_task: Optional[asyncio.Task] = None
+
+    def verify_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        """Check the Signature header against the configured secret."""
+        if not self.secret:
+            return True
+        if not signature:
+            return False
+        return hmac.compare_digest(sign_payload(body, self.secret), signature)
+
+    def get(self, key: str) -> Optional[MCPVideoStatusResponse]:
+        """Return the received result for a video id or callback id, if any."""
+        return self._events.get(key)
+
+    def handle_event(self, payload: Dict[str, Any]) -> Optional[MCPVideoStatusResponse]:
+        """Record a webhook payload and wake up matching waiters.
+
+        Args:
+            payload: The decoded JSON body of a HeyGen webhook request
+
+        Returns:
+            The video status carried by the event, or None for event types that
+            are not about video completion
+        """
+        status = VIDEO_EVENT_STATUSES.get(payload.get("event_type"))
+        event_data = payload.get("event_data") or {}
+        video_id = event_data.get("video_id")
+        if status is None or not video_id:
+            return None
+
+        error_details = None
+        if status == "failed":
+            error_details = {"message": event_data.get("msg")}
+        result = MCPVideoStatusResponse(
+            video_id=video_id,
+            status=status,
+            video_url=event_data.get("url"),
+            gif_url=event_data.get("gif_download_url"),
+            error_details=error_details,
+        )
+
+        keys = {video_id}
+        if event_data.get("callback_id"):
+            keys.add(event_data["callback_id"])
+        for key in keys:
+            self._events[key] = result
+            self._events.move_to_end(key)
+        while len(self._events) > self.max_events:
+            self._events.popitem(last=False)
+
+        for waiting_keys, future in self._waiters:
+            if not future.done() and waiting_keys & keys:
+                future.set_result(result)
+        return result
+
+    async def wait_any(
+        self, keys: Iterable[str], timeout: Optional[float]
+    ) -> Optional[MCPVideoStatusResponse]:
+        """Wait until an event arrives for any of the given ids.
+
+        Args:
+            keys: Video ids or callback ids to wait for
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The first matching result, or None if the timeout passed
+        """
+        keys = frozenset(keys)
+        for key in keys:
+            if key in self._events:
+                return self._events[key]
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (keys, future)
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters.remove(waiter)
+
+    def asgi_app(self):
+        """Return a Starlette app serving the webhook endpoint."""
+        from starlette.applications import Starlette
+        from starlette.requests import Request
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+
+        async def receive(request: Request):
+            body = await request.body()
+            if not self.verify_signature(body, request.headers.get("signature")):
+                return JSONResponse({"error": "invalid signature"}, status_code=401)
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return JSONResponse({"error": "invalid JSON"}, status_code=400)
+            if not isinstance(payload, dict):
+                return JSONResponse({"error": "invalid payload"}, status_code=400)
+            result = self.handle_event(payload)
+            return JSONResponse({"ok": True, "matched": result is not None})
+
+        return Starlette(routes=[Route(self.path, receive, methods=["POST"])])
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 8080, timeout: float = 10.0
+    ) -> None:
+        """Serve the webhook endpoint in the background of the running loop.
+
+        The socket is bound here, so a port that is already in use fails this
+        call instead of the background task. Returns once uvicorn is serving.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            timeout: Seconds to wait for the server to start
+
+        Raises:
+            OSError: If the port cannot be bound or the server did not start
+        """
+        import uvicorn
+
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((host, port))
+        except OSError:
+            sock.close()
+            raise
+
+        config = uvicorn.Config(
+            self.asgi_app(), host=host, port=port, log_level="warning"
+        )
+        server = uvicorn.Server(config)
+        # The MCP server owns signal handling for the process
+        server.install_signal_handlers = lambda: None  # uvicorn < 0.29
+        server.capture_signals = contextlib.nullcontext  # uvicorn >= 0.29
+
+        async def serve():
+            try:
+                await server.serve(sockets=[sock])
+            except SystemExit as exc:
+                # uvicorn exits the process on startup errors; keep it contained
+                raise OSError(f"Webhook server exited with code {exc.code}") from None
+            finally:
+                sock.close()
+
+        task = asyncio.create_task(serve())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not server.started and not task.done():
+            if loop.time() >= deadline:
+                server.should_exit = True
+                await asyncio.gather(task, return_exceptions=True)
+                raise OSError(f"Webhook server did not start within {timeout} s")
+            await asyncio.sleep(0.01)
+        if not server.started:
+            error = task.exception()
+            raise error or OSError("Webhook server stopped during startup")
+        self._server = server
+        self._server_task = task
+
+    async def stop(self) -> None:
+        """Stop the background HTTP server, if running."""
+        if self._server is not None and self._server_task is not None:
+            self._server.should_exit = True
+            await self._server_task
+            self._server = None
+            self._server_task = None
@@ -1,6 +1,7 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
+import httpx
 import requests
 import threading
 import time
@@ -8,12 +9,18 @@ import json
 import os
 import traceback
 from urllib.parse import urlparse
-from customtkinter import CTkScrollableFrame # Import specific class
 from datetime import datetime # Import datetime
 
 # Import new modules
+import asset_cache
+import avatar_catalog
+import avatar_index
 import config_manager
 import heygen_api
+import heygen_api_async
+import job_engine
+import log_sink
+from heygen_mcp import job_store
 
 # Placeholder for API interaction functions
 def check_heygen_credit(api_key):
@@ -67,6 +74,186 @@ def download_video(video_url, output_path, log_callback):
         log_callback(f"Lỗi không xác định khi tải video: {e}")
         messagebox.showerror("Lỗi", f"Đã xảy ra lỗi không mong muốn: {e}")
 
+LOG_DRAIN_INTERVAL_MS = 100 # Chu kỳ main loop lấy log từ hàng đợi
+LOG_DRAIN_BATCH = 500       # Số dòng tối đa chèn vào textbox mỗi lần
+LOG_MAX_LINES = 5000        # Textbox chỉ giữ ngần này dòng cuối (ring buffer)
+AVATAR_FILTER_DELAY_MS = 150 # Chờ sau phím cuối trước khi lọc avatar
+AVATAR_RESULT_LIMIT = avatar_index.DEFAULT_RESULT_LIMIT
+
+# --- Virtualized Video List ---
+class VirtualVideoList(ctk.CTkFrame):
+    """
+    Danh sách video ảo hoá: chỉ tạo widget cho số dòng vừa khung nhìn.
+
+    Các dòng (frame, 2 label, nút tải) được tạo một lần rồi dùng lại khi cuộn,
+    chỉ đổi nội dung. set_items/update_item chỉ cấu hình lại những dòng đang
+    hiển thị có dữ liệu thay đổi, nên danh sách hàng chục nghìn video vẫn mượt.
+    """
+
+    ROW_HEIGHT = 52  # Chiều cao mỗi dòng (px), dùng để tính số dòng hiển thị
+    WHEEL_STEP = 3   # Số dòng cuộn mỗi nấc chuột
+
+    def __init__(self, master, on_download, height=200, **kwargs):
+        super().__init__(master, height=height, **kwargs)
+        self._on_download = on_download  # on_download(video_id)
+        self._items = []      # Danh sách video (dict) theo thứ tự hiển thị
+        self._positions = {}  # video_id -> vị trí trong _items
+        self._top = 0         # Vị trí của video ở dòng đầu khung nhìn
+        self._rows = []       # Pool các dòng widget đã tạo
+        self._visible_count = 0
+
+        # Kích thước do layout cha quyết định, không phụ thuộc số dòng bên trong
+        self.grid_propagate(False)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self._body = ctk.CTkFrame(self, fg_color="transparent")
+        self._body.grid(row=0, column=0, sticky="nsew", padx=(5, 0), pady=5)
+        self._body.grid_propagate(False)
+        self._body.grid_columnconfigure(0, weight=1)
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=0, column=1, sticky="ns", padx=2, pady=5)
+        self._message = ctk.CTkLabel(self._body, text="", wraplength=350)
+
+        self._body.bind("<Configure>", self._on_resize)
+        # add="+" để không ghi đè binding của các CTkScrollableFrame khác
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind_all(sequence, self._on_mousewheel, add="+")
+
+    # --- Dữ liệu ---
+    def set_items(self, videos):
+        """Thay danh sách video; chỉ các dòng hiển thị có thay đổi được vẽ lại."""
+        anchor_id = None
+        if self._top > 0 and self._top < len(self._items):
+            anchor_id = self._items[self._top].get('video_id')
+        self._items = list(videos)
+        self._positions = {v.get('video_id'): i for i, v in enumerate(self._items)}
+        # Giữ nguyên video đang ở đầu khung nhìn khi có video mới chèn phía trên
+        if anchor_id in self._positions:
+            self._top = self._positions[anchor_id]
+        self._message.grid_remove()
+        if not self._items:
+            self._show_message("(Không có video nào được tìm thấy)", None)
+            return
+        self._scroll_to(self._top)
+
+    def update_item(self, video):
+        """Cập nhật một video đã có (vd. đổi trạng thái); trả về False nếu chưa có."""
+        position = self._positions.get(video.get('video_id'))
+        if position is None:
+            return False
+        self._items[position] = video
+        if self._top <= position < self._top + self._visible_count:
+            self._bind_row(self._rows[position - self._top], video)
+        return True
+
+    def show_error(self, error_message):
+        self._items = []
+        self._positions = {}
+        self._top = 0
+        self._show_message(f"Lỗi tải danh sách: {error_message}", "red")
+
+    def __len__(self):
+        return len(self._items)
+
+    # --- Hiển thị ---
+    def _show_message(self, text, color):
+        for row in self._rows:
+            row['frame'].grid_remove()
+            row['key'] = None
+        self._message.configure(text=text, text_color=color or ("gray10", "gray90"))
+        self._message.grid(row=0, column=0, pady=10, padx=10)
+        self._scrollbar.set(0.0, 1.0)
+
+    def _create_row(self):
+        frame = ctk.CTkFrame(self._body, height=self.ROW_HEIGHT - 6)
+        frame.grid_columnconfigure(0, weight=1) # ID and Date
+        frame.grid_columnconfigure(1, weight=0) # Status
+        frame.grid_columnconfigure(2, weight=0) # Download Button
+        info_label = ctk.CTkLabel(frame, text="", justify="left", anchor="w")
+        info_label.grid(row=0, column=0, padx=5, pady=2, sticky="w")
+        status_label = ctk.CTkLabel(frame, text="")
+        status_label.grid(row=0, column=1, padx=5, pady=2, sticky="e")
+        row = {'frame': frame, 'info': info_label, 'status': status_label, 'key': None, 'video_id': None}
+        # Nút đọc video_id đang gắn với dòng tại thời điểm bấm, vì dòng được dùng lại
+        row['button'] = ctk.CTkButton(frame, text="Tải xuống", width=80,
+                                      command=lambda r=row: r['video_id'] and self._on_download(r['video_id']))
+        row['button'].grid(row=0, column=2, padx=5, pady=2)
+        return row
+
+    def _bind_row(self, row, video_info):
+        """Gắn dữ liệu video vào một dòng; bỏ qua nếu dòng đã hiển thị đúng dữ liệu này."""
+        video_id = video_info.get('video_id', 'N/A')
+        status = video_info.get('status', 'N/A')
+        created_timestamp = video_info.get('created_at', 0)
+        key = (video_id, status, created_timestamp)
+        if row['key'] == key:
+            return
+        try:
+            created_dt = datetime.fromtimestamp(created_timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError, OverflowError, OSError):
+            created_dt = "N/A"
+        status_color = "gray"
+        if status == "completed": status_color = "green"
+        elif status == "failed": status_color = "red"
+        elif status == "processing": status_color = "orange"
+        row['info'].configure(text=f"ID: {video_id}\nNgày tạo: {created_dt}")
+        row['status'].configure(text=f"Trạng thái: {status}", text_color=status_color)
+        row['button'].configure(state="normal" if status == "completed" else "disabled")
+        row['video_id'] = video_id
+        row['key'] = key
+
+    def _render(self):
+        """Gắn các video trong khung nhìn vào pool dòng và cập nhật thanh cuộn."""
+        if not self._items:
+            return
+        for i, row in enumerate(self._rows):
+            position = self._top + i
+            if i < self._visible_count and position < len(self._items):
+                self._bind_row(row, self._items[position])
+                row['frame'].grid(row=i, column=0, sticky="ew", padx=5, pady=3)
+            else:
+                row['frame'].grid_remove()
+                row['key'] = None
+                row['video_id'] = None
+        total = len(self._items)
+        self._scrollbar.set(self._top / total, min((self._top + self._visible_count) / total, 1.0))
+
+    def _scroll_to(self, top):
+        max_top = max(len(self._items) - self._visible_count, 0)
+        self._top = min(max(int(top), 0), max_top)
+        self._render()
+
+    def _on_resize(self, event):
+        visible_count = max(event.height // self.ROW_HEIGHT, 1)
+        if visible_count == self._visible_count:
+            return
+        while len(self._rows) < visible_count:
+            self._rows.append(self._create_row())
+        self._visible_count = visible_count
+        self._scroll_to(self._top)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(round(float(value) * len(self._items)))
+        elif action == "scroll":
+            step = 1 if float(value) > 0 else -1
+            if unit == "pages":
+                step *= self._visible_count
+            self._scroll_to(self._top + step)
+
+    def _on_mousewheel(self, event):
+        # bind_all nhận sự kiện của cả cửa sổ: chỉ xử lý khi con trỏ nằm trong danh sách
+        widget_path = str(event.widget)
+        if widget_path != str(self) and not widget_path.startswith(str(self) + "."):
+            return
+        if event.num == 4:
+            direction = -1
+        elif event.num == 5:
+            direction = 1
+        else:
+            direction = -1 if event.delta > 0 else 1
+        self._scroll_to(self._top + direction * self.WHEEL_STEP)
+
 # --- Main Application Class ---
 class HeyGenMultiCreatorApp(ctk.CTk):
     def __init__(self):
@@ -87,17 +274,43 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         ctk.set_appearance_mode("System")
         ctk.set_default_color_theme("blue")
 
+        # Log từ mọi thread đi qua hàng đợi; main loop chèn vào textbox theo lô
+        self.log_file = initial_config["log_file"]
+        self.log_sink = log_sink.LogSink(self.log_file or None)
+
         # Set other attributes from loaded config
         self.api_keys = initial_config["api_keys"]
         self.avatar_id = ctk.StringVar(value=initial_config["avatar_id"])
         self.output_dir = ctk.StringVar(value=initial_config["output_dir"])
         self.proxy_settings = initial_config["proxy"]
+        self.audio_asset_cache_ttl_hours = initial_config["audio_asset_cache_ttl_hours"]
+        # Phân phối job qua mọi API Key thay vì gắn Tab N với Key N
+        self.auto_balance_keys = ctk.BooleanVar(value=initial_config["auto_balance_keys"])
+        self._key_pool = None
+        self._key_pool_lock = threading.Lock()
+        # Cache asset audio theo nội dung file: cùng file + cùng tài khoản thì không upload lại
+        self.asset_cache = asset_cache.AudioAssetCache(ttl_seconds=float(self.audio_asset_cache_ttl_hours) * 3600)
         self.avatar_list_cache = None
+        # Catalog avatar (metadata, ETag) theo tài khoản; thay cho file JSON chỉ có ID
+        self.avatar_catalog = avatar_catalog.AvatarCatalog()
+        # Chỉ mục n-gram của avatar_list_cache, dựng lại mỗi khi danh sách thay đổi
+        self.avatar_index = None
+        self._avatar_filter_job = None # after() id của lần lọc đang chờ (debounce)
         self.current_video_jobs = {}
+        # Một bộ lập lịch duy nhất poll trạng thái cho mọi video đang xử lý
+        self.poll_scheduler = heygen_api.StatusPollScheduler()
+        # Mọi việc nền chạy trên một nhóm worker cố định, ưu tiên thao tác người dùng đang chờ
+        self.jobs = job_engine.JobEngine(
+            on_error=lambda name, e: self.log(f"Lỗi không mong muốn trong job {name}: {e}\n{traceback.format_exc()}"))
+        # Nhật ký job (SQLite) để không mất video đang render khi tắt ứng dụng
+        self.job_store = job_store.JobStore(job_store.DEFAULT_JOB_STORE_FILE, source="gui")
         # Add storage for credit labels
         self.api_key_credit_labels = [None] * 5
         # Add storage for video list widgets
         self.video_list_widgets = [None] * 5
+        # Index video đã tải theo tài khoản (fingerprint key) để làm mới tăng dần
+        self.video_indexes = {}
+        self._video_index_lock = threading.Lock()
 
         # Widget storage (initialize before creating tabs)
         self.proxy_entries = {}
@@ -126,6 +339,8 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         # Apply loaded config values to widgets AFTER they are created
         self._apply_loaded_config(initial_config)
         self.log("Ứng dụng đã sẵn sàng.")
+        self._log_drain_job = self.after(LOG_DRAIN_INTERVAL_MS, self._drain_log_queue)
+        self.after(500, self._resume_pending_jobs)
 
         # Bind window closing event to save config
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -141,15 +356,26 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         print(f"CONFIG_LOAD: {message}")
 
     def log(self, message):
-        # Ensure log_textbox is created before logging
-        if self.log_textbox:
-            # Thread-safe logging to the log text area
-            self.log_textbox.configure(state='normal')
-            self.log_textbox.insert(tk.END, f"{time.strftime('%H:%M:%S')} - {message}\n")
-            self.log_textbox.configure(state='disabled')
-            self.log_textbox.see(tk.END) # Scroll to the end
-        else:
-            print(f"LOG_EARLY: {message}") # Fallback if called too early
+        # Gọi được từ mọi thread: chỉ đưa vào hàng đợi, _drain_log_queue hiển thị sau
+        self.log_sink.emit(message)
+
+    def _drain_log_queue(self):
+        """Chèn các dòng log đang chờ vào textbox theo lô (main thread, chạy định kỳ)."""
+        try:
+            lines = self.log_sink.drain(LOG_DRAIN_BATCH)
+            if lines and self.log_textbox:
+                self.log_textbox.configure(state='normal')
+                self.log_textbox.insert(tk.END, "\n".join(lines) + "\n")
+                # Ring buffer: bỏ các dòng cũ nhất khi vượt LOG_MAX_LINES
+                line_count = int(self.log_textbox.index("end-1c").split(".")[0]) - 1
+                if line_count > LOG_MAX_LINES:
+                    self.log_textbox.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
+                self.log_textbox.configure(state='disabled')
+                self.log_textbox.see(tk.END) # Scroll to the end
+        finally:
+            # Còn dòng chờ thì lấy tiếp ngay ở vòng sau, không chờ hết chu kỳ
+            delay = 1 if len(self.log_sink) else LOG_DRAIN_INTERVAL_MS
+            self._log_drain_job = self.after(delay, self._drain_log_queue)
 
     def update_progress(self, tab_index, value):
         # Placeholder for updating progress bars on generation tabs
@@ -180,6 +406,10 @@ class HeyGenMultiCreatorApp(ctk.CTk):
                                          command=lambda idx=i: self._check_credit_for_key(idx))
             check_button.grid(row=i+1, column=2, padx=(5, 10), pady=5)
 
+        auto_balance_checkbox = ctk.CTkCheckBox(api_frame, text="Tự động phân phối job qua mọi API Key (theo quota, số job đang chạy và lỗi)",
+                                                variable=self.auto_balance_keys)
+        auto_balance_checkbox.grid(row=6, column=0, columnspan=3, padx=5, pady=(5, 10), sticky="w")
+
         # Avatar Section
         avatar_frame = ctk.CTkFrame(tab)
         avatar_frame.grid(row=1, column=0, columnspan=3, padx=10, pady=10, sticky="ew")
@@ -190,7 +420,7 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         ctk.CTkLabel(avatar_frame, text="Tìm kiếm ID:").grid(row=1, column=0, padx=5, pady=(10,0), sticky="w")
         self.avatar_search_entry = ctk.CTkEntry(avatar_frame, placeholder_text="Nhập để lọc ID...", width=350)
         self.avatar_search_entry.grid(row=1, column=1, padx=5, pady=(10,0), sticky="ew")
-        self.avatar_search_entry.bind("<KeyRelease>", self._filter_avatar_list)
+        self.avatar_search_entry.bind("<KeyRelease>", self._schedule_avatar_filter)
 
         # ComboBox để chọn ID
         ctk.CTkLabel(avatar_frame, text="Chọn Avatar ID:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
@@ -259,8 +489,19 @@ class HeyGenMultiCreatorApp(ctk.CTk):
     def _load_avatar_cache_on_startup(self):
         """Tries to load avatar list from cache file on startup."""
         self.log("Đang kiểm tra cache danh sách avatar...")
-        cached_list = config_manager.load_avatar_cache(self.log)
+        cached_list = None
+        api_key = next((key for key in self.api_keys if key), None)
+        if api_key:
+            account = asset_cache.account_fingerprint(api_key)
+            cached_list = self.avatar_catalog.ids(account) or None
+            if cached_list:
+                fetched_at = self.avatar_catalog.info(account)["fetched_at"]
+                self.log(f"Catalog avatar: {len(cached_list)} ID, cập nhật lúc {datetime.fromtimestamp(fetched_at):%Y-%m-%d %H:%M}.")
+        if cached_list is None:
+            # Chưa có catalog cho tài khoản này: dùng file cache ID cũ nếu có
+            cached_list = config_manager.load_avatar_cache(self.log)
         if cached_list is not None: # Kiểm tra None vì hàm trả về None nếu lỗi/không có file
+            self.avatar_index = avatar_index.AvatarSearchIndex(cached_list)
             self.avatar_list_cache = cached_list
             self.log("Đã sử dụng danh sách ID từ cache.")
             # Kích hoạt combobox và cập nhật hiển thị
@@ -279,6 +520,7 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         """Forces fetching the avatar list from API, ignoring cache."""
         self.log("Buộc cập nhật danh sách avatar từ API...")
         self.avatar_list_cache = None # Xóa cache trong bộ nhớ để load_avatars gọi API
+        self.avatar_index = None
         # Xóa nội dung ô search để hiển thị list đầy đủ sau khi cập nhật
         if self.avatar_search_entry: self.avatar_search_entry.delete(0, tk.END)
         self.load_avatars() # Gọi hàm load cũ, nó sẽ thấy cache là None và gọi API
@@ -307,22 +549,27 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         if self.avatar_search_entry: self.avatar_search_entry.configure(state="disabled")
 
         self.log("Bắt đầu luồng tải avatar API...")
-        thread = threading.Thread(target=self._fetch_avatar_list_thread_safe, args=(api_key_to_use,), daemon=True)
-        thread.start()
+        self.jobs.submit(self._fetch_avatar_list_thread_safe, api_key_to_use,
+                         priority=job_engine.PRIORITY_INTERACTIVE, name="load_avatars")
 
     def _fetch_avatar_list_thread_safe(self, api_key):
         """Wrapper to call API and handle exceptions for thread execution."""
         try:
             self.log(f"Thread API Key ...{api_key[-4:]}: Bắt đầu tải danh sách avatar...")
             proxies = self._get_current_proxies()
-            id_list = heygen_api.fetch_avatar_list(api_key, proxies)
+            # Request có điều kiện (ETag/Last-Modified); bản mới được gộp vào catalog như delta
+            stats = heygen_api.refresh_avatar_catalog(api_key, self.avatar_catalog, proxies)
+            id_list = self.avatar_catalog.ids(asset_cache.account_fingerprint(api_key))
+            if stats["not_modified"]:
+                self.log(f"Thread API Key ...{api_key[-4:]}: Catalog avatar không đổi so với lần tải trước.")
+            else:
+                self.log(f"Thread API Key ...{api_key[-4:]}: Catalog avatar: +{stats['added']} mới, "
+                         f"{stats['updated']} đổi, -{stats['removed']} bị xóa.")
+            # Dựng chỉ mục ngay trong thread này, không chặn giao diện
+            self.avatar_index = avatar_index.AvatarSearchIndex(id_list)
             self.avatar_list_cache = id_list # Cập nhật cache trong bộ nhớ
             self.log(f"Thread API Key ...{api_key[-4:]}: Tải thành công {len(id_list)} avatar ID.")
 
-            # --- Lưu cache vào file --- 
-            config_manager.save_avatar_cache(id_list, self.log)
-            # ---------------------------
-
             self.after(0, self._update_avatar_ui_after_fetch, None, True)
         except Exception as e:
             error_message = str(e)
@@ -350,19 +597,33 @@ class HeyGenMultiCreatorApp(ctk.CTk):
          elif success and not self.avatar_list_cache:
              self.log("API trả về danh sách avatar ID trống.")
 
+    def _schedule_avatar_filter(self, event=None):
+        """Debounce ô tìm kiếm: chỉ lọc khi người dùng ngừng gõ AVATAR_FILTER_DELAY_MS."""
+        if self._avatar_filter_job is not None:
+            self.after_cancel(self._avatar_filter_job)
+        self._avatar_filter_job = self.after(AVATAR_FILTER_DELAY_MS, self._filter_avatar_list)
+
     def _filter_avatar_list(self, event=None):
-        """Lọc danh sách ID trong ComboBox dựa trên ô tìm kiếm."""
+        """Lọc danh sách ID trong ComboBox dựa trên ô tìm kiếm (qua chỉ mục, tối đa AVATAR_RESULT_LIMIT ID)."""
+        self._avatar_filter_job = None
         if not self.avatar_list_cache or not self.avatar_combobox or not self.avatar_search_entry:
             return
+        if self.avatar_index is None:
+            self.avatar_index = avatar_index.AvatarSearchIndex(self.avatar_list_cache)
 
-        search_term = self.avatar_search_entry.get().lower()
-        filtered_ids = [id_val for id_val in self.avatar_list_cache if search_term in id_val.lower()] if search_term else self.avatar_list_cache
+        search_term = self.avatar_search_entry.get()
+        filtered_ids = self.avatar_index.search(search_term, limit=AVATAR_RESULT_LIMIT)
 
         # Xác định ID cần được chọn sau khi lọc
         current_id_from_var = self.avatar_id.get()
         id_to_select = ""
         if current_id_from_var in filtered_ids:
             id_to_select = current_id_from_var
+        elif current_id_from_var and self.avatar_index.matches(current_id_from_var, search_term) \
+                and current_id_from_var in self.avatar_list_cache:
+            # ID đang chọn vẫn khớp nhưng nằm ngoài giới hạn kết quả: giữ nó ở đầu danh sách
+            filtered_ids = [current_id_from_var] + filtered_ids[:AVATAR_RESULT_LIMIT - 1]
+            id_to_select = current_id_from_var
         elif filtered_ids:
             id_to_select = filtered_ids[0]
 
@@ -376,7 +637,6 @@ class HeyGenMultiCreatorApp(ctk.CTk):
 
         # 3. Đặt giá trị được chọn (nếu có)
         self.avatar_combobox.set(id_to_select)
-        self.log(f"_filter_avatar_list: Set combobox to '{id_to_select}'")
 
         # 4. Khôi phục command callback
         self.avatar_combobox.configure(command=original_command)
@@ -460,6 +720,9 @@ class HeyGenMultiCreatorApp(ctk.CTk):
                                         command=lambda idx=index: self.download_generated_video(idx))
         download_button.pack(side="left", padx=10, pady=5)
         tab_widgets['download_button'] = download_button # Keep track for auto-download enable
+        upload_status_label = ctk.CTkLabel(action_frame, text="", text_color="gray")
+        upload_status_label.pack(side="left", padx=10, pady=5)
+        tab_widgets['upload_status_label'] = upload_status_label
 
         # --- Row 3: Video List Actions ---         
         list_action_frame = ctk.CTkFrame(tab)
@@ -478,11 +741,11 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         
         ctk.CTkLabel(history_list_frame, text="Video đã tạo (từ API):", anchor="w").grid(row=0, column=0, sticky="ew", padx=5, pady=(0,2))
         
-        # Use CTkScrollableFrame to display the list
-        video_scrollable_list = CTkScrollableFrame(history_list_frame, label_text="") # Remove label here
+        # Virtualized list: only the visible rows exist as widgets
+        video_scrollable_list = VirtualVideoList(history_list_frame,
+                                                 on_download=lambda v_id, idx=index: self._download_listed_video(idx, v_id))
         video_scrollable_list.grid(row=1, column=0, sticky="nsew", padx=5, pady=0)
         tab_widgets['video_scrollable_list'] = video_scrollable_list
-        # We will add items (frames with labels/buttons) to this scrollable frame later
 
         # --- Row 5: Current Job Log (Optional - Keep for now) ---         
         log_frame = ctk.CTkFrame(tab)
@@ -524,7 +787,13 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         avatar = self.avatar_id.get()
         output = self.output_dir.get()
 
-        if not api_key:
+        if self.auto_balance_keys.get():
+            # api_key = None: thread sẽ chọn key tốt nhất từ ApiKeyPool
+            api_key = None
+            if not any(key for key in self.api_keys if key):
+                messagebox.showerror("Lỗi", "Vui lòng nhập ít nhất một API Key trong tab Cài đặt.")
+                return
+        elif not api_key:
             messagebox.showerror("Lỗi", f"Vui lòng nhập API Key {tab_index + 1} trong tab Cài đặt.")
             return
         
@@ -543,15 +812,13 @@ class HeyGenMultiCreatorApp(ctk.CTk):
             return
 
         self.log(f"Tab {tab_index+1}: Chuẩn bị tạo video với đầu vào: {audio_input}")
-        # Run generation and status polling in a separate thread
-        # Truyền trực tiếp audio_input (path hoặc URL) vào thread
-        thread = threading.Thread(target=self._generate_and_poll_video,
-                                  args=(tab_index, api_key, audio_input, avatar, output),
-                                  daemon=True)
-        thread.start()
+        # Run generation in the job engine; polling is handed to the shared scheduler
+        # Truyền trực tiếp audio_input (path hoặc URL) vào job
+        self.jobs.submit(self._generate_and_poll_video, tab_index, api_key, audio_input, avatar, output,
+                         priority=job_engine.PRIORITY_NORMAL, name=f"generate_tab{tab_index + 1}")
 
     def _generate_and_poll_video(self, tab_index, api_key, audio_input, avatar_id, output_dir):
-        """Thread function to generate and poll status of a video."""
+        """Thread function to generate a video, then hand it to the shared status poll scheduler."""
         video_id = None
         listbox_widget = self.tab_generation_widgets[tab_index].get('video_scrollable_list')
         
@@ -571,142 +838,53 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         try:
             self.log(f"Thread Tab {tab_index+1}: Bắt đầu xử lý tạo video...")
             proxies = self._get_current_proxies()
+            key_pool = self._get_key_pool() if api_key is None else None
             
-            # Thêm cơ chế thử lại cho phần tạo video
-            max_retries = 3  # Số lần thử lại tối đa
-            retry_count = 0
-            last_error = None
-            
-            # Thử gửi yêu cầu tạo video với cơ chế thử lại
-            while retry_count <= max_retries:
-                try:
-                    video_id = heygen_api.generate_heygen_video(api_key, audio_input, avatar_id, output_dir, proxies)
-                    self.log(f"Thread Tab {tab_index+1}: Đã gửi yêu cầu tạo video. Video ID: {video_id}")
-                    job_info = f"{video_id} - Audio: {display_name} - (Pending)"
-                    self.after(0, self._add_video_to_list, tab_index, job_info)
-                    break  # Nếu thành công, thoát khỏi vòng lặp retry
-                except requests.exceptions.Timeout as timeout_error:
-                    retry_count += 1
-                    last_error = timeout_error
-                    if retry_count <= max_retries:
-                        self.log(f"Thread Tab {tab_index+1}: Timeout khi gửi yêu cầu tạo video. Thử lại lần {retry_count}/{max_retries} sau 10 giây...")
-                        time.sleep(10)  # Chờ 10 giây trước khi thử lại
-                    else:
-                        self.log(f"Thread Tab {tab_index+1}: Đã thử lại {max_retries} lần nhưng vẫn bị timeout.")
-                        raise  # Re-raise lỗi sau khi đã thử lại đủ số lần
-                except Exception as e:
-                    # Đối với các lỗi khác, không thử lại
-                    self.log(f"Thread Tab {tab_index+1}: Lỗi khi gửi yêu cầu tạo video: {e}")
-                    raise
-            
-            if not video_id:
-                # Nếu vẫn không tạo được video_id sau khi thử lại
-                raise ValueError(f"Không thể tạo video sau {max_retries} lần thử: {last_error}")
-
-            poll_interval = 10
-            max_polls = 100 # Tăng từ 60 lên 100 để có timeout 1000 giây
-            poll_count = 0
-            result_video_url = None
-            max_retries = 3 # Số lần thử lại tối đa khi gặp lỗi timeout
-            retry_count = 0
-
-            while poll_count < max_polls:
-                poll_count += 1
-                try:
-                    status_data = heygen_api.check_video_status(api_key, video_id, proxies)
-                    # Reset retry_count khi request thành công
-                    retry_count = 0
-                    
-                    current_status = status_data.get("status")
-                    self.log(f"Thread Tab {tab_index+1}: Video {video_id} - Trạng thái: {current_status}")
-                    status_text = f" ({current_status})"
-                    if current_status == "failed":
-                        error_detail = status_data.get("error", {}).get("message", "Unknown error")
-                        status_text = f" (Thất bại: {error_detail})"
-                    elif current_status == "completed":
-                        result_video_url = status_data.get("video_url")
-                        status_text = " (Hoàn thành)"
-
-                    updated_job_info = f"{video_id} - Audio: {display_name} -{status_text}"
-                    self.log(f"Update ListBox (cần cải thiện): {updated_job_info}")
-
-                    if current_status == "completed":
-                        self.log(f"Thread Tab {tab_index+1}: Video {video_id} hoàn thành! URL: {result_video_url}")
-                        self.after(0, self._enable_download_button, tab_index, video_id, result_video_url)
-                        
-                        # --- Auto Download --- 
-                        if result_video_url:
-                            self.log(f"Thread Tab {tab_index+1}: Tự động tải video {video_id}...")
-                            
-                            # --- Construct filename based on audio_input ---                        
-                            try:
-                                base_name = ""
-                                if os.path.exists(audio_input) and not audio_input.startswith(('http://', 'https://')):
-                                    # It's a local file path
-                                    base_name = os.path.splitext(os.path.basename(audio_input))[0]
-                                elif audio_input.startswith(('http://', 'https://')):
-                                    # It's a URL, try to parse filename
-                                    parsed_path = os.path.basename(urlparse(audio_input).path)
-                                    base_name = os.path.splitext(parsed_path)[0]
-                                
-                                if not base_name:
-                                    # Fallback if parsing failed or name is empty
-                                    base_name = f"{video_id}_video"
-                                    
-                                download_filename_unsafe = f"{base_name}.mp4"
-                                # Ensure filename is safe
-                                download_filename = "".join(c for c in download_filename_unsafe if c.isalnum() or c in ('.', '-', '_')).rstrip()
-                                if not download_filename:
-                                    download_filename = f"{video_id}.mp4" # Final fallback
-                                    
-                            except Exception as name_ex:
-                                 self.log(f"Lỗi xử lý tên file cho video {video_id}: {name_ex}. Dùng ID.")
-                                 download_filename = f"{video_id}.mp4"
-                                 
-                            save_path = os.path.join(output_dir, download_filename)
-                            self.log(f"Thread Tab {tab_index+1}: Lưu về: {save_path}")
-                            try:
-                                success, message = heygen_api.download_video_file(result_video_url, save_path)
-                                if success:
-                                    self.log(f"Thread Tab {tab_index+1}: Tự động tải thành công: {message}")
-                                else:
-                                    self.log(f"Thread Tab {tab_index+1}: Lỗi tự động tải: {message}")
-                                    # Optionally inform user via main thread if auto-download fails
-                                    # self.after(0, messagebox.showwarning, f"Lỗi Tải Tự Động Tab {tab_index+1}", f"Không thể tự động tải video {video_id}:\n{message}")
-                            except Exception as dl_ex:
-                                self.log(f"Thread Tab {tab_index+1}: Lỗi nghiêm trọng khi tự động tải: {dl_ex}")
-                        # --------------------                    
-                        break
-                    elif current_status == "failed":
-                        self.log(f"Thread Tab {tab_index+1}: Video {video_id} thất bại.")
-                        break
-                except requests.exceptions.Timeout as timeout_error:
-                    retry_count += 1
-                    if retry_count <= max_retries:
-                        error_message = f"Thread Tab {tab_index+1}: Timeout khi kiểm tra trạng thái video {video_id}. Thử lại lần {retry_count}/{max_retries} sau 10 giây..."
-                        self.log(error_message)
-                        time.sleep(10)  # Chờ thêm 10 giây trước khi thử lại
-                        continue
-                    else:
-                        raise  # Nếu đã thử lại quá số lần cho phép, raise lỗi để xử lý ở except phía dưới
-                except requests.exceptions.RequestException as req_error:
-                    # Xử lý các lỗi request khác (không phải timeout)
-                    error_message = f"Thread Tab {tab_index+1}: Lỗi kết nối khi kiểm tra trạng thái video {video_id}: {req_error}"
-                    self.log(error_message)
-                    raise
-                
-                time.sleep(poll_interval)
-            else:
-                self.log(f"Thread Tab {tab_index+1}: Video {video_id} không hoàn thành sau {max_polls * poll_interval} giây.")
-                updated_job_info = f"{video_id} - Audio: {display_name} - (Timeout/Unknown)"
-                self.log(f"Update ListBox (cần cải thiện): {updated_job_info}")
+            # Lỗi tạm thời (kết nối, timeout, 429, 5xx) được RetryPolicy thử lại bên trong
+            # heygen_api với backoff ngẫu nhiên và giới hạn tổng thời gian
+            def on_retry(attempt, error, delay):
+                self.log(f"Thread Tab {tab_index+1}: Lỗi tạm thời khi gửi yêu cầu tạo video ({error}). Thử lại lần {attempt} sau {delay:.0f} giây...")
+
+            # Ghi job vào nhật ký trước khi gửi để khởi động lại vẫn theo dõi tiếp được
+            job_id = self.job_store.create_job(
+                account=job_store.account_fingerprint(api_key) if api_key else None,
+                audio_input=audio_input, avatar_id=avatar_id,
+                metadata={"tab_index": tab_index, "output_dir": output_dir, "display_name": display_name})
+            upload_kwargs = {
+                "upload_progress_callback": lambda progress: self.after(0, self._update_upload_status, tab_index, progress),
+                "asset_cache": self.asset_cache,
+                "on_retry": on_retry,
+                "callback_id": job_id,
+                "on_audio_ready": lambda voice: self.job_store.update(job_id, asset_id=voice.get("audio_asset_id")),
+            }
+            try:
+                if key_pool is not None:
+                    api_key, video_id = heygen_api.generate_video_with_pool(
+                        key_pool, audio_input, avatar_id, output_dir, proxies, **upload_kwargs)
+                    self.log(f"Thread Tab {tab_index+1}: Tự động chọn API Key ...{api_key[-4:]}")
+                else:
+                    video_id = heygen_api.generate_heygen_video(
+                        api_key, audio_input, avatar_id, output_dir, proxies, **upload_kwargs)
+            except Exception as e:
+                self.log(f"Thread Tab {tab_index+1}: Lỗi khi gửi yêu cầu tạo video: {e}")
+                # Timeout/5xx sau khi gửi: HeyGen có thể đã tạo video, giữ job ở trạng thái chưa xác nhận
+                self.job_store.update(job_id, status=job_store.submission_failure_status(e), error=str(e))
+                raise
+            self.job_store.update(job_id, account=job_store.account_fingerprint(api_key),
+                                  video_id=video_id, status=job_store.SUBMITTED)
+            self.log(f"Thread Tab {tab_index+1}: Đã gửi yêu cầu tạo video. Video ID: {video_id}")
+            job_info = f"{video_id} - Audio: {display_name} - (Pending)"
+            self.after(0, self._add_video_to_list, tab_index, job_info)
+
+            self._watch_video(tab_index, api_key, video_id, audio_input, output_dir, display_name, proxies, key_pool)
+            self.log(f"Thread Tab {tab_index+1}: Đang theo dõi trạng thái video {video_id} ({self.poll_scheduler.pending_count} video đang chờ).")
 
         except ValueError as ve:
             # Bắt lỗi cụ thể từ generate_heygen_video (bao gồm cả lỗi upload)
              error_message = f"Lỗi tạo video Tab {tab_index+1}: {ve}"
              self.log(error_message)
              self.after(0, messagebox.showerror, f"Lỗi Video Tab {tab_index+1}", error_message)
-        except requests.exceptions.Timeout as timeout_error:
+        except (requests.exceptions.Timeout, httpx.TimeoutException) as timeout_error:
             # Xử lý riêng lỗi timeout
             error_message = f"Lỗi timeout khi tạo/theo dõi video Tab {tab_index+1}: {timeout_error}"
             self.log(error_message)
@@ -723,6 +901,132 @@ class HeyGenMultiCreatorApp(ctk.CTk):
                  self.log(f"Update ListBox (cần cải thiện): {updated_job_info}")
             self.after(0, messagebox.showerror, f"Lỗi Video Tab {tab_index+1}", f"Lỗi không mong muốn: {e}")
 
+    def _watch_video(self, tab_index, api_key, video_id, audio_input, output_dir, display_name, proxies, key_pool=None):
+        """Giao video cho bộ lập lịch poll chung; trạng thái được ghi vào nhật ký job."""
+        def on_update(v_id, status_data):
+            self.job_store.update_by_video_id(v_id, status=status_data.get("status"))
+            self._update_listed_video(tab_index, api_key, v_id, status_data.get("status"))
+            self.log(f"Tab {tab_index+1}: Video {v_id} - Trạng thái: {status_data.get('status')}")
+
+        def on_complete(v_id, status_data, error, used_key=api_key):
+            if key_pool is not None:
+                # Giải phóng key khi render kết thúc; lỗi poll tính là lỗi của key
+                key_pool.release(used_key, success=error is None)
+            self._on_video_poll_complete(tab_index, v_id, audio_input, output_dir, display_name, status_data, error)
+
+        self.poll_scheduler.submit(api_key, video_id, on_complete=on_complete, on_update=on_update, proxies=proxies)
+
+    def _resume_pending_jobs(self):
+        """Theo dõi tiếp các video chưa xong từ lần chạy trước (đọc từ nhật ký job)."""
+        try:
+            jobs = self.job_store.recover(completed_is_final=False)
+        except Exception as e:
+            self.log(f"Lỗi đọc nhật ký job: {e}")
+            return
+        keys_by_account = {job_store.account_fingerprint(key): key for key in self.api_keys if key}
+        proxies = self._get_current_proxies()
+        resumed = 0
+        for job in jobs:
+            api_key = keys_by_account.get(job.account)
+            if api_key is None:
+                self.log(f"Bỏ qua video {job.video_id}: không còn API Key của tài khoản đã tạo video này.")
+                continue
+            meta = job.metadata
+            tab_index = min(max(int(meta.get("tab_index", 0)), 0), len(self.tab_generation_widgets) - 1)
+            self._watch_video(tab_index, api_key, job.video_id, job.audio_input or "",
+                              meta.get("output_dir") or self.output_dir.get(),
+                              meta.get("display_name") or job.video_id, proxies)
+            resumed += 1
+        if resumed:
+            self.log(f"Tiếp tục theo dõi {resumed} video chưa hoàn tất từ lần chạy trước.")
+
+    def _update_upload_status(self, tab_index, progress):
+        """Hiển thị tiến trình và tốc độ upload audio trên tab (chạy trên main thread)."""
+        try:
+            label = self.tab_generation_widgets[tab_index]['upload_status_label']
+            retry_text = f" (lần {progress.attempt})" if progress.attempt > 1 else ""
+            label.configure(text=f"Upload {progress.file_name}: {progress.percent:.0f}% - {progress.mb_per_second:.2f} MB/s{retry_text}")
+        except Exception as e:
+            self.log(f"Lỗi cập nhật trạng thái upload Tab {tab_index+1}: {e}")
+
+    def _get_key_pool(self):
+        """Trả về ApiKeyPool cho danh sách key hiện tại (tạo lại nếu key thay đổi)."""
+        keys = tuple(dict.fromkeys(key for key in self.api_keys if key))
+        with self._key_pool_lock:
+            if self._key_pool is None or tuple(self._key_pool.api_keys) != keys:
+                self._key_pool = heygen_api.ApiKeyPool(list(keys), proxies=self._get_current_proxies())
+            return self._key_pool
+
+    def _on_video_poll_complete(self, tab_index, video_id, audio_input, output_dir, display_name, status_data, error):
+        """Callback của StatusPollScheduler (chạy trên thread poll) khi video kết thúc hoặc hết thời gian chờ."""
+        if error:
+            # Giữ trạng thái chưa xong trong nhật ký để lần chạy sau theo dõi tiếp
+            self.log(f"Tab {tab_index+1}: {error}")
+            self.log(f"Update ListBox (cần cải thiện): {video_id} - Audio: {display_name} - (Timeout/Unknown)")
+            return
+
+        current_status = status_data.get("status")
+        if current_status == "failed":
+            error_detail = (status_data.get("error") or {}).get("message", "Unknown error")
+            self.job_store.update_by_video_id(video_id, status="failed", error=error_detail)
+            self.log(f"Tab {tab_index+1}: Video {video_id} thất bại: {error_detail}")
+            self.log(f"Update ListBox (cần cải thiện): {video_id} - Audio: {display_name} - (Thất bại: {error_detail})")
+            return
+
+        result_video_url = status_data.get("video_url")
+        self.job_store.update_by_video_id(video_id, status="completed", video_url=result_video_url)
+        self.log(f"Tab {tab_index+1}: Video {video_id} hoàn thành! URL: {result_video_url}")
+        self.after(0, self._enable_download_button, tab_index, video_id, result_video_url)
+        if result_video_url:
+            # Tải bằng worker (ưu tiên thấp) để không giữ thread poll
+            self.jobs.submit(self._auto_download_video, tab_index, video_id, audio_input, output_dir, result_video_url,
+                             priority=job_engine.PRIORITY_BULK, name=f"auto_download_{video_id}", with_token=True)
+
+    def _auto_download_video(self, tab_index, video_id, audio_input, output_dir, result_video_url, cancel_token=None):
+        """Tự động tải video đã hoàn thành, đặt tên file theo audio đầu vào."""
+        self.log(f"Thread Tab {tab_index+1}: Tự động tải video {video_id}...")
+
+        # --- Construct filename based on audio_input ---
+        try:
+            base_name = ""
+            if os.path.exists(audio_input) and not audio_input.startswith(('http://', 'https://')):
+                # It's a local file path
+                base_name = os.path.splitext(os.path.basename(audio_input))[0]
+            elif audio_input.startswith(('http://', 'https://')):
+                # It's a URL, try to parse filename
+                parsed_path = os.path.basename(urlparse(audio_input).path)
+                base_name = os.path.splitext(parsed_path)[0]
+
+            if not base_name:
+                # Fallback if parsing failed or name is empty
+                base_name = f"{video_id}_video"
+
+            download_filename_unsafe = f"{base_name}.mp4"
+            # Ensure filename is safe
+            download_filename = "".join(c for c in download_filename_unsafe if c.isalnum() or c in ('.', '-', '_')).rstrip()
+            if not download_filename:
+                download_filename = f"{video_id}.mp4" # Final fallback
+
+        except Exception as name_ex:
+             self.log(f"Lỗi xử lý tên file cho video {video_id}: {name_ex}. Dùng ID.")
+             download_filename = f"{video_id}.mp4"
+
+        save_path = os.path.join(output_dir, download_filename)
+        self.log(f"Thread Tab {tab_index+1}: Lưu về: {save_path}")
+        try:
+            success, message = heygen_api.download_video_file(
+                result_video_url, save_path,
+                progress_callback=self._make_download_progress_logger(f"Thread Tab {tab_index+1} ({video_id}): ", cancel_token=cancel_token))
+            if cancel_token is not None and cancel_token.cancelled:
+                self.log(f"Thread Tab {tab_index+1}: Đã dừng tải video {video_id} (sẽ tải tiếp từ phần đã có ở lần sau).")
+            elif success:
+                self.job_store.update_by_video_id(video_id, status=job_store.DOWNLOADED, download_path=save_path)
+                self.log(f"Thread Tab {tab_index+1}: Tự động tải thành công: {message}")
+            else:
+                self.log(f"Thread Tab {tab_index+1}: Lỗi tự động tải: {message}")
+        except Exception as dl_ex:
+            self.log(f"Thread Tab {tab_index+1}: Lỗi nghiêm trọng khi tự động tải: {dl_ex}")
+
     def _add_video_to_list(self, tab_index, job_info):
         """Adds NEW video job info to the CURRENT job log textbox."""
         try:
@@ -749,77 +1053,75 @@ class HeyGenMultiCreatorApp(ctk.CTk):
             messagebox.showerror("Lỗi", f"Vui lòng nhập API Key {tab_index + 1} trước.")
             return
             
-        thread = threading.Thread(target=self._get_video_list_thread_safe, args=(tab_index, api_key), daemon=True)
-        thread.start()
+        self.jobs.submit(self._get_video_list_thread_safe, tab_index, api_key,
+                         priority=job_engine.PRIORITY_INTERACTIVE, name=f"video_list_tab{tab_index + 1}")
         
     def _get_video_list_thread_safe(self, tab_index, api_key):
-        """Calls API to get video list in a separate thread."""
+        """
+        Calls API to get video list in a separate thread.
+
+        The first load walks every page (next pages are prefetched while the
+        current one is merged). Later refreshes are incremental: listing stops
+        at the first page containing a video already in this account's index.
+        """
         try:
             proxies = self._get_current_proxies()
-            video_data = heygen_api.list_videos(api_key, proxies, limit=100) # Fetch first 100
+            account = job_store.account_fingerprint(api_key)
+            with self._video_index_lock:
+                index = self.video_indexes.setdefault(account, {})
+                known_ids = set(index) or None  # Index rỗng: tải toàn bộ
+            fetched = 0
+            for page_number, videos in enumerate(heygen_api.iter_video_pages(api_key, proxies, known_ids=known_ids), 1):
+                with self._video_index_lock:
+                    for video in videos:
+                        if video.get('video_id'):
+                            index[video['video_id']] = video
+                fetched += len(videos)
+                if page_number == 1:
+                    # Hiện ngay trang đầu, các trang sau cập nhật khi tải xong
+                    self.after(0, self._update_video_list_display, tab_index, self._sorted_video_index(account), None)
+            mode = "cập nhật" if known_ids else "tải toàn bộ"
+            self.log(f"Tab {tab_index + 1}: Đã {mode} {fetched} video qua {page_number if fetched else 0} trang.")
             # Update GUI in main thread
-            self.after(0, self._update_video_list_display, tab_index, video_data.get('videos', []), None)
+            self.after(0, self._update_video_list_display, tab_index, self._sorted_video_index(account), None)
         except Exception as e:
             error_message = f"Lỗi tải danh sách video Key {tab_index + 1}: {e}"
             self.log(error_message)
             # Update GUI in main thread on error
             self.after(0, self._update_video_list_display, tab_index, [], str(e))
             
+    def _sorted_video_index(self, account):
+        """Danh sách video đã biết của tài khoản, mới nhất trước."""
+        with self._video_index_lock:
+            videos = list(self.video_indexes.get(account, {}).values())
+        return sorted(videos, key=lambda v: v.get('created_at') or 0, reverse=True)
+
     def _update_video_list_display(self, tab_index, video_list, error_message):
-        """Updates the video list display in the scrollable frame."""
+        """Updates the virtualized video list; only changed visible rows are redrawn."""
         if tab_index >= len(self.video_list_widgets) or not self.video_list_widgets[tab_index]:
              self.log(f"Lỗi: Không tìm thấy video_list_widget cho tab {tab_index + 1}")
              return
-             
-        scrollable_frame = self.video_list_widgets[tab_index]
-        
-        # Clear previous items
-        for widget in scrollable_frame.winfo_children():
-            widget.destroy()
-            
+
+        video_list_widget = self.video_list_widgets[tab_index]
         if error_message:
-            error_label = ctk.CTkLabel(scrollable_frame, text=f"Lỗi tải danh sách: {error_message}", text_color="red", wraplength=350)
-            error_label.pack(pady=10, padx=10)
-            return
-            
-        if not video_list:
-            no_videos_label = ctk.CTkLabel(scrollable_frame, text="(Không có video nào được tìm thấy)")
-            no_videos_label.pack(pady=10, padx=10)
+            video_list_widget.show_error(error_message)
             return
-            
-        # Populate with new video items
-        for video_info in video_list:
-            video_id = video_info.get('video_id', 'N/A')
-            status = video_info.get('status', 'N/A')
-            created_timestamp = video_info.get('created_at', 0)
-            
-            # Convert timestamp to readable format
-            try:
-                created_dt = datetime.fromtimestamp(created_timestamp).strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                created_dt = "N/A"
-            
-            item_frame = ctk.CTkFrame(scrollable_frame)
-            item_frame.pack(fill="x", padx=5, pady=3)
-            item_frame.grid_columnconfigure(0, weight=1) # ID and Date
-            item_frame.grid_columnconfigure(1, weight=0) # Status
-            item_frame.grid_columnconfigure(2, weight=0) # Download Button
-            
-            info_text = f"ID: {video_id}\nNgày tạo: {created_dt}"
-            ctk.CTkLabel(item_frame, text=info_text, justify="left").grid(row=0, column=0, padx=5, pady=2, sticky="w")
-            
-            status_color = "gray"
-            if status == "completed": status_color = "green"
-            elif status == "failed": status_color = "red"
-            elif status == "processing": status_color = "orange"
-            ctk.CTkLabel(item_frame, text=f"Trạng thái: {status}", text_color=status_color).grid(row=0, column=1, padx=5, pady=2, sticky="e")
-            
-            download_button = ctk.CTkButton(item_frame, text="Tải xuống", width=80,
-                                            state="normal" if status == "completed" else "disabled",
-                                            command=lambda v_id=video_id: self._download_listed_video(tab_index, v_id))
-            download_button.grid(row=0, column=2, padx=5, pady=2)
-            
-        self.log(f"Tab {tab_index + 1}: Đã hiển thị {len(video_list)} video.")
+
+        video_list_widget.set_items(video_list)
+        if video_list:
+            self.log(f"Tab {tab_index + 1}: Đã hiển thị {len(video_list)} video.")
+
+    def _update_listed_video(self, tab_index, api_key, video_id, status):
+        """Cập nhật trạng thái một video đã có trong danh sách mà không dựng lại danh sách."""
+        account = job_store.account_fingerprint(api_key)
+        with self._video_index_lock:
+            video = self.video_indexes.get(account, {}).get(video_id)
+            if video is None or video.get('status') == status:
+                return
+            video = dict(video, status=status)
+            self.video_indexes[account][video_id] = video
+        if tab_index < len(self.video_list_widgets) and self.video_list_widgets[tab_index]:
+            self.after(0, self.video_list_widgets[tab_index].update_item, video)
 
     def _download_listed_video(self, tab_index, video_id):
         """Initiates download for a video selected from the list."""
@@ -835,11 +1137,9 @@ class HeyGenMultiCreatorApp(ctk.CTk):
              messagebox.showerror("Lỗi", "Vui lòng chọn thư mục đầu ra hợp lệ trong tab Cài đặt trước khi tải.")
              return
 
-        # 2. Start a thread to get status/URL and then download
-        thread = threading.Thread(target=self._get_status_and_download_thread,
-                                  args=(tab_index, api_key, video_id, output_dir),
-                                  daemon=True)
-        thread.start()
+        # 2. Get status/URL on a worker, then download
+        self.jobs.submit(self._get_status_and_download_thread, tab_index, api_key, video_id, output_dir,
+                         priority=job_engine.PRIORITY_INTERACTIVE, name=f"download_status_{video_id}")
 
     def _get_status_and_download_thread(self, tab_index, api_key, video_id, output_dir):
         """Thread worker: gets video status, then prompts for save and downloads."""
@@ -884,20 +1184,22 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         
         if save_path:
             self.log(f"Tab {tab_index+1}: Bắt đầu tải video {video_id} về: {save_path}")
-            # Start the actual download in another thread
-            dl_thread = threading.Thread(target=self._download_video_file_thread, # New dedicated download func
-                                       args=(video_url, save_path, tab_index, video_id),
-                                       daemon=True)
-            dl_thread.start()
+            # Start the actual download on a worker
+            self.jobs.submit(self._download_video_file_thread, video_url, save_path, tab_index, video_id,
+                             priority=job_engine.PRIORITY_NORMAL, name=f"download_{video_id}", with_token=True)
         else:
             self.log(f"Tab {tab_index+1}: Người dùng đã hủy tải video {video_id}.")
 
-    def _download_video_file_thread(self, video_url, save_path, tab_index=0, video_id="unknown"):
-        """Dedicated thread for downloading a single video file."""
+    def _download_video_file_thread(self, video_url, save_path, tab_index=0, video_id="unknown", cancel_token=None):
+        """Job engine worker for downloading a single video file."""
         log_prefix = f"Thread DL Tab {tab_index + 1} ({video_id}): "
         try:
-            success, message = heygen_api.download_video_file(video_url, save_path)
-            if success:
+            success, message = heygen_api.download_video_file(
+                video_url, save_path,
+                progress_callback=self._make_download_progress_logger(log_prefix, cancel_token=cancel_token))
+            if cancel_token is not None and cancel_token.cancelled:
+                self.log(f"{log_prefix}Đã dừng tải (sẽ tải tiếp từ phần đã có ở lần sau).")
+            elif success:
                 self.log(f"{log_prefix}{message}")
                 self.after(0, messagebox.showinfo, f"Thành Công Tab {tab_index + 1}", f"Đã tải video {video_id} thành công!\n{save_path}")
             else:
@@ -908,6 +1210,23 @@ class HeyGenMultiCreatorApp(ctk.CTk):
             self.log(f"{log_prefix}{error_msg}")
             self.after(0, messagebox.showerror, f"Lỗi Tải Video Tab {tab_index + 1}", error_msg)
 
+    def _make_download_progress_logger(self, log_prefix, step=25, cancel_token=None):
+        """Tạo callback tiến trình tải, ghi log mỗi `step` phần trăm; dừng tải khi cancel_token bị hủy."""
+        next_mark = [step]
+
+        def on_progress(done, total):
+            if cancel_token is not None:
+                # Exception đi qua download_video_file, phần đã tải được lưu lại để tải tiếp
+                cancel_token.raise_if_cancelled()
+            if not total:
+                return
+            percent = done * 100 // total
+            if percent >= next_mark[0]:
+                next_mark[0] = (percent // step + 1) * step
+                self.log(f"{log_prefix}Đã tải {percent}% ({done / 1048576:.1f}/{total / 1048576:.1f} MB)")
+
+        return on_progress
+
     def get_selected_video_info(self, tab_index):
          # This needs significant improvement. CTkTextbox isn't ideal for selection.
          # We need to store job info (id, status, url) elsewhere and link to list items.
@@ -955,7 +1274,10 @@ class HeyGenMultiCreatorApp(ctk.CTk):
             "avatar_id": current_avatar_id,
             "output_dir": self.output_dir.get(),
             "proxy": self.proxy_settings,
-            "window_geometry": current_geometry # Thêm geometry vào dữ liệu lưu
+            "window_geometry": current_geometry, # Thêm geometry vào dữ liệu lưu
+            "audio_asset_cache_ttl_hours": self.audio_asset_cache_ttl_hours,
+            "auto_balance_keys": self.auto_balance_keys.get(),
+            "log_file": self.log_file
         }
         self.api_keys = cleaned_api_keys
         save_successful = config_manager.save_config(config_data, self.log)
@@ -991,6 +1313,7 @@ class HeyGenMultiCreatorApp(ctk.CTk):
 
         # Reset cache, combobox values sẽ được cập nhật khi list được tải
         self.avatar_list_cache = None # Lưu cache là list ID đầy đủ
+        self.avatar_index = None
         if self.avatar_combobox:
             self.avatar_combobox.configure(values=[], state="disabled")
             # Xóa nội dung ô search khi load config
@@ -1000,6 +1323,13 @@ class HeyGenMultiCreatorApp(ctk.CTk):
         # Apply Output Directory
         self.output_dir.set(config.get("output_dir", os.getcwd()))
 
+        # Apply audio asset cache TTL
+        self.audio_asset_cache_ttl_hours = config.get("audio_asset_cache_ttl_hours", 168)
+        self.asset_cache.ttl_seconds = float(self.audio_asset_cache_ttl_hours) * 3600
+
+        # Apply key balancing option
+        self.auto_balance_keys.set(config.get("auto_balance_keys", False))
+
         # Apply Proxy Settings
         loaded_proxy = config.get("proxy", {"http": "", "https": ""})
         self.proxy_settings = loaded_proxy
@@ -1026,6 +1356,12 @@ class HeyGenMultiCreatorApp(ctk.CTk):
             else:
                 self.log("Hủy thoát để sửa lỗi lưu cấu hình.")
                 return
+        self.poll_scheduler.shutdown(wait=False)
+        # Bỏ job đang chờ, báo job đang chạy dừng (tải dở được lưu để tải tiếp)
+        self.jobs.shutdown(timeout=2.0)
+        heygen_api_async.shutdown()
+        self.after_cancel(self._log_drain_job)
+        self.log_sink.close()
         self.destroy()
 
     # --- Credit Check Methods --- 
@@ -1043,8 +1379,8 @@ class HeyGenMultiCreatorApp(ctk.CTk):
             self.api_key_credit_labels[index].configure(text="Quota: Đang kiểm tra...", text_color="orange")
 
         self.log(f"Bắt đầu kiểm tra quota cho API Key {index + 1}...")
-        thread = threading.Thread(target=self._get_quota_thread_safe, args=(index, api_key), daemon=True)
-        thread.start()
+        self.jobs.submit(self._get_quota_thread_safe, index, api_key,
+                         priority=job_engine.PRIORITY_INTERACTIVE, name=f"quota_key{index + 1}")
 
     def _get_quota_thread_safe(self, index, api_key):
         """Calls the API to get quota in a separate thread."""
@@ -1129,11 +1465,9 @@ class HeyGenMultiCreatorApp(ctk.CTk):
                                                  filetypes=[("MP4 Video", "*.mp4")])
         if save_path:
             self.log(f"Bắt đầu tải video cho Tab {tab_index+1} về: {save_path}")
-            # Run download in a thread
-            thread = threading.Thread(target=self._download_video_file_thread,
-                                      args=(video_url, save_path, tab_index, video_url.split('/')[-1]),
-                                      daemon=True)
-            thread.start()
+            # Run download on a worker
+            self.jobs.submit(self._download_video_file_thread, video_url, save_path, tab_index, video_url.split('/')[-1],
+                             priority=job_engine.PRIORITY_NORMAL, name="download_selected", with_token=True)
 
 if __name__ == "__main__":
     app = HeyGenMultiCreatorApp()
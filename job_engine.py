@@ -0,0 +1,170 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from typing import Any, Callable, List, Optional
+
+# Độ ưu tiên: số nhỏ chạy trước
+PRIORITY_INTERACTIVE = 0  # Người dùng đang chờ (kiểm tra quota, tải danh sách)
+PRIORITY_NORMAL = 1       # Gửi yêu cầu tạo video
+PRIORITY_BULK = 2         # Tải video tự động, việc chạy nền dài
+
+DEFAULT_MAX_WORKERS = 6
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancel token has been triggered."""
+
+
+class CancelToken:
+    """Cờ hủy dùng chung giữa người gửi job và job (kiểm tra hợp tác)."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def wait(self, timeout: float) -> bool:
+        """Ngủ tối đa `timeout` giây, thức dậy ngay khi bị hủy; trả về True nếu đã hủy."""
+        return self._event.wait(timeout)
+
+
+class JobHandle:
+    """Kết quả của `JobEngine.submit`: hủy job hoặc chờ nó kết thúc."""
+
+    def __init__(self, name: str, priority: int):
+        self.name = name
+        self.priority = priority
+        self.token = CancelToken()
+        self.started = False
+        self._done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self) -> None:
+        """Hủy job: chưa chạy thì bị bỏ, đang chạy thì token báo cho job dừng."""
+        self.token.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+
+class JobEngine:
+    """
+    Bộ thực thi job của GUI với số worker cố định và hàng đợi ưu tiên.
+
+    Mọi việc nền (tạo video, tải danh sách, kiểm tra quota, tải file) đi qua
+    đây thay vì mỗi việc một threading.Thread, nên một lô 500 file chỉ dùng
+    `max_workers` thread. Job cùng độ ưu tiên chạy theo thứ tự gửi. Mỗi job có
+    CancelToken; `shutdown` hủy mọi job đang chờ và báo các job đang chạy dừng.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 on_error: Optional[Callable[[str, BaseException], None]] = None):
+        """
+        Args:
+            max_workers: Số thread worker cố định.
+            on_error: Gọi (trên thread worker) với (tên job, lỗi) khi job ném
+                exception chưa được xử lý; mặc định in traceback ra stderr.
+        """
+        self._on_error = on_error
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running: List[JobHandle] = []
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"gui-job-{i + 1}", daemon=True)
+            for i in range(max(1, max_workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def pending_count(self) -> int:
+        """Số job đang chờ trong hàng đợi (chưa chạy)."""
+        with self._cond:
+            return len(self._queue)
+
+    def submit(self, func: Callable[..., Any], *args, priority: int = PRIORITY_NORMAL,
+               name: str = "", with_token: bool = False, **kwargs) -> JobHandle:
+        """
+        Đưa một job vào hàng đợi.
+
+        Args:
+            func: Hàm chạy trên thread worker.
+            priority: PRIORITY_INTERACTIVE / PRIORITY_NORMAL / PRIORITY_BULK.
+            name: Tên dùng trong log lỗi.
+            with_token: Truyền CancelToken của job vào func qua kwarg `cancel_token`.
+
+        Raises:
+            RuntimeError: Nếu engine đã shutdown.
+        """
+        handle = JobHandle(name or getattr(func, "__name__", "job"), priority)
+        if with_token:
+            kwargs["cancel_token"] = handle.token
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("JobEngine đã dừng.")
+            heapq.heappush(self._queue, (priority, next(self._seq), handle, func, args, kwargs))
+            self._cond.notify()
+        return handle
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """Bỏ các job đang chờ, hủy job đang chạy và chờ worker thoát tối đa `timeout` giây."""
+        with self._cond:
+            self._closed = True
+            dropped = [entry[2] for entry in self._queue]
+            self._queue.clear()
+            running = list(self._running)
+            self._cond.notify_all()
+        for handle in dropped:
+            handle.cancel()
+            handle._done.set()
+        for handle in running:
+            handle.cancel()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                _, _, handle, func, args, kwargs = heapq.heappop(self._queue)
+                if handle.token.cancelled:
+                    handle._done.set()
+                    continue
+                handle.started = True
+                self._running.append(handle)
+            try:
+                handle.result = func(*args, **kwargs)
+            except JobCancelled:
+                pass
+            except Exception as e:
+                handle.error = e
+                if self._on_error is not None:
+                    self._on_error(handle.name, e)
+                else:
+                    traceback.print_exc()
+            finally:
+                with self._cond:
+                    self._running.remove(handle)
+                handle._done.set()
@@ -0,0 +1,101 @@
+import collections
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+MAX_PENDING_RECORDS = 20000  # Giới hạn hàng đợi chưa hiển thị; vượt thì bỏ dòng cũ nhất
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 3
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Ghi mỗi bản ghi log thành một dòng JSON (ts, level, thread, message)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }, ensure_ascii=False)
+
+
+class LogSink:
+    """
+    Hàng đợi log dùng chung cho mọi thread; giao diện lấy ra theo lô.
+
+    `emit` chỉ append vào một deque (an toàn giữa các thread, không khóa ở mức
+    Python), nên thread worker không bao giờ chạm vào widget Tk hay chờ vẽ lại.
+    Main loop gọi `drain` định kỳ để lấy một lô dòng đã định dạng. Khi có
+    `log_file`, bản ghi còn được ghi ra file JSON-lines xoay vòng bởi một
+    QueueListener chạy trên thread riêng.
+    """
+
+    def __init__(self, log_file: Optional[str] = None, max_pending: int = MAX_PENDING_RECORDS):
+        self._pending: "collections.deque[Tuple[float, str]]" = collections.deque(maxlen=max_pending)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._logger = None
+        self._listener = None
+        self._file_handler = None
+        self._queue_handler = None
+        if log_file:
+            self._file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT, encoding="utf-8")
+            self._file_handler.setFormatter(JsonLineFormatter())
+            log_queue = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(log_queue, self._file_handler)
+            self._listener.start()
+            self._logger = logging.getLogger(f"heygen_gui.{id(self)}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._queue_handler = logging.handlers.QueueHandler(log_queue)
+            self._logger.addHandler(self._queue_handler)
+
+    def emit(self, message: str, level: int = logging.INFO) -> None:
+        """Ghi một dòng log; gọi được từ bất kỳ thread nào."""
+        pending = self._pending
+        if len(pending) == pending.maxlen:
+            with self._dropped_lock:
+                self._dropped += 1
+        pending.append((time.time(), message))
+        # close() có thể đặt self._logger = None giữa chừng: đọc một lần
+        logger = self._logger
+        if logger is not None:
+            logger.log(level, message)
+
+    def drain(self, max_records: int) -> List[str]:
+        """Lấy tối đa `max_records` dòng đã định dạng "HH:MM:SS - message" (main thread)."""
+        lines = []
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            lines.append(f"{time.strftime('%H:%M:%S')} - ({dropped} dòng log cũ đã bị bỏ qua do quá tải)")
+        pending = self._pending
+        while len(lines) < max_records:
+            try:
+                created, message = pending.popleft()
+            except IndexError:
+                break
+            lines.append(f"{time.strftime('%H:%M:%S', time.localtime(created))} - {message}")
+        return lines
+
+    def __len__(self):
+        return len(self._pending)
+
+    def close(self) -> None:
+        """Dừng ghi file (xả hết bản ghi còn trong hàng đợi)."""
+        logger, self._logger = self._logger, None
+        if logger is not None:
+            # Thread worker còn giữ logger cũ thì bản ghi bị bỏ, không đi vào hàng đợi đã dừng
+            logger.removeHandler(self._queue_handler)
+            logger.disabled = True
+            self._queue_handler = None
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._file_handler.close()
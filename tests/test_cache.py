@@ -0,0 +1,106 @@
+"""Tests for the async TTL cache."""
+
+import asyncio
+
+import pytest
+
+from heygen_mcp.cache import AsyncTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def test_concurrent_calls_share_one_load():
+    cache = AsyncTTLCache()
+    release = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    waiters = [
+        asyncio.create_task(cache.get_or_load("k", loader, 60)) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 5
+    assert calls == 1
+    assert cache.stats().coalesced == 4
+
+
+async def test_cancelling_the_first_caller_does_not_cancel_the_others():
+    cache = AsyncTTLCache()
+    release = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    first = asyncio.create_task(cache.get_or_load("k", loader, 60))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(cache.get_or_load("k", loader, 60))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert calls == 1
+    # The load finished and was cached for later callers
+    assert await cache.get_or_load("k", loader, 60) == "value"
+    assert calls == 1
+
+
+async def test_loader_error_reaches_every_waiter_and_is_not_cached():
+    cache = AsyncTTLCache()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("upstream down")
+
+    waiters = [
+        asyncio.create_task(cache.get_or_load("k", failing, 60)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def loader():
+        return "fresh"
+
+    assert await cache.get_or_load("k", loader, 60) == "fresh"
+
+
+async def test_stale_entry_is_served_while_refreshing():
+    clock = FakeClock()
+    cache = AsyncTTLCache(stale_while_revalidate=30, clock=clock)
+    values = iter(["old", "new"])
+
+    async def loader():
+        return next(values)
+
+    assert await cache.get_or_load("k", loader, 10) == "old"
+    clock.now = 15
+    assert await cache.get_or_load("k", loader, 10) == "old"
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert await cache.get_or_load("k", loader, 10) == "new"
+    assert cache.stats().refreshes == 1
@@ -0,0 +1,110 @@
+"""Tests for the merged avatar catalog."""
+
+import asyncio
+
+import httpx
+
+from heygen_mcp.api_client import HeyGenApiClient
+from heygen_mcp.ratelimit import RateLimiter
+
+GROUP_IDS = ["g1", "g2"]
+
+
+def _avatar(avatar_id):
+    return {
+        "avatar_id": avatar_id,
+        "avatar_name": avatar_id,
+        "gender": "female",
+        "preview_image_url": "https://example.test/a.png",
+        "preview_video_url": "https://example.test/a.mp4",
+        "premium": False,
+    }
+
+
+def _catalog_client(release_g2):
+    """Client whose second group only answers once release_g2 is set."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request.url.path)
+        if request.url.path.endswith("avatar_group.list"):
+            groups = [
+                {
+                    "id": group_id,
+                    "name": group_id,
+                    "created_at": 0,
+                    "num_looks": 1,
+                    "preview_image": "https://example.test/g.png",
+                    "group_type": "PRIVATE",
+                }
+                for group_id in GROUP_IDS
+            ]
+            return httpx.Response(
+                200, json={"error": None, "data": {"avatar_group_list": groups}}
+            )
+        group_id = request.url.path.split("/")[-2]
+        if group_id == "g2":
+            await release_g2.wait()
+        return httpx.Response(
+            200,
+            json={"error": None, "data": {"avatar_list": [_avatar(f"a-{group_id}")]}},
+        )
+
+    client = HeyGenApiClient("k" * 20, rate_limiter=RateLimiter(rate=0))
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, requests
+
+
+def _recorder(events):
+    async def on_group(done, total, group_id, avatars):
+        events.append((done, total, group_id, [a["avatar_id"] for a in avatars]))
+
+    return on_group
+
+
+async def test_coalesced_callers_each_receive_full_progress():
+    release_g2 = asyncio.Event()
+    client, requests = _catalog_client(release_g2)
+    first_events, second_events = [], []
+
+    first = asyncio.create_task(
+        client.list_all_avatars(on_group=_recorder(first_events))
+    )
+    while not first_events:
+        await asyncio.sleep(0)
+    # Joins the load after g1 has already been reported
+    second = asyncio.create_task(
+        client.list_all_avatars(on_group=_recorder(second_events))
+    )
+    await asyncio.sleep(0)
+    release_g2.set()
+    results = await asyncio.gather(first, second)
+    await client.close()
+
+    expected = [(1, 2, "g1", ["a-g1"]), (2, 2, "g2", ["a-g2"])]
+    assert first_events == expected
+    assert second_events == expected
+    assert [r.total_count for r in results] == [2, 2]
+    assert sum(path.endswith("avatar_group.list") for path in requests) == 1
+
+
+async def test_failing_progress_callback_does_not_fail_other_callers():
+    release_g2 = asyncio.Event()
+    release_g2.set()
+    client, _ = _catalog_client(release_g2)
+    events = []
+
+    async def broken(*_event):
+        raise RuntimeError("client went away")
+
+    results = await asyncio.gather(
+        client.list_all_avatars(on_group=broken),
+        client.list_all_avatars(on_group=_recorder(events)),
+    )
+    # Served from cache: no progress is reported
+    cached = await client.list_all_avatars(on_group=_recorder(events))
+    await client.close()
+
+    assert [r.error for r in results] == [None, None]
+    assert [event[2] for event in events] == GROUP_IDS
+    assert cached.total_count == 2
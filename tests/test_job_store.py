@@ -0,0 +1,260 @@
+"""Tests for the job journal and its use by the API client."""
+
+import asyncio
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+from heygen_mcp import job_store
+from heygen_mcp.api_client import (
+    Character,
+    HeyGenApiClient,
+    VideoGenerateRequest,
+    VideoInput,
+    Voice,
+)
+from heygen_mcp.job_store import INTERRUPTED, SUBMITTING, UNCONFIRMED, JobStore
+from heygen_mcp.ratelimit import RateLimiter
+from heygen_mcp.retry import RetryPolicy
+from heygen_mcp.webhooks import WebhookReceiver, build_video_event
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), source="mcp")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def live_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc.pid
+    proc.kill()
+    proc.wait()
+
+
+@pytest.fixture
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _set_owner(store, job_id, owner, updated_at=None):
+    with store._conn:
+        store._conn.execute(
+            "UPDATE jobs SET owner = ?, updated_at = COALESCE(?, updated_at)"
+            " WHERE job_id = ?",
+            (owner, updated_at, job_id),
+        )
+
+
+def _local_owner(pid):
+    return f"{job_store.current_owner().rpartition(':')[0]}:{pid}"
+
+
+def _video_request():
+    return VideoGenerateRequest(
+        video_inputs=[
+            VideoInput(
+                character=Character(avatar_id="a"),
+                voice=Voice(input_text="hi", voice_id="v"),
+            )
+        ]
+    )
+
+
+def _generate_client(store, handler, webhooks=None):
+    async def no_sleep(_delay):
+        return None
+
+    client = HeyGenApiClient(
+        "k" * 20,
+        rate_limiter=RateLimiter(rate=0),
+        retry_policy=RetryPolicy(sleep=no_sleep),
+        job_store=store,
+        webhooks=webhooks,
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_recover_interrupts_submissions_of_exited_processes(store, dead_pid):
+    job_id = store.create_job(avatar_id="a")
+    _set_owner(store, job_id, _local_owner(dead_pid))
+
+    assert store.recover() == []
+    assert store.get(job_id).status == INTERRUPTED
+
+
+def test_recover_keeps_submissions_of_running_processes(store, live_pid):
+    other = store.create_job(avatar_id="a")
+    _set_owner(store, other, _local_owner(live_pid))
+    own = store.create_job(avatar_id="b")
+
+    store.recover()
+
+    assert store.get(other).status == SUBMITTING
+    assert store.get(own).status == SUBMITTING
+
+
+def test_recover_interrupts_stale_and_ownerless_submissions(store, live_pid):
+    stale = store.create_job()
+    _set_owner(
+        store,
+        stale,
+        _local_owner(live_pid),
+        updated_at=time.time() - job_store.STALE_SUBMITTING_AFTER - 1,
+    )
+    legacy = store.create_job()
+    _set_owner(store, legacy, None)
+
+    store.recover()
+
+    assert store.get(stale).status == INTERRUPTED
+    assert store.get(legacy).status == INTERRUPTED
+
+
+def test_recover_returns_jobs_with_a_video_id(store, dead_pid):
+    job_id = store.create_job()
+    store.update(job_id, video_id="v1", status="processing")
+    _set_owner(store, job_id, _local_owner(dead_pid))
+
+    assert [job.video_id for job in store.recover()] == ["v1"]
+    assert store.get(job_id).status == "processing"
+
+
+def test_journal_without_owner_column_is_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(job_store._SCHEMA.replace("    owner TEXT,\n", ""))
+    conn.close()
+
+    store = JobStore(path)
+    job_id = store.create_job()
+    assert store.get(job_id).owner == job_store.current_owner()
+    store.close()
+
+
+async def test_client_writes_the_journal_off_the_event_loop(store, monkeypatch):
+    loop_thread = threading.get_ident()
+    writer_threads = set()
+    create_job, update = store.create_job, store.update
+
+    def tracked(method):
+        def wrapper(*args, **kwargs):
+            writer_threads.add(threading.get_ident())
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(store, "create_job", tracked(create_job))
+    monkeypatch.setattr(store, "update", tracked(update))
+
+    def handler(request):
+        if request.url.path.endswith("video/generate"):
+            return httpx.Response(200, json={"error": None, "data": {"video_id": "v1"}})
+        return httpx.Response(
+            200,
+            json={
+                "code": 100,
+                "message": "ok",
+                "data": {"id": "v1", "status": "completed", "video_url": "u"},
+            },
+        )
+
+    client = HeyGenApiClient(
+        "k" * 20, rate_limiter=RateLimiter(rate=0), job_store=store
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    response = await client.generate_avatar_video(_video_request())
+    status = await client.get_video_status("v1")
+    await client.close()
+
+    assert response.video_id == "v1" and status.status == "completed"
+    job = store.find_by_video_id("v1")
+    assert job.status == "completed" and job.video_url == "u"
+    assert writer_threads and loop_thread not in writer_threads
+
+
+def _only_job(store):
+    [row] = store._conn.execute("SELECT job_id FROM jobs").fetchall()
+    return store.get(row["job_id"])
+
+
+def _raise(error):
+    def handler(request):
+        raise error
+
+    return handler
+
+
+@pytest.mark.parametrize(
+    "handler, status",
+    [
+        (_raise(httpx.ReadTimeout("timed out")), UNCONFIRMED),
+        (lambda request: httpx.Response(502), UNCONFIRMED),
+        (lambda request: httpx.Response(400, json={"error": "bad"}), "failed"),
+        (lambda request: httpx.Response(429), "failed"),
+        (_raise(httpx.ConnectError("refused")), "failed"),
+    ],
+)
+async def test_submission_errors_are_journaled_by_outcome(store, handler, status):
+    client = _generate_client(store, handler)
+    response = await client.generate_avatar_video(_video_request())
+    await client.close()
+
+    assert response.error
+    job = _only_job(store)
+    assert job.status == status
+    assert job.callback_id and job.error
+
+
+def test_wrapped_and_cancelled_submissions_are_unconfirmed():
+    wrapped = ValueError("generate failed")
+    wrapped.__cause__ = httpx.ReadTimeout("timed out")
+
+    assert job_store.submission_failure_status(wrapped) == UNCONFIRMED
+    assert job_store.submission_failure_status(asyncio.CancelledError()) == (
+        UNCONFIRMED
+    )
+    assert job_store.submission_failure_status(ValueError("bad avatar")) == "failed"
+
+
+def test_recover_keeps_unconfirmed_jobs(store, dead_pid):
+    job_id = store.create_job(callback_id="cb-1")
+    store.update(job_id, status=UNCONFIRMED)
+    _set_owner(store, job_id, _local_owner(dead_pid))
+
+    assert store.recover() == []
+    assert store.get(job_id).status == UNCONFIRMED
+    assert [job.job_id for job in store.unconfirmed_jobs()] == [job_id]
+
+
+async def test_unconfirmed_submission_is_reconciled_by_webhook(store):
+    receiver = WebhookReceiver()
+    client = _generate_client(
+        store, _raise(httpx.ReadTimeout("timed out")), webhooks=receiver
+    )
+    await client.generate_avatar_video(_video_request())
+    job = _only_job(store)
+    assert job.status == UNCONFIRMED
+
+    receiver.handle_event(
+        build_video_event(
+            "v9", url="https://example.test/v9.mp4", callback_id=job.callback_id
+        )
+    )
+    await asyncio.gather(*client._reconcile_tasks)
+    await client.close()
+
+    reconciled = store.get(job.job_id)
+    assert reconciled.video_id == "v9"
+    assert reconciled.status == "completed"
+    assert reconciled.video_url == "https://example.test/v9.mp4"
@@ -0,0 +1,161 @@
+"""Tests for failover between API keys in heygen_api.generate_video_with_pool."""
+
+import threading
+import time
+
+import httpx
+import pytest
+
+import heygen_api
+
+AUDIO_URL = "https://example.test/audio.mp3"
+KEYS = ["key-aaaa", "key-bbbb", "key-cccc"]
+
+
+def _status_error(status_code, body=None):
+    request = httpx.Request("POST", "https://api.heygen.com/v2/video/generate")
+    response = httpx.Response(status_code, json=body or {}, request=request)
+    return httpx.HTTPStatusError(
+        f"HTTP {status_code}", request=request, response=response
+    )
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(
+        heygen_api, "get_remaining_quota", lambda *args: {"remaining_quota": 100}
+    )
+    return heygen_api.ApiKeyPool(KEYS, failure_threshold=1)
+
+
+def _generate_failing_with(monkeypatch, errors):
+    """Make each key raise the next error in turn; None means success."""
+    calls = []
+
+    def generate(api_key, *args, **kwargs):
+        calls.append(api_key)
+        error = errors[len(calls) - 1]
+        if error is not None:
+            raise error
+        return f"video-{api_key}"
+
+    monkeypatch.setattr(heygen_api, "generate_heygen_video", generate)
+    return calls
+
+
+def _health(pool):
+    return {state["api_key"]: state for state in pool.snapshot()}
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _status_error(400, {"error": {"message": "avatar not found"}}),
+        ValueError("Lỗi API tạo video: invalid avatar_id"),
+        httpx.ReadTimeout("timed out"),
+        _status_error(500),
+    ],
+)
+def test_input_and_ambiguous_errors_do_not_fail_over(pool, monkeypatch, error):
+    calls = _generate_failing_with(monkeypatch, [error, None, None])
+
+    with pytest.raises(type(error)):
+        heygen_api.generate_video_with_pool(pool, AUDIO_URL, "avatar", "out")
+
+    assert len(calls) == 1
+    # The key is released and not counted as failing
+    state = _health(pool)[f"...{calls[0][-4:]}"]
+    assert state["in_flight"] == 0
+    assert state["error_rate"] == 0
+    assert state["available"]
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _status_error(429),
+        _status_error(400, {"error": {"message": "Insufficient credit"}}),
+        httpx.ConnectError("refused"),
+    ],
+)
+def test_key_specific_errors_fail_over(pool, monkeypatch, error):
+    calls = _generate_failing_with(monkeypatch, [error, None, None])
+
+    api_key, video_id = heygen_api.generate_video_with_pool(
+        pool, AUDIO_URL, "avatar", "out"
+    )
+
+    assert len(calls) == 2
+    assert api_key == calls[1] and video_id == f"video-{calls[1]}"
+    failed = _health(pool)[f"...{calls[0][-4:]}"]
+    assert failed["error_rate"] > 0
+    assert not failed["available"]  # failure_threshold=1 opens the circuit
+
+
+def test_upload_connection_error_fails_over(pool, monkeypatch):
+    upload_error = ValueError("Lỗi upload audio file: connection aborted")
+    upload_error.__cause__ = heygen_api.requests.exceptions.ConnectionError("reset")
+    calls = _generate_failing_with(monkeypatch, [upload_error, None, None])
+
+    heygen_api.generate_video_with_pool(pool, AUDIO_URL, "avatar", "out")
+
+    assert len(calls) == 2
+
+
+def test_last_error_is_raised_when_every_key_fails(pool, monkeypatch):
+    errors = [_status_error(429) for _ in KEYS]
+    calls = _generate_failing_with(monkeypatch, errors)
+
+    with pytest.raises(httpx.HTTPStatusError) as raised:
+        heygen_api.generate_video_with_pool(pool, AUDIO_URL, "avatar", "out")
+
+    assert raised.value is errors[-1]
+    assert sorted(calls) == sorted(KEYS)
+
+
+def test_concurrent_acquires_query_each_quota_once_in_the_background(monkeypatch):
+    queried = []
+    release = threading.Event()
+
+    def slow_quota(api_key, proxies=None):
+        queried.append(api_key)
+        release.wait(5)
+        return {"remaining_quota": 100}
+
+    monkeypatch.setattr(heygen_api, "get_remaining_quota", slow_quota)
+    pool = heygen_api.ApiKeyPool(KEYS)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=pool.acquire) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    # No acquire waited for the quota requests
+    assert time.monotonic() - started < 1
+    assert sum(state["in_flight"] for state in pool.snapshot()) == 8
+
+    release.set()
+    pool._refresh_thread.join(5)
+    assert sorted(queried) == sorted(KEYS)
+    assert all(state["remaining_quota"] == 100 for state in pool.snapshot())
+
+
+def test_concurrent_refreshes_do_not_query_a_key_twice(monkeypatch):
+    queried = []
+
+    def slow_quota(api_key, proxies=None):
+        queried.append(api_key)
+        time.sleep(0.05)
+        return {"remaining_quota": 5}
+
+    monkeypatch.setattr(heygen_api, "get_remaining_quota", slow_quota)
+    pool = heygen_api.ApiKeyPool(KEYS)
+
+    threads = [threading.Thread(target=pool.refresh_quotas) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert sorted(queried) == sorted(KEYS)
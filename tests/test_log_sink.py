@@ -0,0 +1,42 @@
+"""Tests for the GUI log sink."""
+
+import json
+import threading
+
+from log_sink import LogSink
+
+
+def test_emit_while_closing_does_not_fail(tmp_path):
+    sink = LogSink(str(tmp_path / "gui.log"))
+    logger = sink._logger
+    errors = []
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            try:
+                sink.emit("working")
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    sink.close()
+    sink.emit("after close")
+    stop.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == []
+    assert logger.handlers == []
+
+
+def test_records_before_close_reach_the_file(tmp_path):
+    path = tmp_path / "gui.log"
+    sink = LogSink(str(path))
+    sink.emit("hello")
+    sink.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["message"] for line in lines] == ["hello"]
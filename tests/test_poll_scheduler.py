@@ -0,0 +1,70 @@
+"""Tests for heygen_api.StatusPollScheduler."""
+
+import threading
+import time
+
+import pytest
+
+import heygen_api
+
+INTERVAL = 0.05
+
+
+@pytest.fixture
+def polls(monkeypatch):
+    """Record status checks; the video completes once ``done`` is set."""
+    calls = []
+    done = threading.Event()
+
+    def check(api_key, video_id, proxies=None):
+        calls.append(video_id)
+        return {"status": "completed" if done.is_set() else "processing"}
+
+    monkeypatch.setattr(heygen_api, "check_video_status", check)
+    monkeypatch.setattr(heygen_api, "next_poll_interval", lambda *args: INTERVAL)
+    return calls, done
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = heygen_api.StatusPollScheduler(max_workers=2)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_resubmitting_a_video_replaces_its_job(polls, scheduler):
+    calls, done = polls
+    completed = []
+    finished = threading.Event()
+
+    def on_complete(name):
+        def callback(video_id, status_data, error):
+            completed.append(name)
+            finished.set()
+
+        return callback
+
+    scheduler.submit("key", "v1", on_complete("first"))
+    scheduler.submit("key", "v1", on_complete("second"))
+    time.sleep(20 * INTERVAL)
+    polled = len(calls)
+    done.set()
+    assert finished.wait(5)
+    time.sleep(2 * INTERVAL)
+
+    # One polling chain: about one check per interval, not two
+    assert polled <= 24
+    assert completed == ["second"]
+    assert scheduler.pending_count == 0
+
+
+def test_cancelled_video_is_not_polled_again(polls, scheduler):
+    calls, _ = polls
+    scheduler.submit("key", "v1", lambda *args: None)
+    time.sleep(3 * INTERVAL)
+    scheduler.cancel("v1")
+    time.sleep(INTERVAL)
+    polled = len(calls)
+    time.sleep(5 * INTERVAL)
+
+    assert len(calls) == polled
@@ -0,0 +1,162 @@
+"""Tests for the retry policy and its use by video generation."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from heygen_mcp.api_client import (
+    Character,
+    HeyGenApiClient,
+    VideoGenerateRequest,
+    VideoInput,
+    Voice,
+)
+from heygen_mcp.ratelimit import RateLimiter
+from heygen_mcp.retry import RetryBudget, RetryPolicy
+
+
+async def _no_sleep(_delay):
+    return None
+
+
+def _policy():
+    return RetryPolicy(max_attempts=4, base_delay=0.01, sleep=_no_sleep)
+
+
+def _client(handler):
+    client = HeyGenApiClient(
+        "k" * 20, rate_limiter=RateLimiter(rate=0), retry_policy=_policy()
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def _video_request():
+    return VideoGenerateRequest(
+        video_inputs=[
+            VideoInput(
+                character=Character(avatar_id="avatar"),
+                voice=Voice(input_text="hello", voice_id="voice"),
+            )
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        httpx.ReadTimeout("timed out"),
+        httpx.HTTPStatusError(
+            "server error",
+            request=httpx.Request("POST", "https://example.test"),
+            response=httpx.Response(502),
+        ),
+    ],
+)
+async def test_non_idempotent_call_is_not_retried_on_ambiguous_errors(error):
+    attempts = 0
+
+    async def attempt():
+        nonlocal attempts
+        attempts += 1
+        raise error
+
+    with pytest.raises(type(error)):
+        await _policy().call(attempt, idempotent=False)
+    assert attempts == 1
+
+
+async def test_non_idempotent_call_is_retried_on_connect_error():
+    attempts = 0
+
+    async def attempt():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise httpx.ConnectError("refused")
+        return "ok"
+
+    assert await _policy().call(attempt, idempotent=False) == "ok"
+    assert attempts == 3
+
+
+async def test_idempotent_call_is_retried_on_read_timeout():
+    attempts = 0
+
+    async def attempt():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise httpx.ReadTimeout("timed out")
+        return "ok"
+
+    assert await _policy().call(attempt, idempotent=True) == "ok"
+    assert attempts == 2
+
+
+@pytest.mark.parametrize("outcome", ["read_timeout", 500, 503])
+async def test_generate_is_posted_once_after_ambiguous_failure(outcome):
+    posts = []
+
+    def handler(request):
+        posts.append(request)
+        if outcome == "read_timeout":
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(outcome, json={"error": {"message": "down"}})
+
+    client = _client(handler)
+    response = await client.generate_avatar_video(_video_request())
+    await client.close()
+
+    assert response.error
+    assert len(posts) == 1
+
+
+async def test_generate_is_retried_when_the_connection_failed():
+    posts = []
+
+    def handler(request):
+        posts.append(request)
+        if len(posts) == 1:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"error": None, "data": {"video_id": "v1"}})
+
+    client = _client(handler)
+    response = await client.generate_avatar_video(_video_request())
+    await client.close()
+
+    assert response.video_id == "v1"
+    assert len(posts) == 2
+    # The same callback id is sent on every attempt
+    assert posts[0].content == posts[1].content
+
+
+async def test_time_queued_behind_the_rate_limiter_is_not_charged():
+    def handler(request):
+        return httpx.Response(200, json={"ok": True})
+
+    client = HeyGenApiClient(
+        "k" * 20,
+        rate_limiter=RateLimiter(rate=20, burst=1),
+        retry_policy=RetryPolicy(deadline=0.1, sleep=_no_sleep),
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    # The last callers wait about 0.25 s for their slot, past the deadline
+    results = await asyncio.gather(
+        *(client._make_request("voices") for _ in range(6)),
+        return_exceptions=True,
+    )
+    await client.close()
+
+    assert results == [{"ok": True}] * 6
+
+
+async def test_request_still_times_out_when_the_call_exceeds_the_budget():
+    async def slow():
+        await asyncio.sleep(1)
+
+    budget = RetryBudget(0.05)
+    with pytest.raises(TimeoutError):
+        await budget.run(slow())
+    assert budget.remaining() == 0
@@ -0,0 +1,88 @@
+"""Tests for waiting on several videos in HeyGenApiClient.wait_for_videos."""
+
+import httpx
+import pytest
+
+from heygen_mcp import api_client
+from heygen_mcp.api_client import HeyGenApiClient
+from heygen_mcp.polling import MAX_STATUS_FAILURES
+from heygen_mcp.ratelimit import RateLimiter
+from heygen_mcp.retry import RetryPolicy
+
+
+async def _no_sleep(_delay):
+    return None
+
+
+@pytest.fixture(autouse=True)
+def no_poll_delay(monkeypatch):
+    monkeypatch.setattr(api_client, "next_poll_interval", lambda *a, **k: 0.0)
+
+
+def _client(responses):
+    """Client answering status checks for each video id from ``responses``."""
+    checks = []
+
+    def handler(request):
+        video_id = request.url.params["video_id"]
+        checks.append(video_id)
+        return responses[video_id](len([c for c in checks if c == video_id]))
+
+    client = HeyGenApiClient(
+        "k" * 20,
+        rate_limiter=RateLimiter(rate=0),
+        retry_policy=RetryPolicy(max_attempts=1, sleep=_no_sleep),
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, checks
+
+
+def _status(video_id, status):
+    return httpx.Response(
+        200,
+        json={"code": 100, "message": "ok", "data": {"id": video_id, "status": status}},
+    )
+
+
+def _completes_after(video_id, checks):
+    def respond(attempt):
+        return _status(video_id, "completed" if attempt >= checks else "processing")
+
+    return respond
+
+
+async def test_unknown_video_id_is_reported_without_waiting_for_the_timeout():
+    client, checks = _client(
+        {
+            "good": _completes_after("good", 3),
+            "typo": lambda attempt: httpx.Response(404, json={"message": "not found"}),
+        }
+    )
+    result = await client.wait_for_videos(["good", "typo"], timeout=30)
+    await client.close()
+
+    assert checks.count("typo") == 1
+    assert result.unavailable == ["typo"]
+    assert result.pending == [] and not result.timed_out
+    assert result.completed == 1
+    typo = result.videos[1]
+    assert typo.video_id == "typo" and "404" in typo.error
+
+
+async def test_transient_failures_are_retried_then_given_up():
+    client, checks = _client(
+        {
+            "flaky": lambda attempt: (
+                httpx.Response(503) if attempt == 1 else _status("flaky", "completed")
+            ),
+            "down": lambda attempt: httpx.Response(503),
+        }
+    )
+    result = await client.wait_for_videos(["flaky", "down"], timeout=30)
+    await client.close()
+
+    flaky, down = result.videos
+    assert flaky.status == "completed" and flaky.error is None
+    assert checks.count("down") == MAX_STATUS_FAILURES
+    assert result.unavailable == ["down"]
+    assert "503" in down.error
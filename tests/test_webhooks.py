@@ -0,0 +1,92 @@
+"""Tests for the completion webhook receiver."""
+
+import asyncio
+import json
+import socket
+
+import httpx
+import pytest
+
+from heygen_mcp import server
+from heygen_mcp.webhooks import (
+    DEFAULT_WEBHOOK_PATH,
+    WebhookReceiver,
+    build_video_event,
+    sign_payload,
+)
+
+
+@pytest.fixture
+def busy_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def test_start_on_busy_port_raises_without_exiting(busy_port):
+    receiver = WebhookReceiver()
+    with pytest.raises(OSError):
+        await receiver.start(port=busy_port)
+    # Still usable for in-process events and stop() is a no-op
+    await receiver.stop()
+    assert receiver.handle_event(build_video_event("v1")).status == "completed"
+
+
+async def test_server_falls_back_to_polling_on_busy_port(busy_port, monkeypatch):
+    monkeypatch.setenv("HEYGEN_WEBHOOK_PORT", str(busy_port))
+    assert await server.start_webhook_receiver() is None
+
+
+async def test_events_posted_over_http_resolve_waiters():
+    receiver = WebhookReceiver(secret="s3cret")
+    port = _free_port()
+    await receiver.start(port=port)
+    try:
+        waiter = asyncio.create_task(receiver.wait_any(["cb-1"], timeout=5))
+        body = json.dumps(
+            build_video_event(
+                "v1", url="https://example.test/v1.mp4", callback_id="cb-1"
+            )
+        ).encode()
+        url = f"http://127.0.0.1:{port}{DEFAULT_WEBHOOK_PATH}"
+        async with httpx.AsyncClient() as client:
+            rejected = await client.post(
+                url, content=body, headers={"Signature": "bad"}
+            )
+            accepted = await client.post(
+                url,
+                content=body,
+                headers={"Signature": sign_payload(body, "s3cret")},
+            )
+        result = await waiter
+    finally:
+        await receiver.stop()
+
+    assert rejected.status_code == 401
+    assert accepted.json() == {"ok": True, "matched": True}
+    assert result.video_id == "v1"
+    assert result.status == "completed"
+    assert receiver.get("v1").video_url == "https://example.test/v1.mp4"
+
+
+async def test_failure_event_through_asgi_transport():
+    receiver = WebhookReceiver()
+    transport = httpx.ASGITransport(app=receiver.asgi_app())
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.post(
+            f"http://fake{DEFAULT_WEBHOOK_PATH}",
+            json=build_video_event("v2", success=False, message="bad audio"),
+        )
+
+    assert response.json()["matched"] is True
+    status = receiver.get("v2")
+    assert status.status == "failed"
+    assert status.error_details == {"message": "bad audio"}